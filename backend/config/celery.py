@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.signals import celeryd_init, worker_init
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
@@ -18,3 +19,30 @@ app.autodiscover_tasks()
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
+
+@worker_init.connect
+def preload_forecasting_models(**kwargs):
+    # Web workers load model libraries lazily; Celery workers do all the
+    # fitting, so import them once in the parent and let prefork children
+    # share the pages instead of each paying for the first import
+    from django.conf import settings
+    if settings.FORECAST_PRELOAD_MODELS:
+        from forecasting.registry import models
+        models.preload()
+
+@celeryd_init.connect
+def limit_forecasting_children(conf=None, options=None, **kwargs):
+    # Model fits leak and fragment memory, so a worker consuming the
+    # forecasting queue replaces its children after a number of tasks or
+    # once one grows too large (--max-tasks-per-child and
+    # --max-memory-per-child still win when given)
+    from django.conf import settings
+    queues = (options or {}).get('queues') or []
+    if isinstance(queues, str):
+        queues = queues.split(',')
+    if not settings.FORECAST_QUEUE or settings.FORECAST_QUEUE not in queues:
+        return
+    if settings.FORECAST_WORKER_MAX_TASKS:
+        conf.worker_max_tasks_per_child = settings.FORECAST_WORKER_MAX_TASKS
+    if settings.FORECAST_WORKER_MAX_RSS_MB:
+        conf.worker_max_memory_per_child = settings.FORECAST_WORKER_MAX_RSS_MB * 1024  # KiB
@@ -1,5 +1,5 @@
 import time
-from django.db import connection, reset_queries
+from django.db import connection
 from django.conf import settings
 import logging
 
@@ -10,24 +10,31 @@ class QueryCountMiddleware:
         self.get_response = get_response
 
     def __call__(self, request):
+        if not (settings.DEBUG or settings.QUERY_COUNT_HEADERS):
+            return self.get_response(request)
+
+        # Optimize: count through an execute wrapper rather than
+        # connection.queries, which is only recorded with DEBUG on
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        start = time.time()
+        with connection.execute_wrapper(count):
+            response = self.get_response(request)
+        total_time = time.time() - start
+
         if settings.DEBUG:
-            reset_queries()
-            start = time.time()
-        
-        response = self.get_response(request)
-        
-        if settings.DEBUG:
-            end = time.time()
-            total_time = end - start
-            queries = len(connection.queries)
-            
             logger.info(f"{request.path}: {queries} queries, {total_time:.2f}s")
-            
+
             if queries > 10:
                 logger.warning(f"HIGH QUERY COUNT: {queries} queries for {request.path}")
-                
-            # Add to headers for frontend inspection
-            response['X-Query-Count'] = str(queries)
-            response['X-Response-Time'] = f"{total_time:.3f}s"
-            
+
+        # Add to headers for frontend inspection
+        response['X-Query-Count'] = str(queries)
+        response['X-Response-Time'] = f"{total_time:.3f}s"
+
         return response
@@ -41,6 +41,10 @@ MIDDLEWARE = [
     'config.middleware.QueryCountMiddleware',
 ]
 
+# X-Query-Count / X-Response-Time on every response (always on with DEBUG);
+# the loadtest command reads them for per-endpoint query counts
+QUERY_COUNT_HEADERS = config('QUERY_COUNT_HEADERS', default=False, cast=bool)
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
@@ -102,23 +106,135 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CORS_ALLOWED_ORIGINS = config('CORS_ALLOWED_ORIGINS', cast=Csv(), default="http://localhost:5173,http://127.0.0.1:5173")
 
 # Celery Configuration
-CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://localhost:6379/0')
-CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='redis://localhost:6379/0')
+# Eager mode runs tasks inline with an in-memory broker and result store,
+# for tests and local runs without Redis
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=False, cast=bool)
+CELERY_TASK_EAGER_PROPAGATES = CELERY_TASK_ALWAYS_EAGER
+CELERY_TASK_STORE_EAGER_RESULT = CELERY_TASK_ALWAYS_EAGER
+CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='memory://' if CELERY_TASK_ALWAYS_EAGER else 'redis://localhost:6379/0')
+CELERY_RESULT_BACKEND = config(
+    'CELERY_RESULT_BACKEND',
+    default='cache+memory://' if CELERY_TASK_ALWAYS_EAGER else 'redis://localhost:6379/0'
+)
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 
 # Redis Cache Configuration
-CACHES = {
-    'default': {
-        'BACKEND': 'django_redis.cache.RedisCache',
-        'LOCATION': config('REDIS_URL', default='redis://localhost:6379/1'),
-        'OPTIONS': {
-            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+# An empty REDIS_URL uses a per-process in-memory cache instead (offline runs)
+REDIS_URL = config('REDIS_URL', default='redis://localhost:6379/1')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_URL,
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            }
         }
     }
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# Forecasting
+# Model libraries are imported on first use; Celery workers preload them
+FORECAST_PRELOAD_MODELS = config('FORECAST_PRELOAD_MODELS', default=True, cast=bool)
+
+# Per-process LRU of product sales series, keyed by sales watermark
+FORECAST_SERIES_CACHE_SIZE = config('FORECAST_SERIES_CACHE_SIZE', default=512, cast=int)
+
+# Stepwise ARIMA order search bounds and pool size (0 = auto, 1 = serial)
+FORECAST_ARIMA_MAX_P = config('FORECAST_ARIMA_MAX_P', default=3, cast=int)
+FORECAST_ARIMA_MAX_Q = config('FORECAST_ARIMA_MAX_Q', default=3, cast=int)
+FORECAST_ARIMA_WORKERS = config('FORECAST_ARIMA_WORKERS', default=0, cast=int)
+
+# How independent model fits run: 'process', 'thread' or 'serial' (0 = auto)
+FORECAST_EXECUTOR = config('FORECAST_EXECUTOR', default='process')
+FORECAST_EXECUTOR_WORKERS = config('FORECAST_EXECUTOR_WORKERS', default=0, cast=int)
+
+# Fitted model store (empty disables it). ARIMA/Holt-Winters states are
+# rolled forward over up to this many new days before a full refit.
+FORECAST_ARTIFACT_DIR = config('FORECAST_ARTIFACT_DIR', default=str(BASE_DIR / 'var' / 'forecast_artifacts'))
+FORECAST_INCREMENTAL_MAX_DAYS = config('FORECAST_INCREMENTAL_MAX_DAYS', default=14, cast=int)
+
+# Fast-tier routing: share of zero days for Croston/SBA and TSB, and the
+# average daily units below which seasonal naive is used
+FORECAST_INTERMITTENT_ZERO_RATIO = config('FORECAST_INTERMITTENT_ZERO_RATIO', default=0.5, cast=float)
+FORECAST_TSB_ZERO_RATIO = config('FORECAST_TSB_ZERO_RATIO', default=0.8, cast=float)
+FORECAST_LOW_VOLUME_AVG_DAILY = config('FORECAST_LOW_VOLUME_AVG_DAILY', default=1.0, cast=float)
+
+# Rolling-origin backtest cost cap per model: cut points evaluated, and
+# seconds after which the remaining origins are skipped
+FORECAST_BACKTEST_MAX_ORIGINS = config('FORECAST_BACKTEST_MAX_ORIGINS', default=6, cast=int)
+FORECAST_BACKTEST_MAX_SECONDS = config('FORECAST_BACKTEST_MAX_SECONDS', default=10.0, cast=float)
+
+# Seconds every model fit of one forecast must finish in (0 = no limit);
+# models that overrun are dropped or replaced by a cheaper fallback
+FORECAST_TIME_BUDGET = config('FORECAST_TIME_BUDGET', default=20.0, cast=float)
+
+# Forecast rows per bulk-upsert transaction when persisting forecasts
+FORECAST_WRITE_CHUNK_ROWS = config('FORECAST_WRITE_CHUNK_ROWS', default=5000, cast=int)
+
+# Products per subtask when a batch forecast fans out over Celery workers
+FORECAST_BATCH_CHUNK_SIZE = config('FORECAST_BATCH_CHUNK_SIZE', default=200, cast=int)
+
+# Dedicated forecasting workers (opt-in): with FORECAST_QUEUE set,
+# forecasting tasks go to that queue, which then needs a worker started
+# with -Q <queue>; empty keeps them on the default queue. A worker
+# consuming it recycles a child after FORECAST_WORKER_MAX_TASKS tasks or
+# once it holds more than FORECAST_WORKER_MAX_RSS_MB; the engine's own
+# process pool uses the same limits per worker (0 = no limit). FORECAST_FIT_STATS records the wall
+# time and memory of every fit in FitStat.
+FORECAST_QUEUE = config('FORECAST_QUEUE', default='')
+FORECAST_WORKER_MAX_TASKS = config('FORECAST_WORKER_MAX_TASKS', default=100, cast=int)
+FORECAST_WORKER_MAX_RSS_MB = config('FORECAST_WORKER_MAX_RSS_MB', default=1536, cast=int)
+FORECAST_FIT_STATS = config('FORECAST_FIT_STATS', default=True, cast=bool)
+CELERY_TASK_ROUTES = {'forecasting.tasks.*': {'queue': FORECAST_QUEUE}} if FORECAST_QUEUE else {}
+
+# Clustered batch mode: target products per shared model, and the days of
+# recent demand whose normalized shape products are clustered on
+FORECAST_CLUSTER_SIZE = config('FORECAST_CLUSTER_SIZE', default=25, cast=int)
+FORECAST_CLUSTER_WINDOW = config('FORECAST_CLUSTER_WINDOW', default=56, cast=int)
+
+# Batch progress in the cache: seconds between a chunk's updates, how long
+# it is kept, and the poll interval / lifetime of one event stream (kept
+# well under the gunicorn worker timeout; EventSource reconnects)
+FORECAST_PROGRESS_INTERVAL = config('FORECAST_PROGRESS_INTERVAL', default=1.0, cast=float)
+FORECAST_PROGRESS_TTL = config('FORECAST_PROGRESS_TTL', default=86400, cast=int)
+FORECAST_PROGRESS_STREAM_INTERVAL = config('FORECAST_PROGRESS_STREAM_INTERVAL', default=1.0, cast=float)
+FORECAST_PROGRESS_STREAM_TIMEOUT = config('FORECAST_PROGRESS_STREAM_TIMEOUT', default=20, cast=int)
+
+# Scheduled refresh by ABC class (celery beat). Every run refreshes the
+# slice of each class that falls due, so a class is covered once per its
+# cadence in hours; products without new sales since their last refresh
+# are skipped.
+FORECAST_REFRESH_ENABLED = config('FORECAST_REFRESH_ENABLED', default=True, cast=bool)
+FORECAST_REFRESH_INTERVAL_MINUTES = config('FORECAST_REFRESH_INTERVAL_MINUTES', default=60, cast=int)
+FORECAST_REFRESH_CADENCE_HOURS = {
+    'A': config('FORECAST_REFRESH_A_HOURS', default=24, cast=int),
+    'B': config('FORECAST_REFRESH_B_HOURS', default=72, cast=int),
+    'C': config('FORECAST_REFRESH_C_HOURS', default=168, cast=int),
 }
+FORECAST_REFRESH_DAYS = config('FORECAST_REFRESH_DAYS', default=30, cast=int)
+
+# Accuracy scoring of stored forecasts as sales come in: how often the
+# job looks for newly closed days, and the trailing days behind the live
+# MAE/MAPE of each product's models
+FORECAST_ACCURACY_INTERVAL_MINUTES = config('FORECAST_ACCURACY_INTERVAL_MINUTES', default=60, cast=int)
+FORECAST_ACCURACY_WINDOW_DAYS = config('FORECAST_ACCURACY_WINDOW_DAYS', default=28, cast=int)
+
+CELERY_BEAT_SCHEDULE = {
+    'score-forecast-accuracy': {
+        'task': 'forecasting.tasks.score_forecasts_task',
+        'schedule': FORECAST_ACCURACY_INTERVAL_MINUTES * 60,
+    },
+}
+if FORECAST_REFRESH_ENABLED:
+    CELERY_BEAT_SCHEDULE['refresh-forecasts-by-abc-class'] = {
+        'task': 'forecasting.tasks.scheduled_refresh_task',
+        'schedule': FORECAST_REFRESH_INTERVAL_MINUTES * 60,
+    }
 
 # Logging Configuration
 LOGGING = {
@@ -0,0 +1,59 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_artifact_store(settings, tmp_path):
+    settings.FORECAST_ARTIFACT_DIR = str(tmp_path / 'artifacts')
+
+
+@pytest.fixture(autouse=True)
+def clear_series_cache():
+    # Rolled-back test transactions reuse ids, which would make stale
+    # watermarks look current across tests
+    from forecasting.series_cache import series_cache
+    series_cache.clear()
+    yield
+
+
+@pytest.fixture
+def celery_eager(settings, monkeypatch):
+    """Run Celery tasks inline with an in-memory broker and result store"""
+    from config.celery import app
+
+    def reset_backend():
+        # Dropped so it is rebuilt lazily from the current settings
+        app._backend_cache = None
+        app._local.__dict__.pop('backend', None)
+
+    eager = {
+        'task_always_eager': True,
+        'task_eager_propagates': True,
+        'task_store_eager_result': True,
+        'broker_url': 'memory://',
+        'result_backend': 'cache+memory://',
+    }
+    # The Celery config reads the live Django settings (CELERY_ namespace)
+    for key, value in eager.items():
+        setattr(settings, f'CELERY_{key.upper()}', value)
+    # ...but the app keeps its own copy, and Celery reads the broker and
+    # result store from CELERY_BROKER_URL/CELERY_RESULT_BACKEND in the
+    # environment before either, so all three are set (and restored)
+    for key, value in eager.items():
+        monkeypatch.setitem(app.conf, key, value)
+    monkeypatch.setenv('CELERY_BROKER_URL', eager['broker_url'])
+    monkeypatch.setenv('CELERY_RESULT_BACKEND', eager['result_backend'])
+    # Tasks copy this from the config once, when they are bound to the app
+    for task in app.tasks.values():
+        monkeypatch.setattr(task, 'store_eager_result', True)
+    reset_backend()
+    yield app
+    reset_backend()
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    """Process-local Django cache instead of Redis"""
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    from django.core.cache import cache
+    cache.clear()
+    yield cache
@@ -1,3 +1,11 @@
 from django.contrib import admin
 
 # Register your models here.
+from .models import FitStat
+
+
+@admin.register(FitStat)
+class FitStatAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'model_type', 'product', 'n_obs', 'wall_seconds', 'peak_rss_mb', 'peak_growth_mb', 'rss_mb', 'pid')
+    list_filter = ('model_type',)
+    ordering = ('-peak_growth_mb',)
@@ -0,0 +1,66 @@
+import numpy as np
+import time
+from django.conf import settings
+import warnings
+from .executors import parallel_map, default_workers
+from .registry import models
+
+
+def _fit_candidate(args):
+    """Fit one (p, d, q) order; runs inside pool workers, so keep it picklable"""
+    y, order = args
+    warnings.filterwarnings("ignore")
+    try:
+        res = models.get('arima').ARIMA(y, order=order).fit()
+        return order, float(res.aic), res.params
+    except Exception:
+        return order, float('inf'), None
+
+
+def stepwise_order_search(y, d=1, max_p=None, max_q=None, max_workers=None, deadline=None):
+    """
+    Hyndman-Khandakar style stepwise search over (p, d, q).
+
+    Starts from the usual four seeds, then repeatedly evaluates the +-1
+    neighbours of the current best order (in parallel) and stops when no
+    neighbour lowers the AIC. The winner is rebuilt from its parameters with
+    a single Kalman filter pass instead of being re-optimized. Past the
+    deadline (time.monotonic()) the search stops at the best order so far.
+
+    Returns (order, fitted_result); result is None if every candidate failed.
+    """
+    max_p = settings.FORECAST_ARIMA_MAX_P if max_p is None else max_p
+    max_q = settings.FORECAST_ARIMA_MAX_Q if max_q is None else max_q
+    if max_workers is None:
+        max_workers = settings.FORECAST_ARIMA_WORKERS or default_workers()
+
+    y = np.asarray(y, dtype=float)
+    scores = {}  # order -> (aic, params)
+
+    def evaluate(orders):
+        todo = []
+        for p, q in orders:
+            order = (p, d, q)
+            if 0 <= p <= max_p and 0 <= q <= max_q and order not in scores and order not in todo:
+                todo.append(order)
+        for order, aic, params in parallel_map(_fit_candidate, [(y, o) for o in todo], max_workers):
+            scores[order] = (aic, params)
+
+    def best():
+        return min(scores.items(), key=lambda kv: kv[1][0])
+
+    evaluate([(2, 2), (0, 0), (1, 0), (0, 1)])
+    best_order, (best_aic, _) = best()
+
+    while np.isfinite(best_aic) and (deadline is None or time.monotonic() < deadline):
+        p, _, q = best_order
+        evaluate([(p + dp, q + dq) for dp in (-1, 0, 1) for dq in (-1, 0, 1) if dp or dq])
+        order, (aic, _) = best()
+        if aic >= best_aic:
+            break
+        best_order, best_aic = order, aic
+
+    params = scores[best_order][1]
+    if params is None:
+        return best_order, None
+    return best_order, models.get('arima').ARIMA(y, order=best_order).filter(params)
@@ -0,0 +1,91 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import numpy as np
+from pathlib import Path
+from django.conf import settings
+from django.utils import timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def series_digest(df, n_obs=None):
+    """Exact fingerprint of the first n_obs days of a ('ds', 'y') frame"""
+    y = df['y'].values if n_obs is None else df['y'].values[:n_obs]
+    h = hashlib.sha1(str(df['ds'].iloc[0].date()).encode())
+    h.update(np.ascontiguousarray(y, dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+
+class ModelArtifact:
+    """
+    Fitted state of one model for one product.
+
+    state is the model's compact, picklable fitted state (parameters, not
+    the full statsmodels results object). n_obs/digest identify the exact
+    history it currently describes; fit_n_obs is where it was last
+    optimized, so incremental updates can be bounded.
+    """
+
+    def __init__(self, product_id, model_type, state, n_obs, digest, fit_n_obs=None, backtest=None):
+        self.product_id = product_id
+        self.model_type = model_type
+        self.state = state
+        self.n_obs = n_obs
+        self.digest = digest
+        self.fit_n_obs = fit_n_obs if fit_n_obs is not None else n_obs
+        self.backtest = backtest
+        self.updated_at = timezone.now()
+
+    def matches(self, df):
+        return len(df) == self.n_obs and series_digest(df) == self.digest
+
+    def extends(self, df, max_new_days):
+        """True if df is the stored history plus at most max_new_days appended days"""
+        if not (self.n_obs < len(df) <= self.fit_n_obs + max_new_days):
+            return False
+        return series_digest(df, self.n_obs) == self.digest
+
+
+class ArtifactStore:
+    """Filesystem store of ModelArtifacts: <root>/<product_id>/<model_type>.pkl"""
+
+    def __init__(self, root=None):
+        self.root = Path(root or settings.FORECAST_ARTIFACT_DIR)
+
+    def _path(self, product_id, model_type):
+        return self.root / str(product_id) / f"{model_type}.pkl"
+
+    def load(self, product_id, model_type):
+        path = self._path(product_id, model_type)
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable artifact {path}: {str(e)}")
+            return None
+
+    def save(self, artifact):
+        path = self._path(artifact.product_id, artifact.model_type)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so concurrent readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def delete(self, product_id, model_type=None):
+        folder = self.root / str(product_id)
+        paths = [self._path(product_id, model_type)] if model_type else folder.glob('*.pkl')
+        for path in paths:
+            if path.exists():
+                path.unlink()
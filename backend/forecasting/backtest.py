@@ -0,0 +1,68 @@
+import numpy as np
+from .stats import accuracy
+
+
+def rolling_origins(n_obs, max_origins, train_fraction=0.8):
+    """
+    Cut points for a rolling-origin backtest as (origins, horizon).
+
+    The first origin is the classic 80/20 split and the rest are spread
+    evenly over the test span up to the last day; horizon runs from the
+    first origin to the end, so later origins fill shorter rows.
+    """
+    first = max(1, min(int(n_obs * train_fraction), n_obs - 1))
+    horizon = n_obs - first
+    count = max(1, min(max_origins, horizon))
+    origins = np.unique(np.linspace(first, n_obs - 1, count).astype(np.int64))
+    return origins, horizon
+
+
+def actual_matrix(y, origins, horizon):
+    """origins x horizon matrix of y[origin + h], NaN past the end of y"""
+    y = np.asarray(y, dtype=np.float64)
+    idx = origins[:, None] + np.arange(horizon)[None, :]
+    inside = idx < len(y)
+    return np.where(inside, y[np.minimum(idx, len(y) - 1)], np.nan)
+
+
+def score(actual, predicted):
+    """
+    r2/mae/mape pooled over every evaluated cell of an origins x horizon
+    matrix pair; NaN cells (past the end, or origins skipped by the cost
+    cap) are ignored.
+    """
+    mask = ~np.isnan(actual) & ~np.isnan(predicted)
+    return accuracy(actual[mask], predicted[mask])
+
+
+class Backtest:
+    """Predictions of one model (or a merged ensemble) at each origin"""
+
+    def __init__(self, origins, predicted):
+        self.origins = origins
+        self.predicted = predicted
+
+    @property
+    def horizon(self):
+        return self.predicted.shape[1]
+
+    def aligned(self, other):
+        return self.predicted.shape == other.predicted.shape and np.array_equal(self.origins, other.origins)
+
+    def score(self, y):
+        return score(actual_matrix(y, self.origins, self.horizon), self.predicted)
+
+
+def merge_backtests(backtests):
+    """
+    Average member backtests cell by cell, ignoring missing cells. Only
+    members evaluated at the first member's origins are merged.
+    """
+    backtests = [b for b in backtests if b is not None]
+    if not backtests:
+        return None
+    ref = backtests[0]
+    stack = np.stack([b.predicted for b in backtests if b.aligned(ref)])
+    count = (~np.isnan(stack)).sum(axis=0)
+    total = np.nansum(stack, axis=0)
+    return Backtest(ref.origins, np.where(count > 0, total / np.maximum(count, 1), np.nan))
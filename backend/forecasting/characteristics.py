@@ -0,0 +1,168 @@
+import numpy as np
+from . import stats
+from .models import ProductCharacteristics
+from .series_cache import get_sales_watermark, get_sales_watermarks, watermark_key
+
+# Routing needs at least two weeks of history
+MIN_HISTORY_DAYS = 14
+
+# Rows per vectorized block, bounding the temporaries of catalog-wide runs
+BLOCK_ROWS = 2048
+
+
+def _block_characteristics(Y, first, last, weekday0):
+    cols = np.arange(Y.shape[1])
+    mask = (cols[None, :] >= first[:, None]) & (cols[None, :] <= last[:, None])
+    n = (last - first + 1).astype(np.float64)
+
+    total = np.where(mask, Y, 0.0).sum(axis=1)
+    trend, _ = stats.ols(Y, mask=mask)
+    zero_ratio = (mask & (Y == 0)).sum(axis=1) / n
+    return (
+        total, total / n, stats.cv(Y, mask), trend,
+        stats.seasonality(Y, weekday0, mask), zero_ratio, n
+    )
+
+
+def compute_characteristics(Y, first, last, weekday0):
+    """
+    Routing characteristics of many series in one vectorized pass.
+
+    Row i of the products x days matrix Y is read from column first[i] to
+    last[i] (its first and last day of sales); weekday0 is the weekday of
+    column 0. Returns one dict per row.
+    """
+    Y = np.atleast_2d(np.asarray(Y, dtype=np.float64))
+    first = np.asarray(first, dtype=np.int64)
+    last = np.asarray(last, dtype=np.int64)
+    out = []
+    for start in range(0, len(Y), BLOCK_ROWS):
+        rows = slice(start, start + BLOCK_ROWS)
+        # Only the columns some row of the block covers
+        lo, hi = int(first[rows].min()), int(last[rows].max()) + 1
+        block = _block_characteristics(
+            Y[rows, lo:hi], first[rows] - lo, last[rows] - lo, (weekday0 + lo) % 7
+        )
+        for total, mean, cv, trend, seasonality, zero_ratio, n in zip(*block):
+            out.append({
+                'total_sales': int(total),
+                'avg_daily': float(mean),
+                'cv': float(cv),
+                'trend': float(trend),
+                'seasonality': float(seasonality),
+                'zero_ratio': float(zero_ratio),
+                'days_count': int(n)
+            })
+    return out
+
+
+def panel_characteristics(panel, product_ids):
+    """{product_id: characteristics} of the given products with sales in the panel"""
+    pids = [int(pid) for pid in product_ids if pid in panel]
+    if not pids or panel.start_date is None:
+        return {}
+    Y = panel.matrix[[panel.index[pid] for pid in pids]]
+    sold = Y > 0
+    has_sales = sold.any(axis=1)
+    first = sold.argmax(axis=1)
+    last = Y.shape[1] - 1 - sold[:, ::-1].argmax(axis=1)
+    pids = [pid for pid, keep in zip(pids, has_sales) if keep]
+    if not pids:
+        return {}
+    chars = compute_characteristics(Y[has_sales], first[has_sales], last[has_sales], panel.start_date.weekday())
+    return dict(zip(pids, chars))
+
+
+def frame_characteristics(df):
+    """Characteristics of one ('ds', 'y') frame"""
+    y = df['y'].values
+    return compute_characteristics(y[None, :], [0], [len(y) - 1], df['ds'].iloc[0].weekday())[0]
+
+
+def save_characteristics(chars, watermarks):
+    ProductCharacteristics.objects.bulk_create(
+        [
+            ProductCharacteristics(product_id=pid, sales_watermark=watermark_key(watermarks[pid]), **values)
+            for pid, values in chars.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['product'],
+        update_fields=list(ProductCharacteristics.FIELDS) + ['sales_watermark', 'computed_at']
+    )
+
+
+def stored_characteristics(product_ids, panel=None):
+    """
+    {product_id: characteristics} of the products with sales.
+
+    Rows stored at the product's current sales watermark are read as they
+    are; the others are recomputed in one vectorized pass over the panel
+    (loaded for them if not given) and upserted.
+    """
+    from .panel import load_demand_panel
+    product_ids = [int(pid) for pid in product_ids]
+    watermarks = get_sales_watermarks(product_ids)
+    stored = {
+        c.product_id: c for c in ProductCharacteristics.objects.filter(product_id__in=product_ids)
+    }
+
+    out, stale = {}, []
+    for pid in product_ids:
+        row = stored.get(pid)
+        if row is not None and row.sales_watermark == watermark_key(watermarks[pid]):
+            out[pid] = row.as_dict()
+        elif watermarks[pid][2]:
+            stale.append(pid)
+
+    if stale:
+        if panel is None or any(pid not in panel for pid in stale):
+            panel = load_demand_panel(stale)
+        computed = panel_characteristics(panel, stale)
+        # A panel cut off before a product's last sale describes an older
+        # history than its watermark; use those values but do not store them
+        save_characteristics({
+            pid: values for pid, values in computed.items()
+            if panel.end_date is not None and watermarks[pid][1] <= panel.end_date
+        }, watermarks)
+        out.update(computed)
+    return out
+
+
+def refresh_all_characteristics():
+    """
+    Recompute and store the characteristics of every product with sales,
+    loading the panel of BLOCK_ROWS products at a time so memory does not
+    grow with the catalog. Returns the number of rows written.
+    """
+    from .panel import load_demand_panel
+    from inventory.models import Product
+    # Watermarks first: a sale landing meanwhile leaves its row stale
+    watermarks = get_sales_watermarks(list(Product.objects.values_list('id', flat=True)))
+    with_sales = [pid for pid, w in watermarks.items() if w[2]]
+    written = 0
+    for start in range(0, len(with_sales), BLOCK_ROWS):
+        panel = load_demand_panel(with_sales[start:start + BLOCK_ROWS])
+        chars = panel_characteristics(panel, panel.product_ids.tolist())
+        save_characteristics(chars, watermarks)
+        written += len(chars)
+    return written
+
+
+def product_characteristics(product_id, load_frame, watermark=None):
+    """
+    Characteristics of one product: its stored row if still current, else
+    computed from load_frame() (a ('ds', 'y') frame or None) and stored.
+    watermark is the product's get_sales_watermark when already known.
+    """
+    if watermark is None:
+        watermark = get_sales_watermark(product_id)
+    row = ProductCharacteristics.objects.filter(product_id=product_id).first()
+    if row is not None and row.sales_watermark == watermark_key(watermark):
+        return row.as_dict()
+
+    df = load_frame()
+    if df is None or not len(df):
+        return None
+    chars = frame_characteristics(df)
+    save_characteristics({int(product_id): chars}, {int(product_id): watermark})
+    return chars
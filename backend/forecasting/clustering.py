@@ -0,0 +1,65 @@
+import numpy as np
+
+
+def demand_profiles(Y, window):
+    """
+    Shape of each row's recent demand, independent of its volume.
+
+    Returns (profiles, levels): the last `window` days of each row divided
+    by its mean over them, and those means. Rows without demand in the
+    window get an all-zero profile and level 0.
+    """
+    recent = np.asarray(Y, dtype=np.float64)[:, -window:]
+    levels = recent.mean(axis=1)
+    scale = np.where(levels > 0, levels, 1.0)
+    return recent / scale[:, None], levels
+
+
+def _sq_distances(X, centroids):
+    # |x|^2 - 2 x.c + |c|^2 for every (row, centroid) pair at once
+    d = (X * X).sum(axis=1)[:, None] - 2 * X @ centroids.T + (centroids * centroids).sum(axis=1)[None, :]
+    return np.maximum(d, 0.0)
+
+
+def _seed(X, k, rng):
+    """k-means++ seeding: each next centroid drawn in proportion to its squared distance"""
+    centroids = [X[rng.integers(len(X))]]
+    closest = _sq_distances(X, np.array(centroids))[:, 0]
+    for _ in range(1, k):
+        total = closest.sum()
+        if total <= 0:
+            break
+        centroids.append(X[rng.choice(len(X), p=closest / total)])
+        closest = np.minimum(closest, _sq_distances(X, centroids[-1][None, :])[:, 0])
+    return np.array(centroids)
+
+
+def kmeans(X, k, max_iter=50, seed=0):
+    """
+    Vectorized k-means on the rows of X. Returns (labels, centroids);
+    fewer than k clusters come back when X has fewer distinct rows.
+    Labels are renumbered 0..n_clusters-1 in order of first appearance.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    k = max(1, min(int(k), len(X)))
+    centroids = _seed(X, k, np.random.default_rng(seed))
+
+    labels = None
+    for _ in range(max_iter):
+        new_labels = _sq_distances(X, centroids).argmin(axis=1)
+        if labels is not None and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        # Means of each cluster's rows via a one-hot product; clusters that
+        # lost all their rows keep their previous centroid
+        onehot = np.zeros((len(X), len(centroids)))
+        onehot[np.arange(len(X)), labels] = 1.0
+        counts = onehot.sum(axis=0)
+        sums = onehot.T @ X
+        centroids = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], centroids)
+
+    used, labels = np.unique(labels, return_inverse=True)
+    order = np.argsort(np.unique(labels, return_index=True)[1])
+    relabel = np.empty_like(order)
+    relabel[order] = np.arange(len(order))
+    return relabel[labels], centroids[used][order]
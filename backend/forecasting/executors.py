@@ -0,0 +1,257 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import partial
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from .telemetry import fit_meter, current_rss_mb
+import logging
+
+logger = logging.getLogger(__name__)
+
+_pools = {}
+_pool_tasks = {}
+_pools_lock = threading.Lock()
+
+
+class _TimedOut:
+    def __repr__(self):
+        return 'TIMED_OUT'
+
+
+# Result of a call that had not finished by its deadline
+TIMED_OUT = _TimedOut()
+
+
+def default_workers(cap=4):
+    return max(1, min(cap, os.cpu_count() or 1))
+
+
+def can_use_process_pool():
+    """
+    Daemonic processes (Celery prefork children, our own pool workers) are
+    not allowed to start children, so nested pools must run serially.
+    """
+    return not multiprocessing.current_process().daemon
+
+
+class _TrackingContext:
+    """Multiprocessing context that remembers the processes it started"""
+    def __init__(self, context):
+        self._context = context
+        self.processes = []
+
+    def Process(self, *args, **kwargs):
+        process = self._context.Process(*args, **kwargs)
+        self.processes.append(process)
+        return process
+
+    def __getattr__(self, name):
+        return getattr(self._context, name)
+
+
+class _StoppablePool(ProcessPoolExecutor):
+    """Process pool whose workers can be stopped, running calls included"""
+    def __init__(self, max_workers):
+        self._tracker = _TrackingContext(multiprocessing.get_context())
+        super().__init__(max_workers=max_workers, mp_context=self._tracker)
+
+    def terminate(self):
+        # A running fit cannot be cancelled; stop its worker instead
+        for process in self._tracker.processes:
+            if process.is_alive():
+                process.terminate()
+        self.shutdown(wait=False, cancel_futures=True)
+
+
+def get_process_pool(max_workers):
+    """Shared, lazily created process pool (one per worker count)"""
+    with _pools_lock:
+        pool = _pools.get(max_workers)
+        if pool is None:
+            pool = _StoppablePool(max_workers)
+            _pools[max_workers] = pool
+            _pool_tasks[max_workers] = 0
+        return pool
+
+
+def discard_process_pool(max_workers, pool=None, terminate=False):
+    """
+    Shut down the shared pool so the next call forks a fresh one. Given a
+    pool, only that one is dropped: a replacement already in place stays.
+    """
+    with _pools_lock:
+        if pool is None or _pools.get(max_workers) is pool:
+            pool = _pools.pop(max_workers, pool)
+            _pool_tasks.pop(max_workers, None)
+    if pool is not None:
+        if terminate:
+            pool.terminate()
+        else:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _in_pool(call, guard=True):
+    """Run a call in a pool worker; returns (result, its fit stats, its RSS)"""
+    fn, args = call
+    result = _guarded_call(call) if guard else fn(*args)
+    return result, fit_meter.drain(), current_rss_mb()
+
+
+def _collect(pool, max_workers, outputs):
+    """
+    Results of _in_pool outputs. Their fit stats join this process's
+    buffer, and the pool is retired once its workers ran about
+    FORECAST_WORKER_MAX_TASKS calls each or one grew past
+    FORECAST_WORKER_MAX_RSS_MB; the next call forks fresh workers.
+    """
+    results, rss = [], 0.0
+    for result, stats, worker_rss in outputs:
+        fit_meter.extend(stats)
+        rss = max(rss, worker_rss)
+        results.append(result)
+
+    max_tasks, max_rss = settings.FORECAST_WORKER_MAX_TASKS, settings.FORECAST_WORKER_MAX_RSS_MB
+    with _pools_lock:
+        if _pools.get(max_workers) is not pool:
+            return results
+        _pool_tasks[max_workers] += len(outputs)
+        worn_out = max_tasks and _pool_tasks[max_workers] >= max_tasks * max_workers
+        bloated = max_rss and rss > max_rss
+        if worn_out or bloated:
+            del _pools[max_workers], _pool_tasks[max_workers]
+        else:
+            pool = None
+    if pool is not None:
+        # Optimize: leaked and fragmented model memory goes with the old
+        # workers instead of accumulating until the host runs out
+        why = f"a worker reached {rss:.0f} MB" if bloated else f"{max_tasks} calls per worker"
+        logger.info(f"Recycling the forecast process pool after {why}")
+        pool.shutdown(wait=False)
+    return results
+
+
+def parallel_map(fn, items, max_workers):
+    """
+    Map fn over items on the shared process pool, preserving order.
+
+    Falls back to an in-process loop when parallelism is disabled, there is
+    only one item, or the current process cannot fork (see above). A broken
+    pool is discarded and the batch is retried serially.
+    """
+    items = list(items)
+    if max_workers <= 1 or len(items) <= 1 or not can_use_process_pool():
+        return [fn(item) for item in items]
+
+    try:
+        pool = get_process_pool(max_workers)
+        outputs = list(pool.map(partial(_in_pool, guard=False), [(fn, (item,)) for item in items]))
+        return _collect(pool, max_workers, outputs)
+    except BrokenProcessPool:
+        logger.warning("Forecast process pool broke, retrying serially")
+        discard_process_pool(max_workers)
+        return [fn(item) for item in items]
+
+
+def _guarded_call(call):
+    fn, args = call
+    try:
+        return fn(*args)
+    except Exception as e:
+        logger.error(f"Forecast job {getattr(fn, '__name__', fn)} failed: {str(e)}")
+        return None
+
+
+def _run_serial_until(calls, deadline):
+    # Nothing can interrupt a call here, so the deadline only stops the
+    # calls that have not started yet
+    return [_guarded_call(call) if time.monotonic() < deadline else TIMED_OUT for call in calls]
+
+
+def _run_threads_until(calls, max_workers, deadline):
+    pool = ThreadPoolExecutor(max_workers=min(max_workers, len(calls)))
+    futures = [pool.submit(_guarded_call, call) for call in calls]
+    done, _ = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+    # Threads cannot be stopped; late ones finish in the background
+    pool.shutdown(wait=False, cancel_futures=True)
+    return [future.result() if future in done else TIMED_OUT for future in futures]
+
+
+def _run_until(calls, kind, max_workers, deadline):
+    if kind == 'process' and not can_use_process_pool():
+        kind = 'serial'
+    if kind == 'serial' or not calls:
+        return _run_serial_until(calls, deadline)
+    if kind == 'thread':
+        return _run_threads_until(calls, max_workers, deadline)
+
+    # Even one worker is worth a pool here: it is what lets a runaway fit
+    # be stopped
+    pool = get_process_pool(max_workers)
+    try:
+        futures = [pool.submit(_in_pool, call) for call in calls]
+    except (BrokenProcessPool, RuntimeError):
+        # Broken, or shut down by another caller's overrun
+        logger.warning("Forecast process pool broke, retrying serially")
+        discard_process_pool(max_workers, pool)
+        return _run_serial_until(calls, deadline)
+
+    done, pending = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+    running = [f for f in pending if not f.cancel()]
+    if running:
+        # Optimize: the shared pool is only torn down and replaced when a
+        # call actually overruns, not set up per budgeted forecast
+        logger.warning(f"{len(running)} forecast jobs overran their deadline, replacing the process pool")
+        discard_process_pool(max_workers, pool, terminate=True)
+
+    results, lost = [], []
+    for i, future in enumerate(futures):
+        if future not in done:
+            results.append(TIMED_OUT)
+        elif future.cancelled() or isinstance(future.exception(), BrokenProcessPool):
+            lost.append(i)
+            results.append(None)
+        elif future.exception() is not None:
+            results.append(None)
+        else:
+            results.append(future.result())
+
+    finished = [i for i, r in enumerate(results) if r is not TIMED_OUT and r is not None]
+    for i, result in zip(finished, _collect(pool, max_workers, [results[i] for i in finished])):
+        results[i] = result
+    if lost and time.monotonic() < deadline:
+        # Calls lost with a pool another caller stopped run again on its
+        # replacement
+        for i, result in zip(lost, _run_until([calls[i] for i in lost], kind, max_workers, deadline)):
+            results[i] = result
+    return results
+
+
+def run_concurrently(calls, kind='process', max_workers=None, deadline=None):
+    """
+    Run independent (fn, args) calls concurrently and return their results
+    in order. A call that raises yields None instead of failing the batch.
+
+    kind is 'process' (shared pool, fn and args must be picklable),
+    'thread' (a short-lived thread pool) or 'serial'.
+
+    With a deadline (a time.monotonic() value) calls unfinished by then
+    come back as TIMED_OUT. An overrun terminates the shared pool's
+    workers and replaces the pool; calls of other callers lost with it are
+    resubmitted. Serial runs (also processes that cannot fork) skip the
+    calls not yet started at the deadline.
+    """
+    calls = list(calls)
+    if max_workers is None:
+        max_workers = default_workers(cap=6)
+    if deadline is not None:
+        return _run_until(calls, kind, max_workers, deadline)
+
+    if kind == 'thread' and len(calls) > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(calls))) as pool:
+            return list(pool.map(_guarded_call, calls))
+    if kind == 'process':
+        return parallel_map(_guarded_call, calls, max_workers)
+    return [_guarded_call(call) for call in calls]
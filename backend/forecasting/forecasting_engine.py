@@ -1,88 +1,100 @@
-import pandas as pd
 import numpy as np
-from datetime import timedelta
-from django.db.models import Sum
-from inventory.models import Sale, Product
-from prophet import Prophet
-from statsmodels.tsa.arima.model import ARIMA
-from statsmodels.tsa.holtwinters import ExponentialSmoothing
-from sklearn.metrics import mean_absolute_error, mean_absolute_percentage_error, r2_score
-from sklearn.linear_model import LinearRegression
+import time
+from .panel import load_demand_panel
+from .series_cache import series_cache
+from .arima_search import stepwise_order_search
+from .executors import run_concurrently, default_workers, TIMED_OUT
+from .holt_winters import fit_batch
+from .intermittent import intermittent_batch, seasonal_naive_batch
+from .artifacts import ArtifactStore, ModelArtifact, series_digest
+from .backtest import Backtest, rolling_origins, merge_backtests
+from .characteristics import MIN_HISTORY_DAYS, panel_characteristics, product_characteristics
+from . import stats
+from .registry import models
+from .result import ForecastSeries
+from .telemetry import fit_meter
+from django.conf import settings
 import logging
 import warnings
 
-# Suppress Prophet logs and warnings
-logging.getLogger('cmdstanpy').setLevel(logging.ERROR)
+# Suppress warnings (Prophet's cmdstanpy logs are quieted by the registry)
 warnings.filterwarnings("ignore")
 
+# Models averaged by forecast_ensemble, and their names for logs
+ENSEMBLE_MODELS = ['prophet', 'arima', 'exponential']
+MODEL_LABELS = {
+    'prophet': 'Prophet',
+    'arima': 'ARIMA',
+    'exponential': 'Exponential Smoothing',
+    'hw_vectorized': 'Vectorized Holt-Winters',
+    'croston': 'Croston (SBA)',
+    'tsb': 'TSB',
+    'seasonal_naive': 'Seasonal Naive',
+}
+# O(n) models the router sends sparse/low-volume series to
+FAST_MODELS = ('croston', 'tsb', 'seasonal_naive')
+# Models whose stored state can be rolled forward over newly arrived days
+INCREMENTAL_MODELS = ('arima', 'exponential', 'hw_vectorized') + FAST_MODELS
+# Models refitted from the parameters of their last stored fit
+WARM_START_MODELS = ('prophet',)
+# Cheaper models tried in turn when the chosen ones overrun the time budget
+FALLBACK_MODELS = ('hw_vectorized', 'seasonal_naive')
+# Models too slow to refit and with no state to roll forward, backtested on
+# the plain 80/20 holdout (first origin) only; later origins stay NaN
+HOLDOUT_MODELS = ('prophet',)
+HW_STATE_PARAMS = (
+    'smoothing_level', 'smoothing_trend', 'smoothing_seasonal',
+    'initial_level', 'initial_trend', 'initial_seasons',
+)
+
 class ForecastingEngine:
-    def __init__(self):
+    def __init__(self, executor=None, artifacts=None):
         self.logger = logging.getLogger(__name__)
+        # 'process' (default), 'thread' or 'serial' for independent model fits
+        self.executor = executor or settings.FORECAST_EXECUTOR
+        self.max_workers = settings.FORECAST_EXECUTOR_WORKERS or default_workers(cap=6)
+        # Fitted-model store; disabled when FORECAST_ARTIFACT_DIR is empty
+        if artifacts is None and settings.FORECAST_ARTIFACT_DIR:
+            artifacts = ArtifactStore()
+        self.artifacts = artifacts
+        # time.monotonic() by which the fits of the current forecast must end
+        self.deadline = None
+        # Product the current fits belong to, for their FitStat rows
+        self.product_id = None
+        # Seconds the last final fit of each model took in this process
+        self.fit_seconds = {}
 
-    def _get_sales_df(self, product_id):
-        """Helper to fetch and aggregate sales data using DB aggregation for performance"""
-        from django.db.models.functions import TruncDate
-        
-        # Optimize: Aggregate at DB level to avoid loading millions of rows
-        sales_data = Sale.objects.filter(product_id=product_id)\
-            .annotate(date=TruncDate('sale_date'))\
-            .values('date')\
-            .annotate(y=Sum('quantity'))\
-            .order_by('date')
-            
-        if not sales_data.exists():
-            return None
-        
-        df = pd.DataFrame(list(sales_data))
-        # Rename date to ds for Prophet
-        df.rename(columns={'date': 'ds'}, inplace=True)
-        
-        # Ensure regex/types
-        df['ds'] = pd.to_datetime(df['ds'])
-        df = df.set_index('ds')
-        
-        # Fill missing dates
-        if not df.empty:
-            idx = pd.date_range(start=df.index.min(), end=df.index.max(), freq='D')
-            df = df.reindex(idx, fill_value=0)
-            df = df.reset_index().rename(columns={'index': 'ds'})
-            
-        return df
+    def _get_sales_df(self, product_id, panel=None, watermark=None):
+        """
+        Daily ('ds', 'y') sales frame for a product.
 
-    def analyze_product_data(self, product_id):
-        df = self._get_sales_df(product_id)
-        if df is None or len(df) < 14: # Min 2 weeks data
-            return None
-
-        y = df['y'].values
-        
-        # 1. Sales Volume
-        total_sales = np.sum(y)
-        avg_daily_sales = np.mean(y)
-
-        # 2. Variability (CV)
-        cv = np.std(y) / avg_daily_sales if avg_daily_sales > 0 else 0
+        When a DemandPanel is passed the row is sliced from it and the ORM is
+        not touched, so batch jobs can load the catalog once up front.
+        Otherwise the frame comes from the watermark-keyed series cache.
+        """
+        if panel is not None:
+            return panel.frame(product_id)
+        return series_cache.get_or_load(
+            product_id, lambda: load_demand_panel([product_id]).frame(product_id), watermark
+        )
 
-        # 3. Trend (Slope)
-        X = np.arange(len(y)).reshape(-1, 1)
-        model = LinearRegression()
-        model.fit(X, y)
-        trend_slope = model.coef_[0]
-
-        # 4. Seasonality Score (Simple weekly variance check)
-        # Compare variance of daily means vs total variance
-        df['weekday'] = df['ds'].dt.weekday
-        weekly_means = df.groupby('weekday')['y'].mean()
-        seasonality_score = np.std(weekly_means) / np.mean(weekly_means) if np.mean(weekly_means) > 0 else 0
-
-        return {
-            'total_sales': int(total_sales),
-            'avg_daily': float(avg_daily_sales),
-            'cv': float(cv),
-            'trend': float(trend_slope),
-            'seasonality': float(seasonality_score),
-            'days_count': len(df)
-        }
+    def analyze_product_data(self, product_id, panel=None, watermark=None):
+        """
+        Routing characteristics of a product, or None with less than
+        MIN_HISTORY_DAYS of history. From a DemandPanel they are computed
+        in memory; otherwise the ProductCharacteristics row is read and only
+        recomputed when the product's sales changed. watermark is the
+        product's get_sales_watermark when the caller already read it.
+        """
+        if panel is not None:
+            chars = panel_characteristics(panel, [product_id]).get(int(product_id))
+        else:
+            chars = product_characteristics(
+                product_id, lambda: self._get_sales_df(product_id, watermark=watermark), watermark
+            )
+        if chars is None or chars['days_count'] < MIN_HISTORY_DAYS: # Min 2 weeks data
+            return None
+        return chars
 
     def select_best_model(self, characteristics):
         if not characteristics:
@@ -91,6 +103,17 @@ class ForecastingEngine:
         cv = characteristics['cv']
         seasonality = characteristics['seasonality']
         trend = characteristics['trend']
+        zero_ratio = characteristics.get('zero_ratio', 0)
+
+        # Fast tier: sparse and slow series skip the expensive models
+        if zero_ratio >= settings.FORECAST_TSB_ZERO_RATIO:
+            return 'tsb', 'Very sparse demand (obsolescence-aware)'
+
+        if zero_ratio >= settings.FORECAST_INTERMITTENT_ZERO_RATIO:
+            return 'croston', 'Intermittent demand'
+
+        if characteristics['avg_daily'] < settings.FORECAST_LOW_VOLUME_AVG_DAILY:
+            return 'seasonal_naive', 'Low volume demand'
 
         if seasonality > 0.3:
             return 'prophet', 'High seasonality detected'
@@ -104,145 +127,356 @@ class ForecastingEngine:
         return 'ensemble', 'Balanced characteristics'
 
 
-    def forecast_prophet(self, df, days=30):
+    def _new_prophet(self, df):
+        return models.get('prophet').Prophet(daily_seasonality=True, yearly_seasonality=len(df)>365)
+
+    def _fit_prophet(self, df, init=None):
+        # Optimize: starting L-BFGS from the last fit's parameters converges
+        # in far fewer iterations when the history only grew a little
+        if init is not None:
+            try:
+                return self._new_prophet(df).fit(df, init=init)
+            except Exception as e:
+                # e.g. a different number of changepoints or seasonal terms
+                self.logger.info(f"Prophet warm start failed, fitting from scratch: {str(e)}")
+        return self._new_prophet(df).fit(df)
+
+    def _predict_prophet(self, m, df, days):
+        # Optimize: score only the future days, not the whole history again
+        future = m.make_future_dataframe(periods=days, include_history=False)
+        forecast = m.predict(future)
+
+        # No negative sales
+        value = np.maximum(forecast['yhat'].values, 0)
+        lower = np.maximum(forecast['yhat_lower'].values, 0)
+        upper = np.maximum(forecast['yhat_upper'].values, 0)
+        return ForecastSeries(forecast['ds'].values, value, lower, upper)
+
+    def _state_prophet(self, m):
+        return {'model_json': models.get('prophet').model_to_json(m), 'init': self._init_prophet(m)}
+
+    def _init_prophet(self, m):
+        """Fitted parameters in the shape Prophet.fit(init=...) takes"""
+        return {
+            'k': float(m.params['k'][0][0]),
+            'm': float(m.params['m'][0][0]),
+            'sigma_obs': float(m.params['sigma_obs'][0][0]),
+            'delta': m.params['delta'][0].copy(),
+            'beta': m.params['beta'][0].copy(),
+        }
+
+    def _warm_start_prophet(self, state):
+        if 'init' in state:
+            return state['init']
+        # Artifacts stored before the init was kept alongside the model
+        return self._init_prophet(models.get('prophet').model_from_json(state['model_json']))
+
+    def _restore_prophet(self, state, df):
+        return models.get('prophet').model_from_json(state['model_json'])
+
+    def _fit_arima(self, df):
+        # Stepwise (p, 1, q) search on AIC; candidates are fitted on the
+        # shared process pool and the winning fit is reused as-is.
+        # Just defaulting to d=1 for robustness in MVP
+        train_data = df['y'].values
+        best_order, res = stepwise_order_search(train_data, d=1, deadline=self.deadline)
+        if res is None:
+            res = models.get('arima').ARIMA(train_data, order=(1, 1, 1)).fit()
+        return res
+
+    def _predict_arima(self, res, df, days):
+        forecast_res = res.get_forecast(steps=days)
+        predicted = forecast_res.predicted_mean
+        conf_int = forecast_res.conf_int(alpha=0.2) # 80% confidence
+        
+        return ForecastSeries.following(
+            df['ds'].iloc[-1],
+            np.maximum(predicted[:days], 0),
+            np.maximum(conf_int[:days, 0], 0),
+            np.maximum(conf_int[:days, 1], 0)
+        )
+
+    def _state_arima(self, res):
+        return {'order': res.model.order, 'params': np.asarray(res.params)}
+
+    def _restore_arima(self, state, df):
+        # One Kalman filter pass with the stored parameters; on a longer
+        # history this is the incremental state update
+        return models.get('arima').ARIMA(df['y'].values, order=state['order']).filter(state['params'])
+
+    def _roll_arima(self, res, df, prev_n):
+        # Continue the filter over the new days only
+        return res.extend(df['y'].values[prev_n:])
+
+    def _fit_exponential(self, df):
+        # Holt-Winters 'add' trend and seasonality if enough data
+        seasonal_periods = 7
+        trend = 'add'
+        seasonal = 'add' if len(df) > 14 else None
+        
+        return models.get('exponential').ExponentialSmoothing(
+            df['y'].values, 
+            seasonal_periods=seasonal_periods,
+            trend=trend,
+            seasonal=seasonal,
+            initialization_method="estimated"
+        ).fit()
+
+    def _predict_exponential(self, model, df, days):
+        pred = model.forecast(days)
+        
+        # CI estimation for ES is harder manually, we'll estimate using residual std dev
+        residuals = df['y'].values - model.fittedvalues
+        std_resid = np.std(residuals)
+        
+        value = np.maximum(pred[:days], 0)
+        # Simple 80% CI estimation (+- 1.28 sigma)
+        return ForecastSeries.following(
+            df['ds'].iloc[-1],
+            value,
+            np.maximum(value - 1.28 * std_resid, 0),
+            np.maximum(value + 1.28 * std_resid, 0)
+        )
+
+    def _state_exponential(self, model):
+        m = model.model
+        return {
+            'seasonal_periods': m.seasonal_periods,
+            'trend': 'add' if m.trend else None,
+            'seasonal': 'add' if m.seasonal else None,
+            'params': {k: model.params[k] for k in HW_STATE_PARAMS},
+        }
+
+    def _restore_exponential(self, state, df):
+        # Re-run the smoothing recursion with fixed parameters (no optimizer)
+        params = state['params']
+        seasonal = state['seasonal']
+        return models.get('exponential').ExponentialSmoothing(
+            df['y'].values,
+            seasonal_periods=state['seasonal_periods'],
+            trend=state['trend'],
+            seasonal=seasonal,
+            initialization_method="known",
+            initial_level=params['initial_level'],
+            initial_trend=params['initial_trend'],
+            initial_seasonal=params['initial_seasons'] if seasonal else None
+        ).fit(
+            smoothing_level=params['smoothing_level'],
+            smoothing_trend=params['smoothing_trend'],
+            smoothing_seasonal=params['smoothing_seasonal'] if seasonal else None,
+            optimized=False
+        )
+
+    def _fit_hw_vectorized(self, df):
+        return fit_batch(df['y'].values)
+
+    def _predict_batch_model(self, fitted, df, days):
+        """Forecast from a single-row batch model (vectorized HW, fast tier)"""
+        value, lower, upper = fitted.forecast(days)
+        return ForecastSeries.following(df['ds'].iloc[-1], value[0], lower[0], upper[0])
+
+    _predict_hw_vectorized = _predict_batch_model
+
+    def _state_hw_vectorized(self, hw):
+        return hw
+
+    def _restore_hw_vectorized(self, state, df):
+        return state.extend(df['y'].values[None, state.n_obs:])
+
+    def _roll_hw_vectorized(self, hw, df, prev_n):
+        return hw.extend(df['y'].values[None, prev_n:])
+
+    # Fast tier: O(n) passes with fixed parameters, so "restoring" a state
+    # is simply a cheap recompute over the current history
+    def _fit_croston(self, df):
+        return intermittent_batch(df['y'].values, method='sba')
+
+    def _fit_tsb(self, df):
+        return intermittent_batch(df['y'].values, method='tsb')
+
+    def _fit_seasonal_naive(self, df):
+        return seasonal_naive_batch(df['y'].values)
+
+    _predict_croston = _predict_tsb = _predict_seasonal_naive = _predict_batch_model
+
+    def _state_fast(self, fitted):
+        return fitted
+
+    _state_croston = _state_tsb = _state_seasonal_naive = _state_fast
+
+    def _restore_croston(self, state, df):
+        return self._fit_croston(df)
+
+    def _restore_tsb(self, state, df):
+        return self._fit_tsb(df)
+
+    def _restore_seasonal_naive(self, state, df):
+        return self._fit_seasonal_naive(df)
+
+    def _fit(self, model_type, df, init=None):
+        fit = getattr(self, f'_fit_{model_type}')
+        with fit_meter.measure(self.product_id, model_type, len(df)):
+            return fit(df) if init is None else fit(df, init=init)
+
+    def _fit_predict(self, model_type, df, days, keep_state=False, init=None):
+        """
+        Fit one model and forecast. Returns (forecast, state); state is the
+        compact fitted state when keep_state is set. init warm-starts models
+        in WARM_START_MODELS. Errors are logged and give an empty forecast,
+        so one model never sinks an ensemble.
+        """
         try:
-            m = Prophet(daily_seasonality=True, yearly_seasonality=len(df)>365)
-            m.fit(df)
-            future = m.make_future_dataframe(periods=days)
-            forecast = m.predict(future)
-            
-            # Extract last 'days' entries
-            result = forecast.tail(days)[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
-            
-            output = []
-            for _, row in result.iterrows():
-                output.append({
-                    'date': row['ds'].date(),
-                    'value': max(0, row['yhat']), # No negative sales
-                    'lower': max(0, row['yhat_lower']),
-                    'upper': max(0, row['yhat_upper'])
-                })
-            return output
+            start = time.monotonic()
+            fitted = self._fit(model_type, df, init)
+            self.fit_seconds[model_type] = time.monotonic() - start
+            output = getattr(self, f'_predict_{model_type}')(fitted, df, days)
+            state = getattr(self, f'_state_{model_type}')(fitted) if keep_state else None
+            return output, state
         except Exception as e:
-            self.logger.error(f"Prophet error: {str(e)}")
-            return []
+            self.logger.error(f"{MODEL_LABELS[model_type]} error: {str(e)}")
+            return ForecastSeries.empty(), None
 
-    def forecast_arima(self, df, days=30):
+    def _roll(self, model_type, fitted, df, prev_n):
+        """Advance a fitted model from the first prev_n days to all of df"""
+        roll = getattr(self, f'_roll_{model_type}', None)
+        if roll is not None:
+            return roll(fitted, df, prev_n)
+        # Fixed-parameter recompute over the longer history
+        state = getattr(self, f'_state_{model_type}')(fitted)
+        return getattr(self, f'_restore_{model_type}')(state, df)
+
+    def _backtest(self, model_type, df, init=None):
+        """
+        Rolling-origin backtest of one model. It is fitted once at the first
+        origin and its state is rolled forward to each later origin without
+        re-optimizing; HOLDOUT_MODELS stop after the first. Stops early after
+        FORECAST_BACKTEST_MAX_SECONDS or at the deadline; the skipped origins
+        stay NaN. Returns a Backtest, or None on error or when the remaining
+        budget is too short to start.
+        """
+        if self.deadline is not None and \
+                time.monotonic() + self.fit_seconds.get(model_type, 0.0) > self.deadline:
+            # Its first fit alone would overrun: the final fit of the same
+            # model, run before it, is the estimate
+            self.logger.info(f"Skipped the {MODEL_LABELS[model_type]} backtest, too little time budget left")
+            return None
         try:
-            # Simple grid search for (p, d, q) based on AIC
-            best_aic = float('inf')
-            best_order = (1, 1, 1)
-            
-            # Limit grid for performance
-            train_data = df['y'].values
-            
-            # Quick check if data is non-stationary (simple check)
-            # Just defaulting to d=1 for robustness in MVP
-            
-            for p in range(3):
-                for q in range(3):
-                    try:
-                        model = ARIMA(train_data, order=(p, 1, q))
-                        res = model.fit()
-                        if res.aic < best_aic:
-                            best_aic = res.aic
-                            best_order = (p, 1, q)
-                    except:
-                        continue
-            
-            model = ARIMA(train_data, order=best_order)
-            res = model.fit()
-            forecast_res = res.get_forecast(steps=days)
-            predicted = forecast_res.predicted_mean
-            conf_int = forecast_res.conf_int(alpha=0.2) # 80% confidence
-            
-            last_date = df['ds'].iloc[-1]
-            output = []
-            for i in range(days):
-                date = last_date + timedelta(days=i+1)
-                output.append({
-                    'date': date.date(),
-                    'value': max(0, predicted[i]),
-                    'lower': max(0, conf_int[i][0]),
-                    'upper': max(0, conf_int[i][1])
-                })
-            return output
+            origins, horizon = rolling_origins(len(df), settings.FORECAST_BACKTEST_MAX_ORIGINS)
+            predicted = np.full((len(origins), horizon), np.nan)
+            cap = time.monotonic() + settings.FORECAST_BACKTEST_MAX_SECONDS
+            deadline = cap if self.deadline is None else min(cap, self.deadline)
+            predict = getattr(self, f'_predict_{model_type}')
+
+            fitted = self._fit(model_type, df.iloc[:int(origins[0])], init)
+
+            for i, origin in enumerate(origins.tolist()):
+                if i:
+                    if model_type in HOLDOUT_MODELS or time.monotonic() > deadline:
+                        break
+                    fitted = self._roll(model_type, fitted, df.iloc[:origin], int(origins[i - 1]))
+                steps = min(horizon, len(df) - origin)
+                values = predict(fitted, df.iloc[:origin], steps).value
+                predicted[i, :len(values)] = values
+            return Backtest(origins, predicted)
         except Exception as e:
-            self.logger.error(f"ARIMA error: {str(e)}")
-            return []
+            self.logger.error(f"{MODEL_LABELS[model_type]} backtest error: {str(e)}")
+            return None
+
+    def forecast_prophet(self, df, days=30):
+        return self._fit_predict('prophet', df, days)[0]
+
+    def forecast_arima(self, df, days=30):
+        return self._fit_predict('arima', df, days)[0]
 
     def forecast_exponential_smoothing(self, df, days=30):
+        return self._fit_predict('exponential', df, days)[0]
+
+    def _preload(self, model_types):
+        # Import model libraries before the process pool first forks, so its
+        # workers inherit them instead of each importing on its own
+        if self.executor == 'process':
+            models.preload([m for m in model_types if m in models])
+
+    def _run_models(self, jobs):
+        """
+        Run (model_type, df, days, keep_state) jobs concurrently on the
+        configured executor and return their (forecast, state) pairs. A job
+        lost to the pool itself comes back as an empty forecast.
+        """
+        calls = [(self._fit_predict, job) for job in jobs]
+        self._preload(job[0] for job in jobs)
+        results = run_concurrently(calls, self.executor, self.max_workers)
+        return [r or (ForecastSeries.empty(), None) for r in results]
+
+    def forecast_ensemble(self, df, days=30):
+        # Run all 3 concurrently
+        results = self._run_models([(m, df, days, False) for m in ENSEMBLE_MODELS])
+        return self._merge_forecasts([output for output, _ in results])
+
+    def _load_artifact(self, product_id, model_type, df):
+        """
+        Live fitted model rebuilt from a stored artifact, or None if the
+        artifact does not describe this history. A history that only gained
+        a few new days is rolled forward for ARIMA/Holt-Winters instead of
+        refitting. Returns (fitted, artifact).
+        """
+        if self.artifacts is None:
+            return None, None
+        artifact = self.artifacts.load(product_id, model_type)
+        if artifact is None:
+            return None, None
         try:
-            # Holt-Winters 'add' trend and seasonality if enough data
-            seasonal_periods = 7
-            trend = 'add'
-            seasonal = 'add' if len(df) > 14 else None
-            
-            model = ExponentialSmoothing(
-                df['y'].values, 
-                seasonal_periods=seasonal_periods,
-                trend=trend,
-                seasonal=seasonal,
-                initialization_method="estimated"
-            ).fit()
-            
-            pred = model.forecast(days)
-            
-            # CI estimation for ES is harder manually, we'll estimate using residual std dev
-            residuals = df['y'].values - model.fittedvalues
-            std_resid = np.std(residuals)
-            
-            last_date = df['ds'].iloc[-1]
-            output = []
-            for i in range(days):
-                date = last_date + timedelta(days=i+1)
-                value = max(0, pred[i])
-                # Simple 80% CI estimation (+- 1.28 sigma)
-                output.append({
-                    'date': date.date(),
-                    'value': value,
-                    'lower': max(0, value - 1.28 * std_resid),
-                    'upper': max(0, value + 1.28 * std_resid)
-                })
-            return output
+            if artifact.matches(df):
+                return getattr(self, f'_restore_{model_type}')(artifact.state, df), artifact
+            if model_type in INCREMENTAL_MODELS and \
+                    artifact.extends(df, settings.FORECAST_INCREMENTAL_MAX_DAYS):
+                fitted = getattr(self, f'_restore_{model_type}')(artifact.state, df)
+                artifact.n_obs = len(df)
+                artifact.digest = series_digest(df)
+                self.artifacts.save(artifact)
+                return fitted, artifact
+        except Exception as e:
+            self.logger.warning(f"Stale {model_type} artifact for product {product_id}: {str(e)}")
+        return None, None
 
+    def _save_artifact(self, product_id, model_type, df, state, backtest):
+        if state is not None and self.artifacts is not None:
+            self.artifacts.save(ModelArtifact(
+                product_id, model_type, state, len(df), series_digest(df), backtest=backtest
+            ))
+
+    def _fallback(self, product_id, df, days, tried, final, backtests):
+        """
+        Fit the first cheaper model not tried yet, inline and without a
+        deadline (they are O(n)). Returns its name, or None if none is left.
+        """
+        self.deadline = None
+        for m in FALLBACK_MODELS:
+            if m in tried:
+                continue
+            final[m], state = self._fit_predict(m, df, days, True)
+            backtests[m] = self._backtest(m, df)
+            self._save_artifact(product_id, m, df, state, backtests[m])
+            return m
+        return None
+
+    def _warm_start(self, product_id, model_type):
+        """Starting parameters from the model's last stored fit, or None"""
+        if model_type not in WARM_START_MODELS or self.artifacts is None:
+            return None
+        artifact = self.artifacts.load(product_id, model_type)
+        if artifact is None:
+            return None
+        try:
+            return getattr(self, f'_warm_start_{model_type}')(artifact.state)
         except Exception as e:
-            self.logger.error(f"Exponential Smoothing error: {str(e)}")
-            return []
+            self.logger.warning(f"Unusable {model_type} artifact for product {product_id}: {str(e)}")
+            return None
 
-    def forecast_ensemble(self, df, days=30):
-        # Run all 3
-        p_res = self.forecast_prophet(df, days)
-        a_res = self.forecast_arima(df, days)
-        e_res = self.forecast_exponential_smoothing(df, days)
-        
-        # Combine results by date
-        combined = {}
-        for r in p_res + a_res + e_res:
-            d = r['date']
-            if d not in combined:
-                combined[d] = {'values': [], 'lowers': [], 'uppers': []}
-            combined[d]['values'].append(r['value'])
-            combined[d]['lowers'].append(r['lower'])
-            combined[d]['uppers'].append(r['upper'])
-            
-        output = []
-        full_dates = sorted(combined.keys())
-        for d in full_dates:
-            vals = combined[d]['values']
-            lows = combined[d]['lowers']
-            ups = combined[d]['uppers']
-            
-            if not vals: continue
-            
-            output.append({
-                'date': d,
-                'value': sum(vals) / len(vals),
-                'lower': sum(lows) / len(lows),
-                'upper': sum(ups) / len(ups)
-            })
-            
-        return output
+    def _merge_forecasts(self, results):
+        """Average per-model forecasts date by date"""
+        # Optimize: one vectorized pass over the columns, no per-day dicts
+        return ForecastSeries.mean(results)
 
     def calculate_accuracy_metrics(self, actual, predicted):
         if len(actual) < 2 or len(predicted) < 2:
@@ -253,59 +487,111 @@ class ForecastingEngine:
         y_true = actual[:min_len]
         y_pred = predicted[:min_len]
         
-        return {
-            'r2': r2_score(y_true, y_pred),
-            'mae': mean_absolute_error(y_true, y_pred),
-            'mape': mean_absolute_percentage_error(y_true, y_pred)
-        }
+        return stats.accuracy(y_true, y_pred)
 
-    def generate_forecast(self, product_id, days=30, model_type='auto'):
-        df = self._get_sales_df(product_id)
+    def generate_forecast(self, product_id, days=30, model_type='auto', panel=None, budget=None, watermark=None):
+        """
+        Forecast `days` ahead with the chosen (or routed) model. Every fit
+        must finish within `budget` seconds (FORECAST_TIME_BUDGET by
+        default, 0 for none); models that overrun are dropped and, if none
+        is left, the next cheaper model runs instead. model_used, reason
+        and timed_out say what actually ran and why; forecast is a
+        ForecastSeries. watermark is the product's get_sales_watermark when
+        the caller already read it.
+        """
+        budget = settings.FORECAST_TIME_BUDGET if budget is None else budget
+        # Travels with the engine into pool workers (see _fit_arima)
+        self.deadline = time.monotonic() + budget if budget else None
+        self.product_id = product_id
+        self.fit_seconds = {}
+        try:
+            return self._generate_forecast(product_id, days, model_type, panel, budget, watermark)
+        finally:
+            self.deadline = None
+            self.product_id = None
+
+    def _generate_forecast(self, product_id, days, model_type, panel, budget, watermark):
+        df = self._get_sales_df(product_id, panel, watermark)
         if df is None:
             return {'error': 'Insufficient data'}
         
-        # Split for validation if needed, but for future forecast we train on all
-        # To get metrics, we usually backtest. For MVP, we'll train on all and just return forecast
-        # UNLESS we need metrics returned to API. 
-        # Let's do a simple 80/20 split backtest calculate metrics, THEN retrain on all for future.
-        
-        train_size = int(len(df) * 0.8)
-        train_df = df.iloc[:train_size]
-        test_df = df.iloc[train_size:]
+        # Metrics come from a rolling-origin backtest over the last 20%
+        # (first origin at the 80/20 split), the forecast from a fit on all data
         
         # Determine model
         if model_type == 'auto':
-            chars = self.analyze_product_data(product_id)
+            chars = self.analyze_product_data(product_id, panel, watermark)
             model_type, reason = self.select_best_model(chars)
         else:
             reason = "User selection"
             
-        # 1. Backtest for accuracy metrics
-        if model_type == 'prophet':
-            bt_res = self.forecast_prophet(train_df, days=len(test_df))
-        elif model_type == 'arima':
-            bt_res = self.forecast_arima(train_df, days=len(test_df))
-        elif model_type == 'exponential':
-            bt_res = self.forecast_exponential_smoothing(train_df, days=len(test_df))
-        else: # ensemble
-            bt_res = self.forecast_ensemble(train_df, days=len(test_df))
-            
-        bt_values = [x['value'] for x in bt_res]
-        metrics = self.calculate_accuracy_metrics(test_df['y'].values, bt_values)
-        
-        # 2. Final Forecast
-        if model_type == 'prophet':
-            final_res = self.forecast_prophet(df, days)
-        elif model_type == 'arima':
-            final_res = self.forecast_arima(df, days)
-        elif model_type == 'exponential':
-            final_res = self.forecast_exponential_smoothing(df, days)
+        if model_type not in MODEL_LABELS:
+            model_type = 'ensemble'
+        members = ENSEMBLE_MODELS if model_type == 'ensemble' else [model_type]
+
+        # Predict-only from stored artifacts where the history still matches
+        final, backtests, stale = {}, {}, []
+        for m in members:
+            fitted, artifact = self._load_artifact(product_id, m, df)
+            if fitted is None or not isinstance(artifact.backtest, Backtest):
+                stale.append(m)
+                continue
+            try:
+                final[m] = getattr(self, f'_predict_{m}')(fitted, df, days)
+                backtests[m] = artifact.backtest
+            except Exception as e:
+                self.logger.error(f"{MODEL_LABELS[m]} error: {str(e)}")
+                final[m], backtests[m] = ForecastSeries.empty(), None
+
+        # 1. Final Forecast and 2. Backtest for accuracy metrics are
+        # independent, so every remaining fit for both runs concurrently.
+        # Final fits go first: serial runs (Celery prefork children) start
+        # calls in order, and the served forecast matters more than its
+        # metrics when the budget runs out.
+        self._preload(stale)
+        inits = [self._warm_start(product_id, m) for m in stale]
+        results = run_concurrently(
+            [(self._fit_predict, (m, df, days, True, init)) for m, init in zip(stale, inits)] +
+            [(self._backtest, (m, df, init)) for m, init in zip(stale, inits)],
+            self.executor, self.max_workers, deadline=self.deadline
+        )
+        timed_out = []
+        for i, m in enumerate(stale):
+            fit, backtest = results[i], results[len(stale) + i]
+            if fit is TIMED_OUT:
+                timed_out.append(m)
+                continue
+            # A backtest cut off by the deadline only costs the metrics
+            backtests[m] = None if backtest is TIMED_OUT else backtest
+            final[m], state = fit or (ForecastSeries.empty(), None)
+            self._save_artifact(product_id, m, df, state, backtests[m])
+
+        # Optimize: an outlier series costs at most the budget plus one
+        # cheap fallback fit instead of an unbounded Prophet/ARIMA run
+        members = [m for m in members if m not in timed_out]
+        if timed_out:
+            labels = ', '.join(MODEL_LABELS[m] for m in timed_out)
+            reason = f"{reason}; {labels} exceeded the {budget:g}s time budget"
+            self.logger.warning(f"Product {product_id}: {labels} exceeded the {budget:g}s time budget")
+        if not members:
+            fallback = self._fallback(product_id, df, days, timed_out, final, backtests)
+            if fallback is not None:
+                model_type, members = fallback, [fallback]
+                reason = f"{reason}, fell back to {MODEL_LABELS[fallback]}"
+
+        bt_res = merge_backtests([backtests[m] for m in members])
+        final_res = self._merge_forecasts([final[m] for m in members])
+
+        # Score every origin x horizon cell against the actuals at once
+        if bt_res is None:
+            metrics = self.calculate_accuracy_metrics([], [])
         else:
-            final_res = self.forecast_ensemble(df, days)
+            metrics = bt_res.score(df['y'].values)
             
         return {
             'forecast': final_res,
             'metrics': metrics,
             'model_used': model_type,
-            'reason': reason
+            'reason': reason,
+            'timed_out': timed_out
         }
@@ -0,0 +1,192 @@
+import itertools
+import numpy as np
+
+SEASON = 7
+
+# Smoothing parameter grid searched for every series at once
+ALPHAS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.7)
+BETAS = (0.0, 0.01, 0.05, 0.1)
+GAMMAS = (0.05, 0.1, 0.2, 0.4)
+
+# Rows per chunk; the search holds N x grid x season floats per chunk
+CHUNK_ROWS = 2000
+
+Z_80 = 1.28
+
+
+class HoltWintersBatch:
+    """
+    Additive Holt-Winters (weekly season) states for a batch of series.
+
+    Columns are calendar days shared by every row, so the seasonal slot of
+    column t is t % SEASON for all series. level/trend/sigma are (N,),
+    season is (N, SEASON), params is (N, 3) of (alpha, beta, gamma) and
+    fitted holds the one-step-ahead predictions (NaN before a row starts).
+    """
+
+    def __init__(self, level, trend, season, params, sigma, n_obs, fitted=None):
+        self.level = level
+        self.trend = trend
+        self.season = season
+        self.params = params
+        self.sigma = sigma
+        self.n_obs = n_obs
+        self.fitted = fitted
+
+    def forecast(self, days):
+        """(value, lower, upper) arrays of shape (N, days), clipped at zero"""
+        h = np.arange(1, days + 1)
+        slots = (self.n_obs - 1 + h) % SEASON
+        value = self.level[:, None] + h[None, :] * self.trend[:, None] + self.season[:, slots]
+        band = Z_80 * self.sigma[:, None]
+        return (
+            np.maximum(value, 0),
+            np.maximum(value - band, 0),
+            np.maximum(value + band, 0),
+        )
+
+    def extend(self, Y_new):
+        """
+        Roll the states forward over newly observed columns with the fitted
+        parameters (no search). Y_new is (N, k).
+        """
+        Y_new = np.atleast_2d(np.asarray(Y_new, dtype=np.float64))
+        alpha, beta, gamma = self.params.T
+        level, trend, season = self.level.copy(), self.trend.copy(), self.season.copy()
+        rows = np.arange(len(level))
+        for j in range(Y_new.shape[1]):
+            pos = (self.n_obs + j) % SEASON
+            y = Y_new[:, j]
+            s = season[rows, pos]
+            new_level = alpha * (y - s) + (1 - alpha) * (level + trend)
+            trend = beta * (new_level - level) + (1 - beta) * trend
+            season[rows, pos] = gamma * (y - new_level) + (1 - gamma) * s
+            level = new_level
+        return HoltWintersBatch(level, trend, season, self.params, self.sigma, self.n_obs + Y_new.shape[1])
+
+    def row(self, i):
+        return HoltWintersBatch(
+            self.level[i:i + 1], self.trend[i:i + 1], self.season[i:i + 1],
+            self.params[i:i + 1], self.sigma[i:i + 1], self.n_obs,
+            None if self.fitted is None else self.fitted[i:i + 1]
+        )
+
+
+def _initial_states(Y, starts):
+    """Level, trend and seasonal states from each row's first two weeks"""
+    n = len(Y)
+    rows = np.arange(n)
+    first = Y[rows[:, None], starts[:, None] + np.arange(SEASON)]
+    second_idx = np.minimum(starts[:, None] + SEASON + np.arange(SEASON), Y.shape[1] - 1)
+    second = Y[rows[:, None], second_idx]
+    has_second = starts + 2 * SEASON <= Y.shape[1]
+
+    level = first.mean(axis=1)
+    trend = np.where(has_second, (second.mean(axis=1) - level) / SEASON, 0.0)
+    season = np.zeros((n, SEASON))
+    season[rows[:, None], (starts[:, None] + np.arange(SEASON)) % SEASON] = first - level[:, None]
+    return level, trend, season
+
+
+def _smooth(Y, starts, alpha, beta, gamma, keep_fitted=False):
+    """
+    Run the recursion for every row and every parameter combination.
+
+    alpha/beta/gamma are (G,) or (N, G). Returns the final states, the sum
+    of squared and plain one-step errors, the error count and optionally the
+    one-step-ahead fitted values for G == 1.
+    """
+    n, T = Y.shape
+    alpha, beta, gamma = (np.broadcast_to(p, (n, np.shape(p)[-1])) for p in (alpha, beta, gamma))
+    G = alpha.shape[1]
+
+    level0, trend0, season0 = _initial_states(Y, starts)
+    level = np.repeat(level0[:, None], G, axis=1)
+    trend = np.repeat(trend0[:, None], G, axis=1)
+    season = np.repeat(season0[:, None, :], G, axis=1)
+
+    sse = np.zeros((n, G))
+    se = np.zeros((n, G))
+    count = np.zeros(n)
+    fitted = np.full((n, T), np.nan) if keep_fitted else None
+    first_t = starts + SEASON
+
+    for t in range(int(first_t.min()), T):
+        active = (first_t <= t)[:, None]
+        pos = t % SEASON
+        y = Y[:, t][:, None]
+        s = season[:, :, pos]
+        yhat = level + trend + s
+        err = np.where(active, y - yhat, 0.0)
+        sse += err * err
+        se += err
+        count += active[:, 0]
+        if keep_fitted:
+            fitted[:, t] = np.where(active[:, 0], yhat[:, 0], np.nan)
+
+        new_level = alpha * (y - s) + (1 - alpha) * (level + trend)
+        new_trend = beta * (new_level - level) + (1 - beta) * trend
+        new_season = gamma * (y - new_level) + (1 - gamma) * s
+        level = np.where(active, new_level, level)
+        trend = np.where(active, new_trend, trend)
+        season[:, :, pos] = np.where(active, new_season, s)
+
+    return level, trend, season, sse, se, count, fitted
+
+
+def fit_batch(Y, starts=None, keep_fitted=False):
+    """
+    Fit additive Holt-Winters to every row of a products x days matrix.
+
+    starts gives each row's first active column (default 0); a row needs at
+    least one full season of history. The (alpha, beta, gamma) grid is
+    searched for all rows at once and each row keeps its lowest in-sample
+    one-step SSE; sigma is the std of those one-step errors, matching the
+    residual-based 80% band of forecast_exponential_smoothing.
+    """
+    Y = np.atleast_2d(np.asarray(Y, dtype=np.float64))
+    n, T = Y.shape
+    starts = np.zeros(n, dtype=np.int64) if starts is None else np.asarray(starts, dtype=np.int64)
+    if np.any(starts + SEASON > T):
+        raise ValueError("Every series needs at least one full season of history")
+
+    grid = np.array(list(itertools.product(ALPHAS, BETAS, GAMMAS)))
+    parts = []
+    for lo in range(0, n, CHUNK_ROWS):
+        rows = slice(lo, lo + CHUNK_ROWS)
+        _, _, _, sse, _, _, _ = _smooth(Y[rows], starts[rows], grid[:, 0], grid[:, 1], grid[:, 2])
+        best = grid[np.argmin(sse, axis=1)]
+
+        # Second pass with each row's winning parameters for the final states
+        level, trend, season, sse, se, count, fitted = _smooth(
+            Y[rows], starts[rows], best[:, :1], best[:, 1:2], best[:, 2:], keep_fitted
+        )
+        count = np.maximum(count, 1)
+        sigma = np.sqrt(np.maximum(sse[:, 0] / count - (se[:, 0] / count) ** 2, 0))
+        parts.append((level[:, 0], trend[:, 0], season[:, 0, :], best, sigma, fitted))
+
+    level, trend, season, params, sigma, fitted = (
+        np.concatenate(p) if p[0] is not None else None for p in zip(*parts)
+    )
+    return HoltWintersBatch(level, trend, season, params, sigma, T, fitted)
+
+
+def one_step_metrics(Y, fitted, starts, fraction=0.2):
+    """
+    Per-row r2/mae/mape of the one-step-ahead predictions over the last
+    `fraction` of each row's active span, as (N,) arrays.
+    """
+    n, T = Y.shape
+    cut = T - np.maximum(((T - starts) * fraction).astype(np.int64), 2)
+    mask = (np.arange(T)[None, :] >= cut[:, None]) & ~np.isnan(fitted)
+    count = np.maximum(mask.sum(axis=1), 1)
+    err = np.where(mask, Y - np.nan_to_num(fitted), 0.0)
+
+    mae = np.abs(err).sum(axis=1) / count
+    eps = np.finfo(np.float64).eps
+    mape = (np.abs(err) / np.maximum(np.abs(Y), eps) * mask).sum(axis=1) / count
+    mean = (Y * mask).sum(axis=1) / count
+    ss_tot = (((Y - mean[:, None]) ** 2) * mask).sum(axis=1)
+    ss_res = (err ** 2).sum(axis=1)
+    r2 = np.where(ss_tot > 0, 1 - ss_res / np.where(ss_tot > 0, ss_tot, 1), np.where(ss_res > 0, 0.0, 1.0))
+    return r2, mae, mape
@@ -0,0 +1,113 @@
+import numpy as np
+
+Z_80 = 1.28
+SEASON = 7
+
+
+class FastBatch:
+    """
+    Forecast states of the cheap fast-tier models for a batch of series.
+
+    profile is (N, k) and is repeated cyclically over the horizon: k == 1
+    for the flat Croston/SBA and TSB rates, k == SEASON for seasonal naive
+    (column j is the value for horizon step j, j + k, ...). fitted holds
+    the one-step-ahead predictions (NaN before a row starts).
+    """
+
+    def __init__(self, profile, sigma, n_obs, fitted=None):
+        self.profile = profile
+        self.sigma = sigma
+        self.n_obs = n_obs
+        self.fitted = fitted
+
+    def forecast(self, days):
+        """(value, lower, upper) arrays of shape (N, days), clipped at zero"""
+        value = self.profile[:, np.arange(days) % self.profile.shape[1]]
+        band = Z_80 * self.sigma[:, None]
+        return (
+            np.maximum(value, 0),
+            np.maximum(value - band, 0),
+            np.maximum(value + band, 0),
+        )
+
+
+def _prepare(Y, starts):
+    Y = np.atleast_2d(np.asarray(Y, dtype=np.float64))
+    starts = np.zeros(len(Y), dtype=np.int64) if starts is None else np.asarray(starts, dtype=np.int64)
+    active = np.arange(Y.shape[1])[None, :] >= starts[:, None]
+    return Y, starts, active
+
+
+def _error_sigma(Y, fitted):
+    err = Y - fitted
+    valid = ~np.isnan(err)
+    count = np.maximum(valid.sum(axis=1), 1)
+    err = np.where(valid, err, 0.0)
+    mean = err.sum(axis=1) / count
+    return np.sqrt(np.maximum((err * err).sum(axis=1) / count - mean ** 2, 0))
+
+
+def intermittent_batch(Y, starts=None, method='sba', alpha=0.1, beta=0.1, keep_fitted=False):
+    """
+    Croston-family forecasts for every row of a products x days matrix.
+
+    method='croston' is classic Croston (size / interval), 'sba' applies
+    the Syntetos-Boylan (1 - alpha/2) bias correction and 'tsb' is
+    Teunter-Syntetos-Babai, which smooths the demand probability every day
+    so the rate decays through long runs of zeros (obsolescence). One pass
+    over the days, vectorized across rows; states start from each row's
+    mean demand size and interval.
+    """
+    Y, starts, active = _prepare(Y, starts)
+    n, T = Y.shape
+    demand = (Y > 0) & active
+    n_demands = demand.sum(axis=1)
+    span = np.maximum(active.sum(axis=1), 1)
+
+    size = np.where(n_demands > 0, (Y * demand).sum(axis=1) / np.maximum(n_demands, 1), 0.0)
+    interval = span / np.maximum(n_demands, 1)
+    prob = n_demands / span
+    since = np.zeros(n)
+    correction = 1 - alpha / 2 if method == 'sba' else 1.0
+
+    fitted = np.full((n, T), np.nan)
+    for t in range(int(starts.min()) if n else 0, T):
+        is_active = active[:, t]
+        if method == 'tsb':
+            rate = prob * size
+        else:
+            rate = correction * size / interval
+        fitted[:, t] = np.where(is_active, rate, np.nan)
+
+        hit = demand[:, t]
+        since = np.where(is_active, since + 1, since)
+        size = np.where(hit, size + alpha * (Y[:, t] - size), size)
+        if method == 'tsb':
+            prob = np.where(is_active, prob + beta * (hit - prob), prob)
+        else:
+            interval = np.where(hit, interval + alpha * (since - interval), interval)
+        since = np.where(hit, 0, since)
+
+    if method == 'tsb':
+        rate = prob * size
+    else:
+        rate = correction * size / interval
+
+    return FastBatch(rate[:, None], _error_sigma(Y, fitted), T, fitted if keep_fitted else None)
+
+
+def seasonal_naive_batch(Y, starts=None, keep_fitted=False):
+    """
+    Repeat each row's last observed week. Rows need one full season; the
+    band comes from the spread of week-over-week differences.
+    """
+    Y, starts, active = _prepare(Y, starts)
+    n, T = Y.shape
+    if np.any(starts + SEASON > T):
+        raise ValueError("Every series needs at least one full season of history")
+
+    fitted = np.full((n, T), np.nan)
+    lagged_active = active[:, SEASON:] & active[:, :-SEASON]
+    fitted[:, SEASON:] = np.where(lagged_active, Y[:, :-SEASON], np.nan)
+
+    return FastBatch(Y[:, T - SEASON:], _error_sigma(Y, fitted), T, fitted if keep_fitted else None)
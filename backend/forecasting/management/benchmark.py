@@ -0,0 +1,13 @@
+import subprocess
+from django.conf import settings
+
+
+def git_commit():
+    """Short hash of the checked-out commit, recorded with benchmark results"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,171 @@
+import json
+import os
+import platform
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+from forecasting.forecasting_engine import ForecastingEngine
+from forecasting.management.benchmark import git_commit
+from forecasting.registry import models
+from forecasting.synthetic import SyntheticCatalog, demand_series
+from inventory.models import Product, Sale
+
+DEFAULT_MODELS = 'prophet,arima,exponential,ensemble'
+DEFAULT_LENGTHS = '30,365,1095'
+DEFAULT_BATCH_MODELS = 'auto,hw_vectorized'
+
+
+def _csv(value, cast=str):
+    return [cast(v) for v in value.split(',') if v.strip()]
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Time ForecastingEngine fit+predict per model, series length and demand type, and batch throughput"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--models', default=DEFAULT_MODELS, help='Comma-separated model types')
+        parser.add_argument('--lengths', default=DEFAULT_LENGTHS, help='Comma-separated series lengths in days')
+        parser.add_argument('--demand', default='dense,sparse', help='Demand types: dense, sparse')
+        parser.add_argument('--horizon', type=int, default=30, help='Days forecast')
+        parser.add_argument('--repeat', type=int, default=1, help='Runs per case (median is reported)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-products', type=int, default=200,
+                            help='Products in the batch benchmark (0 to skip it)')
+        parser.add_argument('--batch-days', type=int, default=365, help='Days of history per batch product')
+        parser.add_argument('--batch-models', default=DEFAULT_BATCH_MODELS, help='Model types of the batch benchmark')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--compare', help='Baseline JSON file to compare against')
+        parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+
+    def time_engine(self, model, df, horizon, repeat):
+        # Straight to the fits: no artifact store or stored forecasts involved
+        engine = ForecastingEngine()
+        times, points = [], 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            if model == 'ensemble':
+                forecast = engine.forecast_ensemble(df, horizon)
+            else:
+                forecast, _ = engine._fit_predict(model, df, horizon)
+            times.append(time.perf_counter() - start)
+            points = len(forecast)
+        return statistics.median(times), points == horizon
+
+    def engine_cases(self, options):
+        # Library imports would otherwise be charged to the first case
+        models.preload()
+        results = []
+        for length in _csv(options['lengths'], int):
+            for demand in _csv(options['demand']):
+                df = demand_series(length, sparse=demand == 'sparse', seed=options['seed'])
+                for model in _csv(options['models']):
+                    seconds, ok = self.time_engine(model, df, options['horizon'], max(1, options['repeat']))
+                    results.append({'model': model, 'length': length, 'demand': demand, 'seconds': seconds, 'ok': ok})
+                    self.stderr.write(f"  {model:<12} {length:>5}d {demand:<6} {seconds:8.3f}s{'' if ok else '  (failed)'}")
+        return results
+
+    def seed_batch(self, n_products, days, seed):
+        catalog = SyntheticCatalog(n_products, seed=seed)
+        end = timezone.now().date() - timedelta(days=1)
+        start = end - timedelta(days=days - 1)
+        products = Product.objects.bulk_create([
+            Product(name=f"Benchmark {i}", sku=f"BENCH-{seed}-{i}", price=Decimal(str(catalog.price[i])), current_stock=0)
+            for i in range(n_products)
+        ])
+        units = catalog.demand(start, days)
+        rows, cols = units.nonzero()
+        Sale.objects.bulk_create((
+            Sale(product_id=products[r].id, quantity=int(units[r, c]),
+                 total_price=Decimal(str(catalog.price[r])) * int(units[r, c]), sale_date=start + timedelta(days=int(c)))
+            for r, c in zip(rows.tolist(), cols.tolist())
+        ), batch_size=5000)
+        return [p.id for p in products]
+
+    def batch_cases(self, options):
+        from forecasting.tasks import forecast_chunk_task
+        results = []
+        try:
+            # Everything the benchmark writes is rolled back, and no model
+            # artifacts are left behind for the throwaway products
+            with transaction.atomic(), override_settings(FORECAST_ARTIFACT_DIR=''):
+                product_ids = self.seed_batch(options['batch_products'], options['batch_days'], options['seed'])
+                for model in _csv(options['batch_models']):
+                    start = time.perf_counter()
+                    entries = forecast_chunk_task(product_ids, options['horizon'], model)
+                    seconds = time.perf_counter() - start
+                    results.append({
+                        'model': model,
+                        'products': len(product_ids),
+                        'days': options['batch_days'],
+                        'seconds': seconds,
+                        'products_per_sec': len(product_ids) / seconds if seconds else None,
+                        'succeeded': sum(1 for e in entries if e['status'] == 'success'),
+                    })
+                    self.stderr.write(f"  batch {model:<14} {len(product_ids) / seconds:8.1f} products/s")
+                raise _Rollback
+        except _Rollback:
+            pass
+        return results
+
+    def compare(self, results, path):
+        try:
+            with open(path) as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read baseline {path}: {e}")
+        old = {(r['model'], r['length'], r['demand']): r['seconds'] for r in baseline.get('engine', [])}
+        self.stdout.write(f"\n{'model':<12} {'length':>6} {'demand':<6} {'baseline':>9} {'now':>9} {'ratio':>6}")
+        for r in results['engine']:
+            before = old.get((r['model'], r['length'], r['demand']))
+            if before:
+                self.stdout.write(
+                    f"{r['model']:<12} {r['length']:>6} {r['demand']:<6} {before:>8.3f}s {r['seconds']:>8.3f}s "
+                    f"{r['seconds'] / before:>5.2f}x"
+                )
+        old_batch = {r['model']: r['products_per_sec'] for r in baseline.get('batch', [])}
+        for r in results['batch']:
+            before = old_batch.get(r['model'])
+            if before:
+                self.stdout.write(
+                    f"batch {r['model']:<14} {before:>8.1f} -> {r['products_per_sec']:.1f} products/s "
+                    f"({r['products_per_sec'] / before:.2f}x)"
+                )
+
+    def handle(self, *args, **options):
+        results = {
+            'meta': {
+                'commit': git_commit(),
+                'created': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'cpus': os.cpu_count(),
+                'executor': settings.FORECAST_EXECUTOR,
+                'seed': options['seed'],
+                'horizon': options['horizon'],
+            },
+            'engine': self.engine_cases(options),
+            'batch': self.batch_cases(options) if options['batch_products'] > 0 else [],
+        }
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+        if options['compare']:
+            self.compare(results, options['compare'])
+        elif options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            self.stdout.write(f"{'model':<12} {'length':>6} {'demand':<6} {'seconds':>9}")
+            for r in results['engine']:
+                self.stdout.write(f"{r['model']:<12} {r['length']:>6} {r['demand']:<6} {r['seconds']:>8.3f}s")
+            for r in results['batch']:
+                self.stdout.write(f"batch {r['model']:<14} {r['products_per_sec']:>8.1f} products/s")
@@ -0,0 +1,140 @@
+import io
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from forecasting.synthetic import SyntheticCatalog
+from inventory.models import Product, Sale
+
+# Products whose sales are generated and written together. Fixed so the
+# random stream, and therefore the data, depends only on the seed and scale.
+CHUNK_PRODUCTS = 500
+
+
+def sales_frame(product_ids, prices, units, start_date):
+    """Non-zero cells of a products x days units matrix as Sale columns"""
+    import pandas as pd
+    rows, days = units.nonzero()
+    quantity = units[rows, days]
+    return pd.DataFrame({
+        'product_id': product_ids[rows],
+        'quantity': quantity,
+        'total_price': np.round(prices[rows] * quantity, 2),
+        'sale_date': np.datetime64(start_date, 'D') + days,
+    })
+
+
+def copy_sales(frame):
+    """PostgreSQL: stream the frame through COPY ... FROM STDIN as CSV"""
+    buffer = io.StringIO()
+    frame.to_csv(buffer, header=False, index=False, float_format='%.2f')
+    buffer.seek(0)
+    columns = ', '.join(Sale._meta.get_field(name).column for name in frame.columns)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {Sale._meta.db_table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def insert_sales(frame, batch_size):
+    """
+    Other backends: chunked executemany of plain tuples. Optimize:
+    bulk_create spends most of its time building and compiling a Sale per
+    row; one prepared INSERT over preformatted values skips all of that.
+    """
+    columns = ', '.join(connection.ops.quote_name(Sale._meta.get_field(name).column) for name in frame.columns)
+    sql = f"INSERT INTO {Sale._meta.db_table} ({columns}) VALUES (%s, %s, %s, %s)"
+    rows = list(zip(
+        frame['product_id'].tolist(), frame['quantity'].tolist(),
+        [f"{t:.2f}" for t in frame['total_price'].tolist()],
+        frame['sale_date'].dt.strftime('%Y-%m-%d').tolist()
+    ))
+    with connection.cursor() as cursor:
+        for i in range(0, len(rows), batch_size):
+            cursor.executemany(sql, rows[i:i + batch_size])
+
+
+class Command(BaseCommand):
+    help = "Generate a seeded synthetic catalog and its sales history at any scale"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1000)
+        parser.add_argument('--days', type=int, default=365, help='Days of sales history per product')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--slow-share', type=float, default=0.1, help='Share of slow-moving products')
+        parser.add_argument('--end-date', type=date.fromisoformat, help='Last day of history (default yesterday)')
+        parser.add_argument('--sku-prefix', default='SYN')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per executemany on non-PostgreSQL databases')
+        parser.add_argument('--flush', action='store_true', help='Delete all products and sales first')
+
+    def flush(self):
+        if connection.vendor == 'postgresql':
+            # DELETE of tens of millions of rows is what makes reseeding slow
+            with connection.cursor() as cursor:
+                cursor.execute(f"TRUNCATE {Sale._meta.db_table}, {Product._meta.db_table} CASCADE")
+        else:
+            Sale.objects.all().delete()
+            Product.objects.all().delete()
+
+    def create_products(self, catalog, prefix, seed):
+        stock = catalog.rng.integers(0, 501, size=len(catalog))
+        products = [
+            Product(
+                name=f"{catalog.names[c]} Item {i + 1}", sku=f"{prefix}-{seed}-{i + 1:07d}",
+                price=Decimal(f"{price:.2f}"), current_stock=s
+            )
+            for i, (c, price, s) in enumerate(zip(catalog.category.tolist(), catalog.price.tolist(), stock.tolist()))
+        ]
+        Product.objects.bulk_create(products, batch_size=5000)
+        # Not every backend returns primary keys from bulk_create
+        ids = dict(Product.objects.filter(sku__startswith=f"{prefix}-{seed}-").values_list('sku', 'id'))
+        return np.array([ids[p.sku] for p in products], dtype=np.int64)
+
+    def handle(self, *args, **options):
+        n_products, days, seed = options['products'], options['days'], options['seed']
+        if n_products < 1 or days < 1:
+            raise CommandError("--products and --days must be positive")
+        prefix = options['sku_prefix']
+        end_date = options['end_date'] or date.today() - timedelta(days=1)
+        start_date = end_date - timedelta(days=days - 1)
+        use_copy = connection.vendor == 'postgresql'
+
+        started = time.perf_counter()
+        if options['flush']:
+            self.flush()
+        elif Product.objects.filter(sku__startswith=f"{prefix}-{seed}-").exists():
+            raise CommandError(f"Products {prefix}-{seed}-* already exist; use --flush or another --seed/--sku-prefix")
+
+        catalog = SyntheticCatalog(n_products, seed=seed, slow_share=options['slow_share'])
+        with transaction.atomic():
+            product_ids = self.create_products(catalog, prefix, seed)
+        self.stderr.write(f"{n_products} products in {time.perf_counter() - started:.1f}s")
+
+        generate_seconds = write_seconds = 0.0
+        total = 0
+        for first in range(0, n_products, CHUNK_PRODUCTS):
+            rows = np.arange(first, min(first + CHUNK_PRODUCTS, n_products))
+            t0 = time.perf_counter()
+            frame = sales_frame(product_ids[rows], catalog.price[rows], catalog.demand(start_date, days, rows), start_date)
+            t1 = time.perf_counter()
+            with transaction.atomic():
+                if use_copy:
+                    copy_sales(frame)
+                else:
+                    insert_sales(frame, options['batch_size'])
+            t2 = time.perf_counter()
+            generate_seconds += t1 - t0
+            write_seconds += t2 - t1
+            total += len(frame)
+            self.stderr.write(
+                f"  {rows[-1] + 1}/{n_products} products, {total} sales, "
+                f"{total / (generate_seconds + write_seconds):,.0f} rows/s"
+            )
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Generated {n_products} products and {total} sales ({start_date} to {end_date}) in {elapsed:.1f}s "
+            f"via {'COPY' if use_copy else 'INSERT'}: {total / elapsed:,.0f} rows/s overall, "
+            f"generation {total / generate_seconds if generate_seconds else 0:,.0f} rows/s, "
+            f"writes {total / write_seconds if write_seconds else 0:,.0f} rows/s"
+        )
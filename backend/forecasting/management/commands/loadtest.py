@@ -0,0 +1,333 @@
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from forecasting.management.benchmark import git_commit
+from inventory.models import Product
+
+# name: (method, path, JSON body); '{product_id}' is replaced per request
+ENDPOINTS = {
+    'products': ('GET', '/api/inventory/products/', None),
+    'sales': ('GET', '/api/inventory/sales/', None),
+    'turnover': ('GET', '/api/inventory/analytics/turnover/', None),
+    'abc': ('GET', '/api/inventory/analytics/abc-analysis/', None),
+    'slow_movers': ('GET', '/api/inventory/analytics/slow-movers/', None),
+    'sales_trends': ('GET', '/api/inventory/analytics/sales-trends/', None),
+    'health': ('GET', '/api/inventory/analytics/health/', None),
+    'top_products': ('GET', '/api/inventory/analytics/top-products/', None),
+    'forecast': ('POST', '/api/forecasting/advanced-predict/', {'product_id': '{product_id}', 'days': 30}),
+}
+DEFAULT_MIX = 'products=25,sales=25,turnover=5,abc=5,slow_movers=5,sales_trends=5,health=5,top_products=5,forecast=5'
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.strip().partition('=')
+        if name not in ENDPOINTS:
+            raise CommandError(f"Unknown endpoint '{name}'; choose from {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise CommandError("The traffic mix needs at least one positive weight")
+    return mix
+
+
+class HTTPConnection:
+    """
+    Minimal keep-alive HTTP/1.1 client on asyncio streams, so the harness
+    needs nothing beyond the standard library. One per virtual user.
+    """
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None):
+        """Returns (status, lower-cased headers); the body is read and dropped"""
+        payload = json.dumps(body).encode() if body is not None else b''
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\nAccept: application/json\r\n"
+        if body is not None:
+            head += f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+        message = head.encode() + b"\r\n" + payload
+
+        for attempt in (0, 1):
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            try:
+                self.writer.write(message)
+                await self.writer.drain()
+                status_line = await self.reader.readline()
+                if not status_line:
+                    raise ConnectionResetError("Connection closed by server")
+            except ConnectionError:
+                # The server dropped an idle keep-alive connection: reconnect once
+                self.close()
+                if attempt:
+                    raise
+                continue
+            return await self.read_response(status_line)
+
+    async def read_response(self, status_line):
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if 'content-length' in headers:
+            await self.reader.readexactly(int(headers['content-length']))
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        else:
+            await self.reader.read()
+            headers['connection'] = 'close'
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, headers
+
+
+def summarize(samples, elapsed):
+    """Per-endpoint and total throughput, latency percentiles, errors and queries"""
+
+    def stats(rows):
+        latency = np.array([r[1] for r in rows]) * 1000
+        errors = sum(1 for r in rows if r[2] is None or r[2] >= 400)
+        queries = [r[3] for r in rows if r[3] is not None]
+        p50, p95, p99 = np.percentile(latency, [50, 95, 99]).tolist()
+        return {
+            'requests': len(rows),
+            'rps': len(rows) / elapsed if elapsed else None,
+            'errors': errors,
+            'error_rate': errors / len(rows),
+            'p50_ms': p50,
+            'p95_ms': p95,
+            'p99_ms': p99,
+            'max_ms': float(latency.max()),
+            'queries_mean': sum(queries) / len(queries) if queries else None,
+            'queries_max': max(queries) if queries else None,
+        }
+
+    by_endpoint = {}
+    for row in samples:
+        by_endpoint.setdefault(row[0], []).append(row)
+    return {
+        'endpoints': {name: stats(rows) for name, rows in sorted(by_endpoint.items())},
+        'total': stats(samples) if samples else None,
+    }
+
+
+def regressions(results, baseline, max_ratio):
+    """Endpoints whose p95 grew by more than max_ratio, or that now run more queries"""
+    found = []
+    for name, now in results['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(name)
+        if not before:
+            continue
+        if before['p95_ms'] and now['p95_ms'] / before['p95_ms'] > max_ratio:
+            found.append(f"{name}: p95 {before['p95_ms']:.1f}ms -> {now['p95_ms']:.1f}ms")
+        if before['queries_max'] is not None and now['queries_max'] is not None \
+                and now['queries_max'] > before['queries_max']:
+            found.append(f"{name}: up to {now['queries_max']} queries, was {before['queries_max']}")
+    return found
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _reachable(url):
+    url = urlsplit(url)
+    try:
+        socket.create_connection((url.hostname, url.port or 6379), timeout=1).close()
+        return True
+    except OSError:
+        return False
+
+
+class Command(BaseCommand):
+    help = "Replay a traffic mix against a local server and report per-endpoint latency percentiles"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Server to load (ignored with --serve)')
+        parser.add_argument('--serve', action='store_true',
+                            help='Start a local gunicorn on this project and database for the run')
+        parser.add_argument('--serve-workers', type=int, default=2)
+        parser.add_argument('--mix', default=DEFAULT_MIX, help=f"Weighted endpoints, name=weight,... ({', '.join(ENDPOINTS)})")
+        parser.add_argument('--concurrency', type=int, default=10, help='Virtual users, each with one connection')
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run')
+        parser.add_argument('--requests', type=int, default=0, help='Stop after this many requests instead')
+        parser.add_argument('--warmup', type=float, default=0.0, help='Seconds of requests left out of the results')
+        parser.add_argument('--timeout', type=float, default=60.0, help='Seconds before a request counts as an error')
+        parser.add_argument('--seed', type=int, default=0, help='Seeds the endpoint and product choices')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--compare', help='Baseline JSON file to compare against')
+        parser.add_argument('--max-regression', type=float, default=0.0,
+                            help='Fail if a p95 exceeds the baseline by this ratio or an endpoint runs more queries')
+
+    async def load(self, host, port, mix, ids, options):
+        rng = random.Random(options['seed'])
+        names, weights = list(mix), list(mix.values())
+
+        samples = []
+        issued = 0
+        start = time.perf_counter()
+        warm_until = start + options['warmup']
+        deadline = None if options['requests'] else warm_until + options['duration']
+
+        def next_request():
+            nonlocal issued
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+            if options['requests'] and issued >= options['requests']:
+                return None
+            issued += 1
+            name = rng.choices(names, weights)[0]
+            method, path, body = ENDPOINTS[name]
+            if body is not None:
+                product_id = rng.choice(ids)
+                body = {k: product_id if v == '{product_id}' else v for k, v in body.items()}
+            return name, method, path, body
+
+        async def user():
+            client = HTTPConnection(host, port)
+            try:
+                while (request := next_request()) is not None:
+                    name, method, path, body = request
+                    t0 = time.perf_counter()
+                    try:
+                        status, headers = await asyncio.wait_for(
+                            client.request(method, path, body), options['timeout']
+                        )
+                    except (OSError, asyncio.TimeoutError, ValueError, asyncio.IncompleteReadError):
+                        client.close()
+                        status, headers = None, {}
+                    if t0 >= warm_until:
+                        queries = headers.get('x-query-count')
+                        samples.append((name, time.perf_counter() - t0, status, int(queries) if queries else None))
+            finally:
+                client.close()
+
+        await asyncio.gather(*(user() for _ in range(max(1, options['concurrency']))))
+        return samples, time.perf_counter() - max(start, warm_until)
+
+    def start_server(self, workers):
+        port = _free_port()
+        env = dict(os.environ, QUERY_COUNT_HEADERS='True', ALLOWED_HOSTS='127.0.0.1,localhost')
+        if settings.REDIS_URL and not _reachable(settings.REDIS_URL):
+            # Stay offline: without Redis every cached endpoint would error
+            self.stderr.write(f"{settings.REDIS_URL} is unreachable; the server uses an in-memory cache")
+            env['REDIS_URL'] = ''
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', 'config.wsgi:application',
+             '--bind', f'127.0.0.1:{port}', '--workers', str(workers), '--log-level', 'warning'],
+            cwd=settings.BASE_DIR, env=env
+        )
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError("The load-test server exited during startup")
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return process, port
+            except OSError:
+                time.sleep(0.2)
+        process.terminate()
+        raise CommandError("The load-test server did not start within 60s")
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options['mix'])
+        # The server under test reads this same local database
+        ids = list(Product.objects.order_by('id').values_list('id', flat=True)[:1000]) if mix.get('forecast') else []
+        if mix.get('forecast') and not ids:
+            raise CommandError("The forecast endpoint needs products; run generate_sales first")
+        server = None
+        if options['serve']:
+            server, port = self.start_server(options['serve_workers'])
+            host = '127.0.0.1'
+        else:
+            url = urlsplit(options['url'])
+            host, port = url.hostname, url.port or 80
+
+        try:
+            samples, elapsed = asyncio.run(self.load(host, port, mix, ids, options))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=30)
+        if not samples:
+            raise CommandError("No requests completed")
+
+        results = {
+            'meta': {
+                'commit': git_commit(),
+                'created': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'url': f"http://{host}:{port}",
+                'concurrency': options['concurrency'],
+                'seconds': elapsed,
+                'mix': mix,
+                'seed': options['seed'],
+            },
+            **summarize(samples, elapsed),
+        }
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read baseline {options['compare']}: {e}")
+        self.report(results, baseline)
+
+        if results['total']['queries_mean'] is None:
+            self.stderr.write("No X-Query-Count headers: run the server with QUERY_COUNT_HEADERS=True (or use --serve)")
+        if baseline and options['max_regression']:
+            found = regressions(results, baseline, options['max_regression'])
+            if found:
+                raise CommandError("Regressions against the baseline:\n  " + "\n  ".join(found))
+
+    def report(self, results, baseline):
+        old = (baseline or {}).get('endpoints', {})
+        self.stdout.write(
+            f"{'endpoint':<14} {'reqs':>6} {'rps':>7} {'err%':>6} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8} {'queries':>8}"
+            + (f" {'p95 vs base':>12}" if baseline else '')
+        )
+        rows = list(results['endpoints'].items()) + [('total', results['total'])]
+        for name, r in rows:
+            queries = f"{r['queries_mean']:.1f}" if r['queries_mean'] is not None else '-'
+            line = (
+                f"{name:<14} {r['requests']:>6} {r['rps']:>7.1f} {r['error_rate'] * 100:>5.1f}% "
+                f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {queries:>8}"
+            )
+            before = baseline.get('total') if name == 'total' and baseline else old.get(name)
+            if before and before['p95_ms']:
+                line += f" {r['p95_ms'] / before['p95_ms']:>11.2f}x"
+            self.stdout.write(line)
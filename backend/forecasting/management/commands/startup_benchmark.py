@@ -0,0 +1,75 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+HEAVY_MODULES = ('prophet', 'statsmodels', 'sklearn', 'pandas', 'cmdstanpy')
+
+# Runs in a fresh interpreter: boot the WSGI app the way a gunicorn worker
+# does, load the URLconf (first request), optionally import every model
+# library (the old eager behaviour), then report timings and RSS.
+PROBE = '''
+import json, resource, sys, time
+start = time.perf_counter()
+import config.wsgi
+wsgi = time.perf_counter() - start
+from django.urls import get_resolver
+get_resolver().url_patterns
+urlconf = time.perf_counter() - start
+if {preload}:
+    from forecasting.registry import models
+    models.preload()
+total = time.perf_counter() - start
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+try:
+    with open('/proc/self/status') as f:
+        rss_kb = next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+except (OSError, StopIteration):
+    pass
+print(json.dumps({{
+    'wsgi_s': wsgi, 'urlconf_s': urlconf, 'total_s': total, 'rss_mb': rss_kb / 1024,
+    'heavy_modules': [m for m in {heavy!r} if m in sys.modules],
+}}))
+'''
+
+
+class Command(BaseCommand):
+    help = "Measure config.wsgi import time and RSS with lazy vs preloaded model libraries"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3, help='Fresh interpreters per mode (median is reported)')
+        parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+
+    def probe(self, preload):
+        code = PROBE.format(preload=preload, heavy=HEAVY_MODULES)
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'))
+        proc = subprocess.run(
+            [sys.executable, '-c', code], cwd=settings.BASE_DIR, env=env, capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            raise CommandError(f"Startup probe failed:\n{proc.stderr.strip()}")
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+
+    def handle(self, *args, **options):
+        results = {}
+        for mode, preload in (('lazy', False), ('preloaded', True)):
+            runs = [self.probe(preload) for _ in range(max(1, options['repeat']))]
+            results[mode] = {
+                key: statistics.median(run[key] for run in runs)
+                for key in ('wsgi_s', 'urlconf_s', 'total_s', 'rss_mb')
+            }
+            results[mode]['heavy_modules'] = runs[-1]['heavy_modules']
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(f"{'mode':<10} {'wsgi':>8} {'urlconf':>8} {'total':>8} {'rss':>9}  heavy modules")
+        for mode, r in results.items():
+            self.stdout.write(
+                f"{mode:<10} {r['wsgi_s']:>7.2f}s {r['urlconf_s']:>7.2f}s {r['total_s']:>7.2f}s "
+                f"{r['rss_mb']:>6.0f} MB  {', '.join(r['heavy_modules']) or '-'}"
+            )
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_alter_product_sku_alter_sale_sale_date'),
+        ('forecasting', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ForecastRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('requested_model', models.CharField(max_length=50)),
+                ('model_used', models.CharField(max_length=50)),
+                ('reason', models.CharField(max_length=255)),
+                ('first_date', models.DateField()),
+                ('horizon', models.IntegerField()),
+                ('sales_watermark', models.CharField(max_length=100)),
+                ('characteristics', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='forecast_run', to='inventory.product')),
+            ],
+        ),
+    ]
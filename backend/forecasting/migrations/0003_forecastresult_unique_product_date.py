@@ -0,0 +1,28 @@
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def drop_duplicate_forecasts(apps, schema_editor):
+    """Keep the newest row per (product, forecast_date) before adding the constraint"""
+    ForecastResult = apps.get_model('forecasting', 'ForecastResult')
+    keep = ForecastResult.objects.values('product', 'forecast_date').annotate(keep_id=Max('id')).values('keep_id')
+    ForecastResult.objects.exclude(id__in=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forecasting', '0002_forecastrun'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_forecasts, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='forecastresult',
+            name='forecasting_product_e674e0_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='forecastresult',
+            constraint=models.UniqueConstraint(fields=('product', 'forecast_date'), name='forecast_product_date_uniq'),
+        ),
+    ]
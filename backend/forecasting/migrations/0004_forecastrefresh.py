@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_alter_product_sku_alter_sale_sale_date'),
+        ('forecasting', '0003_forecastresult_unique_product_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ForecastRefresh',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('abc_class', models.CharField(max_length=1)),
+                ('sales_watermark', models.CharField(max_length=100)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='forecast_refresh', to='inventory.product')),
+            ],
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_alter_product_sku_alter_sale_sale_date'),
+        ('forecasting', '0004_forecastrefresh'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductCharacteristics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_sales', models.BigIntegerField()),
+                ('avg_daily', models.FloatField()),
+                ('cv', models.FloatField()),
+                ('trend', models.FloatField()),
+                ('seasonality', models.FloatField()),
+                ('zero_ratio', models.FloatField()),
+                ('days_count', models.IntegerField()),
+                ('sales_watermark', models.CharField(max_length=100)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='series_characteristics', to='inventory.product')),
+            ],
+        ),
+    ]
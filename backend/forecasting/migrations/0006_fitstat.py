@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_alter_product_sku_alter_sale_sale_date'),
+        ('forecasting', '0005_productcharacteristics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FitStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_type', models.CharField(max_length=50)),
+                ('n_obs', models.IntegerField()),
+                ('wall_seconds', models.FloatField()),
+                ('peak_rss_mb', models.FloatField()),
+                ('peak_growth_mb', models.FloatField()),
+                ('rss_mb', models.FloatField()),
+                ('pid', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='fit_stats', to='inventory.product')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['model_type', 'created_at'], name='fitstat_model_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forecasting', '0006_fitstat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forecastresult',
+            name='abs_error',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='forecastresult',
+            name='actual_value',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='modelaccuracy',
+            name='live_days',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='modelaccuracy',
+            name='live_mae',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='modelaccuracy',
+            name='live_mape',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='modelaccuracy',
+            name='live_updated',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='forecastresult',
+            index=models.Index(fields=['forecast_date'], name='forecast_date_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forecasting', '0007_live_accuracy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forecastrun',
+            name='timed_out',
+            field=models.JSONField(default=list),
+        ),
+    ]
@@ -8,14 +8,21 @@ class ForecastResult(models.Model):
     confidence_lower = models.FloatField()
     confidence_upper = models.FloatField()
     model_used = models.CharField(max_length=50)
-    accuracy_score = models.FloatField(null=True, blank=True)  # R² when actuals available
+    # Filled by the accuracy scoring job once the day has closed: units
+    # sold, |actual - predicted| and 1 - error / max(actual, predicted)
+    actual_value = models.FloatField(null=True, blank=True)
+    abs_error = models.FloatField(null=True, blank=True)
+    accuracy_score = models.FloatField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-forecast_date']
-        indexes = [
-            models.Index(fields=['product', 'forecast_date']),
+        # One row per product and day; bulk upserts conflict on it
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'forecast_date'], name='forecast_product_date_uniq'),
         ]
+        # The scoring job selects newly closed days across all products
+        indexes = [models.Index(fields=['forecast_date'], name='forecast_date_idx')]
 
     def __str__(self):
         return f"{self.product.sku} - {self.forecast_date} ({self.model_used})"
@@ -28,9 +35,106 @@ class ModelAccuracy(models.Model):
     mape = models.FloatField()
     sample_size = models.IntegerField()
     last_updated = models.DateTimeField(auto_now=True)
+    # Out-of-sample errors of stored forecasts over the last
+    # FORECAST_ACCURACY_WINDOW_DAYS scored days (live_days of them)
+    live_mae = models.FloatField(null=True, blank=True)
+    live_mape = models.FloatField(null=True, blank=True)
+    live_days = models.IntegerField(default=0)
+    live_updated = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         unique_together = ('product', 'model_name')
 
     def __str__(self):
         return f"{self.product.sku} - {self.model_name}: R2={self.r2_score:.2f}"
+
+class ForecastRun(models.Model):
+    """
+    Last forecast stored for a product, with the sales watermark it was
+    computed from, so unchanged history can be served from ForecastResult.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='forecast_run')
+    requested_model = models.CharField(max_length=50)  # 'auto' or the user's choice
+    model_used = models.CharField(max_length=50)
+    reason = models.CharField(max_length=255)
+    first_date = models.DateField()
+    horizon = models.IntegerField()
+    sales_watermark = models.CharField(max_length=100)
+    characteristics = models.JSONField(default=dict)
+    # Models that overran the time budget; non-empty for a fallback forecast
+    timed_out = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.product.sku} - {self.model_used} x{self.horizon} from {self.first_date}"
+
+class ForecastRefresh(models.Model):
+    """
+    Last scheduled refresh of a product's forecast, with its ABC class and
+    the sales watermark it saw, so unchanged products are skipped.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='forecast_refresh')
+    abc_class = models.CharField(max_length=1)
+    sales_watermark = models.CharField(max_length=100)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.product.sku} ({self.abc_class}) refreshed {self.refreshed_at:%Y-%m-%d %H:%M}"
+
+class ScoringWatermark(models.Model):
+    """
+    Highest Sale id the accuracy scoring job has seen (a single row). Sales
+    above it that landed on already scored days get those days re-scored.
+    """
+    last_sale_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Scored through sale {self.last_sale_id}"
+
+class ProductCharacteristics(models.Model):
+    """
+    Series characteristics the model router reads, computed for the
+    catalog in vectorized passes and kept current by sales watermark.
+    """
+    FIELDS = ('total_sales', 'avg_daily', 'cv', 'trend', 'seasonality', 'zero_ratio', 'days_count')
+
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='series_characteristics')
+    total_sales = models.BigIntegerField()
+    avg_daily = models.FloatField()
+    cv = models.FloatField()
+    trend = models.FloatField()
+    seasonality = models.FloatField()
+    zero_ratio = models.FloatField()
+    days_count = models.IntegerField()
+    sales_watermark = models.CharField(max_length=100)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __str__(self):
+        return f"{self.product.sku}: cv={self.cv:.2f} seasonality={self.seasonality:.2f} zeros={self.zero_ratio:.0%}"
+
+class FitStat(models.Model):
+    """
+    Wall time and resident memory of one model fit, recorded by the
+    process that ran it, for sizing workers and finding series whose fits
+    blow up memory. product is empty for fits shared by a cluster.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, null=True, blank=True, related_name='fit_stats')
+    model_type = models.CharField(max_length=50)
+    n_obs = models.IntegerField()
+    wall_seconds = models.FloatField()
+    peak_rss_mb = models.FloatField()
+    peak_growth_mb = models.FloatField()
+    rss_mb = models.FloatField()
+    pid = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['model_type', 'created_at'], name='fitstat_model_created_idx')]
+
+    def __str__(self):
+        return f"{self.model_type} x{self.n_obs}: {self.wall_seconds:.2f}s, +{self.peak_growth_mb:.0f} MB (pid {self.pid})"
@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.core.cache import cache
+from collections import Counter
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BatchProgress:
+    """
+    Live progress of one batch forecast job, kept in the Django cache.
+
+    Chunks of a batch run on different workers, so each chunk publishes
+    its own list of finished entries under its own key and readers merge
+    them; no key is ever updated by two processes.
+    """
+
+    def __init__(self, batch_id):
+        self.batch_id = batch_id
+
+    def _key(self, part):
+        return f"forecast:batch:{self.batch_id}:{part}"
+
+    def start(self, total, chunks):
+        self._set('meta', {'total': total, 'chunks': chunks, 'started': time.time()})
+
+    def publish(self, chunk, entries):
+        self._set(chunk, entries)
+
+    def _set(self, part, value):
+        # Progress is best effort and must never fail the forecasts
+        try:
+            cache.set(self._key(part), value, settings.FORECAST_PROGRESS_TTL)
+        except Exception as e:
+            logger.warning(f"Could not publish progress of batch {self.batch_id}: {str(e)}")
+
+    def read(self):
+        """(meta, finished entries of each chunk), or (None, []) if unknown"""
+        try:
+            meta = cache.get(self._key('meta'))
+            if meta is None:
+                return None, []
+            keys = [self._key(i) for i in range(meta['chunks'])]
+            found = cache.get_many(keys)
+        except Exception as e:
+            logger.warning(f"Could not read progress of batch {self.batch_id}: {str(e)}")
+            return None, []
+        return meta, [found.get(key, []) for key in keys]
+
+    def snapshot(self):
+        """Progress stats plus the entries finished so far, or None"""
+        meta, chunks = self.read()
+        if meta is None:
+            return None
+        results = [entry for entries in chunks for entry in entries]
+        return dict(progress_stats(meta, results), results=results)
+
+
+def progress_stats(meta, results):
+    """done/total, per-status counts, products per second and ETA"""
+    done = len(results)
+    elapsed = max(time.time() - meta['started'], 0.0)
+    throughput = done / elapsed if done and elapsed > 0 else 0.0
+    remaining = meta['total'] - done
+    return {
+        'total': meta['total'],
+        'done': done,
+        'percent': round(100.0 * done / meta['total'], 1) if meta['total'] else 100.0,
+        'counts': dict(Counter(r['status'] for r in results)),
+        'throughput': round(throughput, 2),
+        'elapsed_seconds': round(elapsed, 1),
+        'eta_seconds': round(remaining / throughput, 1) if throughput else None,
+    }
+
+
+class ChunkProgress:
+    """
+    Entries finished by one chunk. Republished at most every
+    FORECAST_PROGRESS_INTERVAL seconds while it runs, and by finish().
+    """
+
+    def __init__(self, progress, index):
+        self.progress = progress
+        self.index = index
+        self.entries = []
+        self._published = time.monotonic()
+
+    def add(self, entry):
+        self.entries.append(entry)
+        if self.progress is not None and \
+                time.monotonic() - self._published >= settings.FORECAST_PROGRESS_INTERVAL:
+            self.finish()
+
+    def finish(self):
+        if self.progress is not None:
+            self.progress.publish(self.index, self.entries)
+            self._published = time.monotonic()
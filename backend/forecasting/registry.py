@@ -0,0 +1,75 @@
+import importlib
+import threading
+import time
+from types import SimpleNamespace
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """
+    Lazily imported model implementations, keyed by name.
+
+    Prophet and statsmodels take seconds and hundreds of MB
+    to import, and web workers that never fit a model should not pay for
+    them at boot. Each entry lists (module, attribute) pairs that are
+    imported on the first get() of that name and cached after.
+    """
+
+    def __init__(self):
+        self._specs = {}
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, on_load=None, **attrs):
+        self._specs[name] = (attrs, on_load)
+
+    def __contains__(self, name):
+        return name in self._specs
+
+    def get(self, name):
+        impl = self._loaded.get(name)
+        if impl is not None:
+            return impl
+        with self._lock:
+            impl = self._loaded.get(name)
+            if impl is None:
+                start = time.perf_counter()
+                attrs, on_load = self._specs[name]
+                impl = SimpleNamespace(**{
+                    attr: getattr(importlib.import_module(module), target)
+                    for attr, (module, target) in attrs.items()
+                })
+                if on_load is not None:
+                    on_load()
+                self._loaded[name] = impl
+                logger.debug(f"Loaded {name} models in {time.perf_counter() - start:.2f}s")
+        return impl
+
+    def preload(self, names=None):
+        """Import everything up front (e.g. in a forecasting worker)"""
+        for name in list(self._specs) if names is None else names:
+            self.get(name)
+
+    def loaded(self):
+        return sorted(self._loaded)
+
+
+def _quiet_cmdstanpy():
+    # cmdstanpy configures its logger (at DEBUG) on first use, which undid a
+    # plain setLevel done before the import; hide Prophet's per-fit output
+    from cmdstanpy.utils import get_logger
+    get_logger().setLevel(logging.ERROR)
+
+
+models = ModelRegistry()
+models.register(
+    'prophet',
+    on_load=_quiet_cmdstanpy,
+    Prophet=('prophet', 'Prophet'),
+    model_to_json=('prophet.serialize', 'model_to_json'),
+    model_from_json=('prophet.serialize', 'model_from_json'),
+)
+models.register('arima', ARIMA=('statsmodels.tsa.arima.model', 'ARIMA'))
+models.register('exponential', ExponentialSmoothing=('statsmodels.tsa.holtwinters', 'ExponentialSmoothing'))
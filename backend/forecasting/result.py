@@ -0,0 +1,89 @@
+import numpy as np
+
+
+class ForecastSeries:
+    """
+    Columnar daily forecast: dates (datetime64[D]) with value, lower and
+    upper float arrays of the same length.
+
+    The engine, the ensemble merge and the writers pass these around
+    instead of one dict per day. Indexing with an int, iterating and
+    records() still give the {'date', 'value', 'lower', 'upper'} dicts;
+    columns() is the compact JSON form.
+    """
+
+    __slots__ = ('dates', 'value', 'lower', 'upper')
+
+    def __init__(self, dates, value, lower, upper):
+        self.dates = np.asarray(dates).astype('datetime64[D]')
+        self.value = np.asarray(value, dtype=np.float64)
+        self.lower = np.asarray(lower, dtype=np.float64)
+        self.upper = np.asarray(upper, dtype=np.float64)
+
+    @classmethod
+    def empty(cls):
+        return cls(np.array([], dtype='datetime64[D]'), [], [], [])
+
+    @classmethod
+    def following(cls, last_date, value, lower, upper):
+        """Arrays of consecutive days starting the day after last_date"""
+        start = np.datetime64(last_date, 'D') + 1
+        return cls(start + np.arange(len(value)), value, lower, upper)
+
+    @classmethod
+    def mean(cls, series):
+        """Date-by-date average of several forecasts (empty ones are ignored)"""
+        series = [s for s in series if len(s)]
+        if not series:
+            return cls.empty()
+        dates = np.unique(np.concatenate([s.dates for s in series]))
+        stacked = np.full((3, len(series), len(dates)), np.nan)
+        for i, s in enumerate(series):
+            idx = np.searchsorted(dates, s.dates)
+            stacked[:, i, idx] = (s.value, s.lower, s.upper)
+        value, lower, upper = np.nanmean(stacked, axis=1)
+        return cls(dates, value, lower, upper)
+
+    def scaled(self, factor):
+        return ForecastSeries(self.dates, self.value * factor, self.lower * factor, self.upper * factor)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return ForecastSeries(self.dates[key], self.value[key], self.lower[key], self.upper[key])
+        return {
+            'date': self.dates[key].item(),
+            'value': float(self.value[key]),
+            'lower': float(self.lower[key]),
+            'upper': float(self.upper[key])
+        }
+
+    def __iter__(self):
+        return iter(self.records())
+
+    def records(self):
+        """One {'date', 'value', 'lower', 'upper'} dict per day"""
+        return [
+            {'date': d, 'value': v, 'lower': lo, 'upper': up}
+            for d, v, lo, up in zip(
+                self.dates.tolist(), self.value.tolist(), self.lower.tolist(), self.upper.tolist()
+            )
+        ]
+
+    def columns(self):
+        """
+        Compact form: the first date and one list per column. Dates are
+        consecutive days from start; a 'dates' list is added only when the
+        series has gaps.
+        """
+        out = {
+            'start': self.dates[0].item() if len(self) else None,
+            'value': self.value.tolist(),
+            'lower': self.lower.tolist(),
+            'upper': self.upper.tolist()
+        }
+        if len(self) > 1 and (np.diff(self.dates) != np.timedelta64(1, 'D')).any():
+            out['dates'] = self.dates.tolist()
+        return out
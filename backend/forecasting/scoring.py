@@ -0,0 +1,120 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Avg, Case, Count, Exists, F, FloatField, Max, Min, OuterRef, Q, Subquery, Sum, Value, When
+)
+from django.db.models.functions import Abs, Coalesce, Greatest
+from django.utils import timezone
+from inventory.models import Sale
+from .models import ForecastResult, ModelAccuracy, ScoringWatermark
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Products whose live metrics are recomputed per query
+LIVE_ACCURACY_BLOCK = 1000
+
+
+def score_closed_days(today=None):
+    """
+    Score stored forecasts of closed days against what actually sold, then
+    refresh the live MAE/MAPE of the touched (product, model) pairs.
+
+    Rows are picked per row, not past a date high-water mark: those not
+    scored yet (new, or cleared when re-forecast), plus already scored
+    ones on a (product, day) that got a sale since the last run, found
+    through the highest Sale id seen (late or back-dated sales). Nothing
+    is refitted: one set-based UPDATE, one grouped read per block of
+    products and a bulk update.
+    """
+    today = today or timezone.now().date()
+    closed = today - timedelta(days=1)
+
+    # Units sold on the row's day; days without sales sold nothing
+    sold = Sale.objects.filter(product_id=OuterRef('product_id'), sale_date=OuterRef('forecast_date'))\
+        .values('product_id')\
+        .annotate(units=Sum('quantity'))\
+        .values('units')
+    actual = Coalesce(Subquery(sold), 0, output_field=FloatField())
+    abs_error = Abs(actual - F('predicted_value'))
+
+    with transaction.atomic():
+        watermark, _ = ScoringWatermark.objects.select_for_update().get_or_create(pk=1)
+        last_sale_id = Sale.objects.aggregate(last=Max('id'))['last'] or 0
+        # Sales that arrived since the last run, on the row's day
+        late = Sale.objects.filter(
+            id__gt=watermark.last_sale_id, id__lte=last_sale_id,
+            product_id=OuterRef('product_id'), sale_date=OuterRef('forecast_date')
+        )
+        rows = ForecastResult.objects.filter(forecast_date__lte=closed)\
+            .filter(Q(actual_value__isnull=True) | Exists(late))
+
+        # Read before the UPDATE, which takes the rows out of `rows`
+        bounds = rows.aggregate(first=Min('forecast_date'), last=Max('forecast_date'))
+        product_ids = list(rows.values_list('product_id', flat=True).distinct())
+        if last_sale_id != watermark.last_sale_id:
+            watermark.last_sale_id = last_sale_id
+            watermark.save(update_fields=['last_sale_id', 'updated_at'])
+        if not product_ids:
+            return {'rows': 0, 'pairs': 0, 'first_day': None, 'last_day': None}
+        # One statement: every column is computed from the old row
+        scored = rows.update(
+            actual_value=actual,
+            abs_error=abs_error,
+            accuracy_score=Case(
+                When(predicted_value=actual, then=Value(1.0)),
+                default=Value(1.0) - abs_error / Greatest(actual, F('predicted_value')),
+                output_field=FloatField()
+            )
+        )
+        pairs = update_live_accuracy(product_ids, closed)
+
+    logger.info(f"Scored {scored} forecast rows from {bounds['first']} to {bounds['last']} for {pairs} product models")
+    return {
+        'rows': scored,
+        'pairs': pairs,
+        'first_day': bounds['first'].isoformat(),
+        'last_day': bounds['last'].isoformat(),
+    }
+
+
+def update_live_accuracy(product_ids, closed):
+    """
+    Recompute live MAE/MAPE per (product, model) of the given products
+    over the scored days of the trailing window, a block of products at a
+    time. MAPE skips days that sold nothing, where a percentage error is
+    undefined.
+    """
+    since = closed - timedelta(days=settings.FORECAST_ACCURACY_WINDOW_DAYS)
+    ape = Case(
+        When(actual_value__gt=0, then=F('abs_error') / F('actual_value')),
+        default=None,
+        output_field=FloatField()
+    )
+    now = timezone.now()
+    updated = 0
+    for i in range(0, len(product_ids), LIVE_ACCURACY_BLOCK):
+        block = product_ids[i:i + LIVE_ACCURACY_BLOCK]
+        live = {
+            (r['product_id'], r['model_used']): r
+            for r in ForecastResult.objects.filter(
+                product_id__in=block, actual_value__isnull=False,
+                forecast_date__gt=since, forecast_date__lte=closed
+            ).values('product_id', 'model_used').annotate(mae=Avg('abs_error'), mape=Avg(ape), days=Count('id'))
+        }
+
+        accuracies = []
+        for accuracy in ModelAccuracy.objects.filter(product_id__in=block):
+            r = live.get((accuracy.product_id, accuracy.model_name))
+            if r is None:
+                continue
+            accuracy.live_mae, accuracy.live_mape, accuracy.live_days = r['mae'], r['mape'], r['days']
+            accuracy.live_updated = now
+            accuracies.append(accuracy)
+        ModelAccuracy.objects.bulk_update(
+            accuracies, ['live_mae', 'live_mape', 'live_days', 'live_updated'], batch_size=1000
+        )
+        updated += len(accuracies)
+    return updated
@@ -0,0 +1,108 @@
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from django.db.models import Max, Count
+from inventory.models import Sale
+
+
+def get_sales_watermark(product_id):
+    """
+    Cheap fingerprint of a product's sales history.
+
+    Max id changes on every new Sale, max date on back-dated edits and the
+    row count on deletes. Served from the (product, sale_date) index.
+    """
+    agg = Sale.objects.filter(product_id=product_id).aggregate(
+        max_id=Max('id'),
+        max_date=Max('sale_date'),
+        count=Count('id')
+    )
+    return (agg['max_id'], agg['max_date'], agg['count'])
+
+
+def get_sales_watermarks(product_ids):
+    """get_sales_watermark of many products in one grouped query"""
+    rows = Sale.objects.filter(product_id__in=product_ids).values('product_id').annotate(
+        max_id=Max('id'),
+        max_date=Max('sale_date'),
+        count=Count('id')
+    ).order_by()
+    found = {r['product_id']: (r['max_id'], r['max_date'], r['count']) for r in rows}
+    return {pid: found.get(pid, (None, None, 0)) for pid in product_ids}
+
+
+def watermark_key(watermark):
+    """Watermark as a string, for storing next to persisted results"""
+    return ':'.join(str(part) for part in watermark)
+
+
+class SeriesCache:
+    """
+    Bounded LRU cache of per-product daily sales frames.
+
+    Entries are stored per product together with the watermark they were
+    loaded at; a lookup with a different watermark is a miss and replaces
+    the entry, so new sales invalidate it without explicit hooks.
+    """
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, product_id, watermark):
+        with self._lock:
+            entry = self._entries.get(product_id)
+            if entry is None or entry[0] != watermark:
+                self.misses += 1
+                return None, False
+            self._entries.move_to_end(product_id)
+            self.hits += 1
+            df = entry[1]
+        return (df.copy() if df is not None else None), True
+
+    def set(self, product_id, watermark, df):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[product_id] = (watermark, df)
+            self._entries.move_to_end(product_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_load(self, product_id, loader, watermark=None):
+        """
+        Return the cached frame for the current watermark, loading on miss.
+        A watermark the caller already read saves querying it again.
+        """
+        if watermark is None:
+            watermark = get_sales_watermark(product_id)
+        df, found = self.get(product_id, watermark)
+        if found:
+            return df
+        df = loader()
+        self.set(product_id, watermark, df)
+        return df.copy() if df is not None else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# Process-wide instance shared by every ForecastingEngine
+series_cache = SeriesCache(maxsize=getattr(settings, 'FORECAST_SERIES_CACHE_SIZE', 512))
@@ -0,0 +1,112 @@
+"""
+Small statistics kernels over NumPy arrays.
+
+Every function takes one series (1-D) or many (2-D, one series per row)
+and an optional boolean mask of the cells that belong to each series, so
+a whole catalog is handled in one vectorized call instead of one sklearn
+model or pandas groupby per product.
+"""
+import numpy as np
+
+
+def _rows(y, mask):
+    y = np.atleast_2d(np.asarray(y, dtype=np.float64))
+    mask = np.ones(y.shape, dtype=bool) if mask is None else np.atleast_2d(np.asarray(mask, dtype=bool))
+    return y, mask, mask.sum(axis=1).astype(np.float64)
+
+
+def _ratio(num, den):
+    ok = den > 0
+    return np.where(ok, num / np.where(ok, den, 1.0), 0.0)
+
+
+def _unwrap(values, y):
+    return values[0] if np.ndim(y) == 1 else values
+
+
+def ols(y, x=None, mask=None):
+    """
+    Least-squares (slope, intercept) of each series on x (0, 1, 2, ...
+    by default), the same fit as sklearn's LinearRegression. Rows with a
+    constant x get slope 0 and their mean as intercept.
+    """
+    y2, mask, n = _rows(y, mask)
+    x = np.arange(y2.shape[1], dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+    x = np.broadcast_to(x, y2.shape)
+    n_safe = np.maximum(n, 1.0)
+    x_mean = np.where(mask, x, 0.0).sum(axis=1) / n_safe
+    y_mean = np.where(mask, y2, 0.0).sum(axis=1) / n_safe
+    # Centered sums keep large x (e.g. date ordinals) well conditioned
+    dx = np.where(mask, x - x_mean[:, None], 0.0)
+    slope = _ratio((dx * np.where(mask, y2, 0.0)).sum(axis=1), (dx * dx).sum(axis=1))
+    intercept = y_mean - slope * x_mean
+    return _unwrap(slope, y), _unwrap(intercept, y)
+
+
+def cv(y, mask=None):
+    """Coefficient of variation (population std over mean), 0 for a non-positive mean"""
+    y2, mask, n = _rows(y, mask)
+    n_safe = np.maximum(n, 1.0)
+    mean = np.where(mask, y2, 0.0).sum(axis=1) / n_safe
+    dev = np.where(mask, y2 - mean[:, None], 0.0)
+    std = np.sqrt((dev * dev).sum(axis=1) / n_safe)
+    return _unwrap(_ratio(std, mean), y)
+
+
+def weekday_profile(y, weekday0, mask=None):
+    """
+    Mean of each series per weekday (Monday = 0), NaN for weekdays with
+    no cells. weekday0 is the weekday of column 0.
+    """
+    y2, mask, _ = _rows(y, mask)
+    weekday = (weekday0 + np.arange(y2.shape[1])) % 7
+    values = np.where(mask, y2, 0.0)
+    profile = np.full((len(y2), 7), np.nan)
+    for k in range(7):
+        in_day = mask & (weekday == k)[None, :]
+        count = in_day.sum(axis=1)
+        profile[:, k] = np.where(count > 0, (values * in_day).sum(axis=1) / np.maximum(count, 1), np.nan)
+    return _unwrap(profile, y)
+
+
+def seasonality(y, weekday0, mask=None):
+    """Spread of the weekday means relative to their mean"""
+    profile = np.atleast_2d(weekday_profile(y, weekday0, mask))
+    level = np.nanmean(profile, axis=1)
+    return _unwrap(_ratio(np.nanstd(profile, axis=1), level), y)
+
+
+def rolling_mean(y, window):
+    """Trailing mean over `window` cells (fewer at the start), like pandas rolling(window, min_periods=1)"""
+    y2 = np.atleast_2d(np.asarray(y, dtype=np.float64))
+    csum = np.cumsum(y2, axis=1)
+    out = csum.copy()
+    out[:, window:] -= csum[:, :-window]
+    out /= np.minimum(np.arange(1, y2.shape[1] + 1), window)
+    return _unwrap(out, y)
+
+
+def accuracy(actual, predicted):
+    """
+    r2/mae/mape of two aligned arrays, with the sklearn metric
+    conventions (perfect constant series score r2 1, MAPE is guarded by
+    machine epsilon). Fewer than two points score all zeros.
+    """
+    a = np.asarray(actual, dtype=np.float64).ravel()
+    p = np.asarray(predicted, dtype=np.float64).ravel()
+    if len(a) < 2:
+        return {'r2': 0, 'mae': 0, 'mape': 0}
+
+    err = a - p
+    ss_res = float(err @ err)
+    ss_tot = float(((a - a.mean()) ** 2).sum())
+    if ss_tot > 0:
+        r2 = 1 - ss_res / ss_tot
+    else:
+        r2 = 1.0 if ss_res == 0 else 0.0
+    eps = np.finfo(np.float64).eps
+    return {
+        'r2': r2,
+        'mae': float(np.abs(err).mean()),
+        'mape': float((np.abs(err) / np.maximum(np.abs(a), eps)).mean())
+    }
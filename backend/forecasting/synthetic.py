@@ -0,0 +1,93 @@
+"""
+Seeded synthetic demand with the seed_realistic_data.py model: category
+base rates, peak months, weekend effects, multiplicative noise and rare
+slow movers, generated as a products x days matrix in NumPy.
+"""
+import numpy as np
+from datetime import date, timedelta
+
+# name: (margin, (low, high) average daily units, peak months, weekend multiplier)
+CATEGORIES = {
+    'Electronics': (1.4, (1, 20), (11, 12), 1.0),
+    'Apparel': (2.5, (1, 20), (6, 7, 12), 1.3),
+    'Food': (1.2, (20, 100), (), 1.3),
+    'Furniture': (3.0, (0, 3), (5, 8), 1.0),
+    'Stationery': (1.8, (1, 20), (8, 9), 0.8),
+}
+# (low, high) unit cost per category; price is cost times margin
+COSTS = {'Food': (2, 20), 'Furniture': (100, 2000)}
+DEFAULT_COST = (10, 500)
+
+SLOW_SALE_PROBABILITY = 0.02
+
+
+class SyntheticCatalog:
+    """Per-product traits of a generated catalog; demand() draws its sales"""
+
+    def __init__(self, n_products, seed=0, slow_share=0.1, categories=None):
+        self.rng = np.random.default_rng(seed)
+        self.names = list(categories or CATEGORIES)
+        traits = [CATEGORIES[name] for name in self.names]
+        self.category = self.rng.integers(len(self.names), size=n_products)
+
+        low = np.array([t[1][0] for t in traits])[self.category]
+        high = np.array([t[1][1] for t in traits])[self.category]
+        self.base = self.rng.integers(low, high + 1)
+        self.slow = self.rng.random(n_products) < slow_share
+
+        cost_low = np.array([COSTS.get(n, DEFAULT_COST)[0] for n in self.names])[self.category]
+        cost_high = np.array([COSTS.get(n, DEFAULT_COST)[1] for n in self.names])[self.category]
+        margin = np.array([t[0] for t in traits])[self.category]
+        self.price = np.round(self.rng.integers(cost_low, cost_high + 1) * margin, 2)
+
+        self._peak = np.zeros((len(self.names), 13), dtype=bool)
+        for c, t in enumerate(traits):
+            self._peak[c, list(t[2])] = True
+        self._weekend = np.array([t[3] for t in traits])
+
+    def __len__(self):
+        return len(self.category)
+
+    def demand(self, start_date, days, rows=None):
+        """
+        Daily units of the products `rows` (all by default) over `days`
+        days from start_date, as an int matrix. Successive calls continue
+        the catalog's random stream, so a seed reproduces the whole run.
+        """
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows)
+        dates = [start_date + timedelta(days=d) for d in range(days)]
+        months = np.array([d.month for d in dates])
+        weekend = np.array([d.weekday() >= 5 for d in dates])
+        category = self.category[rows]
+
+        multiplier = np.ones((len(rows), days))
+        peak = self._peak[category][:, months]
+        multiplier[peak] = 1.5 + self.rng.random(int(peak.sum()))
+        multiplier *= np.where(weekend[None, :], self._weekend[category][:, None], 1.0)
+        noise = self.rng.uniform(0.7, 1.3, size=(len(rows), days))
+        units = (self.base[rows][:, None] * multiplier * noise).astype(np.int64)
+
+        # Slow movers sell one or two units on rare days instead
+        slow = self.slow[rows]
+        if slow.any():
+            rare = self.rng.random((int(slow.sum()), days)) < SLOW_SALE_PROBABILITY
+            units[slow] = np.where(rare, self.rng.integers(1, 3, size=rare.shape), 0)
+        return units
+
+
+def demand_series(days, sparse=False, seed=0, end_date=None):
+    """
+    One ('ds', 'y') frame of `days` days ending at end_date (yesterday by
+    default): a dense non-slow Food series, or a sparse slow mover.
+    """
+    import pandas as pd
+    end_date = end_date or date.today() - timedelta(days=1)
+    start = end_date - timedelta(days=days - 1)
+    if sparse:
+        catalog = SyntheticCatalog(1, seed=seed, slow_share=1.0)
+    else:
+        catalog = SyntheticCatalog(1, seed=seed, slow_share=0.0, categories=['Food'])
+    y = catalog.demand(start, days)[0].astype(np.float64)
+    if sparse and not y.any():
+        y[-1] = 1.0
+    return pd.DataFrame({'ds': pd.date_range(start, periods=days), 'y': y})
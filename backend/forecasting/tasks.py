@@ -1,15 +1,91 @@
-from celery import shared_task
-from .forecasting_engine import ForecastingEngine
-from inventory.models import Product
-from .models import ForecastResult, ModelAccuracy
+from celery import shared_task, chord
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+from datetime import date
+from .forecasting_engine import ForecastingEngine, FAST_MODELS, FALLBACK_MODELS, MODEL_LABELS
+from .panel import load_demand_panel
+from .holt_winters import fit_batch, one_step_metrics
+from .intermittent import intermittent_batch, seasonal_naive_batch
+from inventory.models import Product, Sale
+from inventory.analytics import InventoryAnalytics
+from .models import ForecastRefresh
+from .writer import ForecastWriter
+from .result import ForecastSeries
+from .telemetry import save_fit_stats
+from .scoring import score_closed_days
+from .progress import BatchProgress, ChunkProgress
+from .series_cache import get_sales_watermarks, watermark_key
+from .characteristics import MIN_HISTORY_DAYS, frame_characteristics, stored_characteristics, refresh_all_characteristics
+from .clustering import demand_profiles, kmeans
+from .backtest import Backtest
+import numpy as np
+from collections import defaultdict, Counter
+from functools import partial
 import logging
 
 logger = logging.getLogger(__name__)
 
-@shared_task
-def batch_forecast_task(product_ids, days=30):
-    results = []
-    engine = ForecastingEngine()
+
+# Models that fit a whole products x days matrix in one call
+BATCH_FITTERS = {
+    'hw_vectorized': fit_batch,
+    'croston': partial(intermittent_batch, method='sba'),
+    'tsb': partial(intermittent_batch, method='tsb'),
+    'seasonal_naive': seasonal_naive_batch,
+}
+
+def _batch_vectorized(model_type, product_ids, products, panel, days, engine, writer, report):
+    """
+    Fit a vectorized model to every eligible row of the panel at once.
+    Forecasts start the day after the panel's last day for all products;
+    metrics are one-step-ahead errors over each series' last 20%. Each
+    entry is passed to report once its product is done.
+    """
+    results, eligible = {}, []
+    for pid in product_ids:
+        if pid not in products:
+            results[pid] = {'product_id': pid, 'status': 'failed', 'error': 'Product not found'}
+            continue
+        span = panel.active_span(pid)
+        if span is None or panel.days - span[0] < MIN_HISTORY_DAYS:
+            results[pid] = {'product_id': pid, 'status': 'skipped', 'reason': 'Insufficient data'}
+            continue
+        eligible.append((pid, span[0]))
+
+    if eligible:
+        rows = [panel.index[pid] for pid, _ in eligible]
+        starts = np.array([start for _, start in eligible])
+        Y = panel.matrix[rows]
+        fitted = BATCH_FITTERS[model_type](Y, starts, keep_fitted=True)
+        value, lower, upper = fitted.forecast(days)
+        r2, mae, mape = one_step_metrics(Y, fitted.fitted, starts)
+        last_date = panel.end_date
+
+        for i, (pid, start) in enumerate(eligible):
+            try:
+                forecast_data = ForecastSeries.following(last_date, value[i], lower[i], upper[i])
+                metrics = {'r2': float(r2[i]), 'mae': float(mae[i]), 'mape': float(mape[i])}
+                writer.add(pid, forecast_data, model_type, metrics, panel.days - start)
+                results[pid] = {'product_id': pid, 'status': 'success', 'model': model_type}
+            except Exception as e:
+                logger.error(f"Error forecasting for product {pid}: {str(e)}")
+                results[pid] = {'product_id': pid, 'status': 'error', 'error': str(e)}
+
+    ordered = [results[pid] for pid in product_ids]
+    for entry in ordered:
+        report(entry)
+    return ordered
+
+def _batch_per_product(product_ids, days, model_type, products, panel, engine, writer, report):
+    results = {}
+
+    # Products the router sends to the fast tier, fitted together per model
+    fast_tier = defaultdict(list)
+
+    # Optimize: routing reads the characteristics table in one query; only
+    # products whose sales changed are recomputed, vectorized over the panel
+    characteristics = stored_characteristics(list(products), panel)
     
     for pid in product_ids:
         try:
@@ -18,49 +94,265 @@ def batch_forecast_task(product_ids, days=30):
             # Ideally we want to update the DB.
             
             # Check if product exists
-            if not Product.objects.filter(pk=pid).exists():
-                results.append({'product_id': pid, 'status': 'failed', 'error': 'Product not found'})
+            if pid not in products:
+                results[pid] = {'product_id': pid, 'status': 'failed', 'error': 'Product not found'}
                 continue
 
-            chars = engine.analyze_product_data(pid)
-            if not chars:
-                results.append({'product_id': pid, 'status': 'skipped', 'reason': 'Insufficient data'})
+            chars = characteristics.get(pid)
+            if not chars or chars['days_count'] < MIN_HISTORY_DAYS:
+                results[pid] = {'product_id': pid, 'status': 'skipped', 'reason': 'Insufficient data'}
                 continue
+
+            if model_type == 'auto':
+                model, _ = engine.select_best_model(chars)
+                if model in FAST_MODELS:
+                    fast_tier[model].append(pid)
+                    continue
                 
-            res = engine.generate_forecast(pid, days, 'auto')
-            
-            # Save to DB
-            product = Product.objects.get(pk=pid)
-            forecast_data = res['forecast']
-            for item in forecast_data:
-                ForecastResult.objects.update_or_create(
-                    product=product,
-                    forecast_date=item['date'],
-                    defaults={
-                        'predicted_value': item['value'],
-                        'confidence_lower': item['lower'],
-                        'confidence_upper': item['upper'],
-                        'model_used': res['model_used']
-                    }
-                )
+            res = engine.generate_forecast(pid, days, model_type, panel)
             
-            # Update metrics
-            metrics = res['metrics']
-            ModelAccuracy.objects.update_or_create(
-                product=product,
-                model_name=res['model_used'],
-                defaults={
-                    'r2_score': metrics['r2'],
-                    'mae': metrics['mae'],
-                    'mape': metrics['mape'],
-                    'sample_size': chars.get('days_count', 0)
-                }
-            )
-
-            results.append({'product_id': pid, 'status': 'success', 'model': res['model_used']})
+            # Save to DB and update metrics
+            writer.add(pid, res['forecast'], res['model_used'], res['metrics'], chars.get('days_count', 0))
+
+            results[pid] = {'product_id': pid, 'status': 'success', 'model': res['model_used']}
             
         except Exception as e:
             logger.error(f"Error forecasting for product {pid}: {str(e)}")
-            results.append({'product_id': pid, 'status': 'error', 'error': str(e)})
+            results[pid] = {'product_id': pid, 'status': 'error', 'error': str(e)}
+
+        finally:
+            if pid in results:
+                report(results[pid])
+
+    for model, pids in fast_tier.items():
+        results.update(zip(pids, _batch_vectorized(model, pids, products, panel, days, engine, writer, report)))
             
+    return [results[pid] for pid in product_ids]
+
+def _cluster_frame(panel, series, start):
+    import pandas as pd
+    return pd.DataFrame({'ds': pd.to_datetime(panel.dates[start:]), 'y': series})
+
+def _batch_clustered(model_type, product_ids, products, panel, days, engine, writer, report):
+    """
+    Fit one model per cluster of similar demand instead of one per product.
+
+    Eligible products are grouped by k-means over their normalized recent
+    profiles (about FORECAST_CLUSTER_SIZE per cluster). Each cluster's
+    summed demand is fitted and backtested once, and every member gets the
+    cluster forecast and backtest scaled by its share of the cluster's
+    recent volume, so accuracy is still scored and stored per product.
+    """
+    results, eligible = {}, []
+    for pid in product_ids:
+        if pid not in products:
+            results[pid] = {'product_id': pid, 'status': 'failed', 'error': 'Product not found'}
+            continue
+        span = panel.active_span(pid)
+        if span is None or panel.days - span[0] < MIN_HISTORY_DAYS:
+            results[pid] = {'product_id': pid, 'status': 'skipped', 'reason': 'Insufficient data'}
+            continue
+        eligible.append((pid, span[0]))
+
+    if eligible:
+        Y = panel.matrix[[panel.index[pid] for pid, _ in eligible]]
+        starts = np.array([start for _, start in eligible])
+        profiles, levels = demand_profiles(Y, min(settings.FORECAST_CLUSTER_WINDOW, panel.days))
+        k = -(-len(eligible) // max(1, settings.FORECAST_CLUSTER_SIZE))
+        labels, _ = kmeans(profiles, k)
+
+        for cluster in range(labels.max() + 1):
+            members = np.flatnonzero(labels == cluster)
+            start = int(starts[members].min())
+            df = _cluster_frame(panel, Y[members, start:].sum(axis=0), start)
+            model = model_type
+            if model == 'auto':
+                model, _ = engine.select_best_model(frame_characteristics(df))
+            if model not in MODEL_LABELS:
+                model = FALLBACK_MODELS[0]
+
+            forecast, _ = engine._fit_predict(model, df, days)
+            backtest = engine._backtest(model, df)
+            total = levels[members].sum()
+            shares = levels[members] / total if total > 0 else np.full(len(members), 1.0 / len(members))
+
+            for i, share in zip(members.tolist(), shares.tolist()):
+                pid = eligible[i][0]
+                if not forecast:
+                    results[pid] = {'product_id': pid, 'status': 'error', 'error': f"{MODEL_LABELS[model]} fit failed"}
+                    continue
+                try:
+                    forecast_data = forecast.scaled(share)
+                    if backtest is not None:
+                        metrics = Backtest(backtest.origins, backtest.predicted * share).score(Y[i, start:])
+                    else:
+                        metrics = {'r2': 0, 'mae': 0, 'mape': 0}
+                    writer.add(pid, forecast_data, f"cluster_{model}", metrics, panel.days - int(starts[i]))
+                    results[pid] = {'product_id': pid, 'status': 'success', 'model': f"cluster_{model}", 'cluster': cluster}
+                except Exception as e:
+                    logger.error(f"Error forecasting for product {pid}: {str(e)}")
+                    results[pid] = {'product_id': pid, 'status': 'error', 'error': str(e)}
+
+        logger.info(f"Fitted {labels.max() + 1} cluster models for {len(eligible)} products")
+
+    ordered = [results[pid] for pid in product_ids]
+    for entry in ordered:
+        report(entry)
+    return ordered
+
+@shared_task
+def forecast_chunk_task(product_ids, days=30, model_type='auto', end_date=None, batch_id=None, chunk=0,
+                        clustered=False):
+    """
+    Forecast and persist one chunk of a batch; returns its per-product
+    entries. end_date pins the demand panel's last day so every chunk of a
+    batch shares one calendar. With batch_id, finished entries are
+    published as the batch's progress. clustered fits one model per
+    cluster of similar products of the chunk (see _batch_clustered).
+    """
+    engine = ForecastingEngine()
+    progress = ChunkProgress(BatchProgress(batch_id) if batch_id else None, chunk)
+
+    # Optimize: one query for the products and one streamed query for all
+    # sales history, instead of several round trips per product
+    products = Product.objects.in_bulk(product_ids)
+    end_date = date.fromisoformat(end_date) if end_date else None
+    panel = load_demand_panel(list(products), end_date=end_date)
+
+    # Optimize: forecasts are bulk-upserted in chunks across products
+    with ForecastWriter(invalidate_runs=True) as writer:
+        if clustered:
+            results = _batch_clustered(model_type, product_ids, products, panel, days, engine, writer, progress.add)
+        elif model_type in BATCH_FITTERS:
+            results = _batch_vectorized(model_type, product_ids, products, panel, days, engine, writer, progress.add)
+        else:
+            results = _batch_per_product(product_ids, days, model_type, products, panel, engine, writer, progress.add)
+
+    # One insert for the wall time and memory of every fit of the chunk
+    save_fit_stats()
+
+    # Published once more after the last rows were written
+    progress.finish()
     return results
+
+@shared_task
+def summarize_batch_task(chunk_results):
+    """Chord callback: per-product entries in request order plus totals"""
+    results = [entry for chunk in chunk_results for entry in chunk]
+    statuses = Counter(r['status'] for r in results)
+    return {
+        'summary': {
+            'total': len(results),
+            'success': statuses['success'],
+            'skipped': statuses['skipped'],
+            'failed': statuses['failed'],
+            'error': statuses['error'],
+            'chunks': len(chunk_results),
+            'models': dict(Counter(r['model'] for r in results if r['status'] == 'success')),
+        },
+        'results': results,
+    }
+
+@shared_task(bind=True)
+def batch_forecast_task(self, product_ids, days=30, model_type='auto', clustered=False):
+    """
+    Forecast many products. The ids are split into chunks of
+    FORECAST_BATCH_CHUNK_SIZE that run as a chord over all workers; the
+    summarizing callback takes over this task's id, so its result is the
+    aggregated {'summary', 'results'} either way. Progress is published
+    under the task id while the chunks run. With clustered, products of a
+    chunk with similar demand share one fitted model, so the number of
+    fits follows the number of clusters rather than of products.
+    """
+    size = max(1, settings.FORECAST_BATCH_CHUNK_SIZE)
+    chunks = [product_ids[i:i + size] for i in range(0, len(product_ids), size)]
+    last_sale = Sale.objects.filter(product_id__in=product_ids).aggregate(last=Max('sale_date'))['last']
+    end_date = last_sale.isoformat() if last_sale else None
+
+    batch_id = self.request.id
+    if batch_id:
+        BatchProgress(batch_id).start(len(product_ids), len(chunks))
+
+    if len(chunks) <= 1 or self.request.called_directly:
+        return summarize_batch_task([
+            forecast_chunk_task(c, days, model_type, end_date, batch_id, i, clustered) for i, c in enumerate(chunks)
+        ])
+
+    # Optimize: fan out so a large batch scales with the number of workers
+    return self.replace(chord(
+        [forecast_chunk_task.s(c, days, model_type, end_date, batch_id, i, clustered) for i, c in enumerate(chunks)],
+        summarize_batch_task.s()
+    ))
+
+# ABC classes and their lists in InventoryAnalytics.perform_abc_analysis
+ABC_CLASSES = (('A', 'a_items'), ('B', 'b_items'), ('C', 'c_items'))
+
+def due_for_refresh(classes, now):
+    """
+    {product_id: abc_class} of the products whose turn is this run.
+
+    A class's cadence is cut into slots of one run interval and every
+    product owns the slot of its id, so each run refreshes an even slice
+    of every class and each product comes up once per cadence.
+    """
+    interval = max(1, settings.FORECAST_REFRESH_INTERVAL_MINUTES)
+    run = int(now.timestamp()) // 60 // interval
+    due = {}
+    for abc_class, product_ids in classes.items():
+        slots = max(1, settings.FORECAST_REFRESH_CADENCE_HOURS[abc_class] * 60 // interval)
+        due.update((pid, abc_class) for pid in product_ids if pid % slots == run % slots)
+    return due
+
+@shared_task
+def scheduled_refresh_task():
+    """
+    Celery beat entry point: refresh the forecasts that are due by ABC
+    class, skipping products without new sales since their last refresh.
+    """
+    abc = InventoryAnalytics().perform_abc_analysis()
+    classes = {abc_class: [item['product_id'] for item in abc[key]] for abc_class, key in ABC_CLASSES}
+    due = due_for_refresh(classes, timezone.now())
+
+    # Optimize: one grouped query for the watermarks and one for the last
+    # refreshes, and only products whose history changed are forecast
+    watermarks = {pid: watermark_key(w) for pid, w in get_sales_watermarks(list(due)).items()}
+    last = dict(ForecastRefresh.objects.filter(product_id__in=list(due)).values_list('product_id', 'sales_watermark'))
+    stale = [pid for pid in due if last.get(pid) != watermarks[pid]]
+
+    logger.info(f"Scheduled refresh: {len(due)} products due, {len(stale)} with new sales")
+    if stale:
+        refreshed = [(pid, due[pid], watermarks[pid]) for pid in stale]
+        (batch_forecast_task.s(stale, settings.FORECAST_REFRESH_DAYS, 'auto')
+            | record_refresh_task.s(refreshed)).delay()
+    return {'due': len(due), 'stale': len(stale), 'classes': dict(Counter(due.values()))}
+
+@shared_task
+def record_refresh_task(batch_result, refreshed):
+    """
+    Chained after a scheduled batch: remember the watermark each product
+    was refreshed at. Products that errored are left due.
+    """
+    done = {r['product_id'] for r in batch_result['results'] if r['status'] in ('success', 'skipped')}
+    rows = [
+        ForecastRefresh(product_id=pid, abc_class=abc_class, sales_watermark=watermark)
+        for pid, abc_class, watermark in refreshed if pid in done
+    ]
+    ForecastRefresh.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['product'],
+        update_fields=['abc_class', 'sales_watermark', 'refreshed_at']
+    )
+    return len(rows)
+
+@shared_task
+def refresh_characteristics_task():
+    """Fill the ProductCharacteristics table for the whole catalog"""
+    written = refresh_all_characteristics()
+    logger.info(f"Computed series characteristics of {written} products")
+    return written
+
+@shared_task
+def score_forecasts_task():
+    """Score stored forecasts of newly closed days against actual sales"""
+    return score_closed_days()
@@ -0,0 +1,95 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+import logging
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Measurements kept per process until they are saved
+MAX_BUFFERED = 10000
+
+
+def peak_rss_mb():
+    """High-water mark of this process's resident memory"""
+    if resource is None:
+        return 0.0
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def current_rss_mb():
+    """Resident memory of this process now (the peak where /proc is missing)"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+class FitMeter:
+    """
+    Wall time and memory of model fits, buffered in the process that ran
+    them. Pool workers hand their buffer back with each result (see
+    executors), so the process that saves them sees every fit.
+    """
+
+    def __init__(self):
+        self._records = deque(maxlen=MAX_BUFFERED)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, product_id, model_type, n_obs):
+        peak_before = peak_rss_mb()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            peak = peak_rss_mb()
+            self.extend([{
+                'product_id': product_id,
+                'model_type': model_type,
+                'n_obs': n_obs,
+                'wall_seconds': time.perf_counter() - start,
+                'peak_rss_mb': peak,
+                # How far this fit raised the process's high-water mark
+                'peak_growth_mb': max(0.0, peak - peak_before),
+                'rss_mb': current_rss_mb(),
+                'pid': os.getpid(),
+            }])
+
+    def extend(self, records):
+        with self._lock:
+            self._records.extend(records)
+
+    def drain(self):
+        with self._lock:
+            records = list(self._records)
+            self._records.clear()
+        return records
+
+
+fit_meter = FitMeter()
+
+
+def save_fit_stats():
+    """Write the buffered fit measurements to FitStat; returns how many"""
+    from django.conf import settings
+    records = fit_meter.drain()
+    if not records or not settings.FORECAST_FIT_STATS:
+        return 0
+    from .models import FitStat
+    try:
+        FitStat.objects.bulk_create([FitStat(**r) for r in records])
+    except Exception as e:
+        # Telemetry must never fail the forecasts it describes
+        logger.warning(f"Could not save {len(records)} fit stats: {str(e)}")
+        return 0
+    return len(records)
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import AdvancedForecastAPI, BatchForecastAPI, BatchStatusAPI
+from .views import AdvancedForecastAPI, BatchForecastAPI, BatchStatusAPI, BatchEventsView, SeriesCacheStatsAPI
 from .api import ForecastAPI # Keeping original if needed, or ignoring
 
 urlpatterns = [
@@ -7,4 +7,6 @@ urlpatterns = [
     path('advanced-predict/', AdvancedForecastAPI.as_view(), name='advanced_predict'),
     path('batch-predict/', BatchForecastAPI.as_view(), name='batch_predict'),
     path('batch-status/<str:task_id>/', BatchStatusAPI.as_view(), name='batch_status'),
+    path('batch-events/<str:task_id>/', BatchEventsView.as_view(), name='batch_events'),
+    path('series-cache/', SeriesCacheStatsAPI.as_view(), name='series_cache_stats'),
 ]
@@ -4,22 +4,81 @@ from rest_framework import status
 from django.shortcuts import get_object_or_404
 from inventory.models import Product
 from .forecasting_engine import ForecastingEngine
-from .models import ForecastResult, ModelAccuracy
+from .models import ForecastResult, ModelAccuracy, ForecastRun
+from .writer import ForecastWriter
+from .result import ForecastSeries
+from .telemetry import save_fit_stats
 from .tasks import batch_forecast_task
+from .series_cache import series_cache, get_sales_watermark, watermark_key
+from .progress import BatchProgress, progress_stats
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.views import View
 from celery.result import AsyncResult
+import json
+import time
+
+def forecast_body(forecast, columnar):
+    """A ForecastSeries as per-day dicts, or as its compact columns"""
+    return forecast.columns() if columnar else forecast.records()
 
 class AdvancedForecastAPI(APIView):
+    def stored_forecast(self, product, model_type, days, watermark, columnar=False):
+        """
+        Response built from the last stored run if it was computed from the
+        same sales history with the same model request and covers `days`,
+        else None.
+        """
+        run = ForecastRun.objects.filter(product=product).first()
+        if run is None or run.sales_watermark != watermark or \
+                run.requested_model != model_type or run.horizon < days:
+            return None
+
+        rows = list(ForecastResult.objects.filter(
+            product=product, forecast_date__gte=run.first_date
+        ).order_by('forecast_date').values_list(
+            'forecast_date', 'predicted_value', 'confidence_lower', 'confidence_upper'
+        )[:days])
+        accuracy = ModelAccuracy.objects.filter(product=product, model_name=run.model_used).first()
+        if len(rows) < days or accuracy is None:
+            return None
+        forecast = ForecastSeries(*zip(*rows))
+
+        return {
+            "product_id": product.id,
+            "product_name": product.name,
+            "model_used": run.model_used,
+            "reason": run.reason,
+            "timed_out": run.timed_out,
+            "forecast": forecast_body(forecast, columnar),
+            "metrics": {'r2': accuracy.r2_score, 'mae': accuracy.mae, 'mape': accuracy.mape},
+            "data_characteristics": run.characteristics,
+            "cached": True
+        }
+
     def post(self, request):
         product_id = request.data.get('product_id')
         days = int(request.data.get('days', 30))
         model_type = request.data.get('model', 'auto')
+        refresh = request.query_params.get('refresh', '').lower() in ('1', 'true', 'yes')
+        columnar = request.query_params.get('columnar', '').lower() in ('1', 'true', 'yes')
         
         product = get_object_or_404(Product, pk=product_id)
+
+        # Optimize: unchanged sales history -> serve the stored forecast. The
+        # watermark is read once and reused by every step below
+        sales = get_sales_watermark(product.id)
+        watermark = watermark_key(sales)
+        if not refresh:
+            stored = self.stored_forecast(product, model_type, days, watermark, columnar)
+            if stored is not None:
+                return Response(stored)
         
         engine = ForecastingEngine()
         
         # Analyze data first
-        characteristics = engine.analyze_product_data(product_id)
+        characteristics = engine.analyze_product_data(product_id, watermark=sales)
         if not characteristics:
             return Response(
                 {"error": "Insufficient data to generate forecast (min 14 days required)"}, 
@@ -28,71 +87,158 @@ class AdvancedForecastAPI(APIView):
 
         # Generate forecast
         try:
-            result = engine.generate_forecast(product_id, days, model_type)
+            result = engine.generate_forecast(product_id, days, model_type, watermark=sales)
         except Exception as e:
             return Response(
                 {"error": f"Forecast generation failed: {str(e)}"}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+        finally:
+            save_fit_stats()
         
-        # Save Results
+        # Save Results and Metrics (bulk upsert)
         forecast_data = result['forecast']
-        for item in forecast_data:
-            ForecastResult.objects.update_or_create(
+        metrics = result['metrics']
+        with ForecastWriter() as writer:
+            writer.add(product.id, forecast_data, result['model_used'], metrics, characteristics.get('days_count', 0))
+
+        if forecast_data:
+            ForecastRun.objects.update_or_create(
                 product=product,
-                forecast_date=item['date'],
                 defaults={
-                    'predicted_value': item['value'],
-                    'confidence_lower': item['lower'],
-                    'confidence_upper': item['upper'],
-                    'model_used': result['model_used']
+                    'requested_model': model_type,
+                    'model_used': result['model_used'],
+                    'reason': result['reason'][:255],
+                    'first_date': forecast_data[0]['date'],
+                    'horizon': len(forecast_data),
+                    'sales_watermark': watermark,
+                    'characteristics': characteristics,
+                    'timed_out': result['timed_out']
                 }
             )
-            
-        # Save Metrics
-        metrics = result['metrics']
-        ModelAccuracy.objects.update_or_create(
-            product=product,
-            model_name=result['model_used'],
-            defaults={
-                'r2_score': metrics['r2'],
-                'mae': metrics['mae'],
-                'mape': metrics['mape'],
-                'sample_size': characteristics.get('days_count', 0)
-            }
-        )
 
         return Response({
             "product_id": product.id,
             "product_name": product.name,
             "model_used": result['model_used'],
             "reason": result['reason'],
-            "forecast": forecast_data,
+            "timed_out": result['timed_out'],
+            "forecast": forecast_body(forecast_data, columnar),
             "metrics": metrics,
-            "data_characteristics": characteristics
+            "data_characteristics": characteristics,
+            "cached": False
         })
 
 class BatchForecastAPI(APIView):
     def post(self, request):
         product_ids = request.data.get('product_ids', [])
         days = int(request.data.get('days', 30))
+        model_type = request.data.get('model', 'auto')
+        clustered = bool(request.data.get('clustered', False))
         
         if not product_ids:
             return Response({"error": "No product_ids provided"}, status=status.HTTP_400_BAD_REQUEST)
             
         # Trigger Celery Task
-        task = batch_forecast_task.delay(product_ids, days)
+        task = batch_forecast_task.delay(product_ids, days, model_type, clustered)
         
         return Response({
             "message": "Batch forecast started",
             "task_id": task.id
         })
 
+def batch_status(task_id):
+    """
+    Celery state of a batch with its live progress. Until the aggregated
+    result is in, `result` carries the entries finished so far.
+    """
+    task_result = AsyncResult(task_id)
+    snapshot = BatchProgress(task_id).snapshot()
+    partial = snapshot.pop('results') if snapshot else []
+    state = task_result.status
+    if task_result.successful():
+        result = task_result.result
+    elif task_result.failed():
+        result = {"summary": None, "results": partial, "error": str(task_result.result)}
+    else:
+        result = {"summary": None, "results": partial}
+        # A fanned-out batch stays PENDING in Celery until its chord completes
+        if state == 'PENDING' and snapshot is not None:
+            state = 'PROGRESS'
+    return {
+        "task_id": task_id,
+        "status": state,
+        "ready": task_result.ready(),
+        "progress": snapshot,
+        "result": result
+    }
+
 class BatchStatusAPI(APIView):
     def get(self, request, task_id):
+        return Response(batch_status(task_id))
+
+class BatchEventsView(View):
+    """
+    Server-Sent Events stream of a batch: a `progress` event carrying the
+    entries finished since the previous one, then a `done` event with the
+    batch status. Streams end after FORECAST_PROGRESS_STREAM_TIMEOUT
+    seconds, well inside the gunicorn worker timeout, and EventSource
+    reconnects; the Last-Event-ID it sends back resumes the stream after
+    the entries already delivered.
+    """
+
+    def get(self, request, task_id):
+        sent = parse_event_id(request.headers.get('Last-Event-ID'))
+        response = StreamingHttpResponse(self.events(task_id, sent), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def events(self, task_id, sent=None):
         task_result = AsyncResult(task_id)
-        return Response({
-            "task_id": task_id,
-            "status": task_result.status,
-            "result": task_result.result
-        })
+        progress = BatchProgress(task_id)
+        deadline = time.monotonic() + settings.FORECAST_PROGRESS_STREAM_TIMEOUT
+
+        while True:
+            # Ask first, so no entry published before the end is missed
+            ready = task_result.ready()
+            meta, chunks = progress.read()
+            if meta is not None:
+                if sent is None or len(sent) != len(chunks):
+                    sent = [0] * len(chunks)
+                new = [entry for i, entries in enumerate(chunks) for entry in entries[sent[i]:]]
+                sent = [len(entries) for entries in chunks]
+                if new:
+                    finished = [entry for entries in chunks for entry in entries]
+                    yield sse_event(
+                        'progress', dict(progress_stats(meta, finished), results=new),
+                        event_id='.'.join(map(str, sent))
+                    )
+
+            if ready:
+                yield sse_event('done', batch_status(task_id))
+                return
+            if time.monotonic() >= deadline:
+                return
+            # Comment line; keeps proxies from timing out an idle stream
+            yield ': keepalive\n\n'
+            time.sleep(settings.FORECAST_PROGRESS_STREAM_INTERVAL)
+
+def parse_event_id(value):
+    """Entries already delivered per chunk, from a progress event id"""
+    try:
+        return [int(n) for n in value.split('.')] if value else None
+    except ValueError:
+        return None
+
+def sse_event(event, data, event_id=None):
+    message = f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n"
+    if event_id is not None:
+        message += f"id: {event_id}\n"
+    return message + "\n"
+
+class SeriesCacheStatsAPI(APIView):
+    """Hit/miss counters of this worker's sales series cache."""
+
+    def get(self, request):
+        return Response(series_cache.stats())
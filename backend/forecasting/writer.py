@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.db import transaction
+from .models import ForecastResult, ModelAccuracy, ForecastRun
+import logging
+
+logger = logging.getLogger(__name__)
+
+# A new prediction for a day also clears the score of the one it replaces;
+# the scoring job picks the day up again if it has already closed
+RESULT_FIELDS = [
+    'predicted_value', 'confidence_lower', 'confidence_upper', 'model_used',
+    'actual_value', 'abs_error', 'accuracy_score',
+]
+ACCURACY_FIELDS = ['r2_score', 'mae', 'mape', 'sample_size', 'last_updated']
+
+
+class ForecastWriter:
+    """
+    Buffered, conflict-aware bulk upserts of forecasts and their metrics.
+
+    Rows of many products are collected and written with INSERT .. ON
+    CONFLICT DO UPDATE on (product, forecast_date) and (product,
+    model_name), one transaction per chunk of about chunk_size forecast
+    rows. A product's rows never straddle two chunks. With
+    invalidate_runs the AdvancedForecastAPI runs of written products are
+    dropped in the same transaction, since their rows were replaced.
+    """
+
+    def __init__(self, chunk_size=None, invalidate_runs=False):
+        self.chunk_size = chunk_size or settings.FORECAST_WRITE_CHUNK_ROWS
+        self.invalidate_runs = invalidate_runs
+        self.rows_written = 0
+        self._results = {}
+        self._accuracy = {}
+
+    def add(self, product_id, forecast, model_used, metrics, sample_size):
+        """Buffer a product's ForecastSeries and its accuracy metrics"""
+        # Optimize: whole columns converted to Python scalars at once
+        for d, value, lower, upper in zip(
+            forecast.dates.tolist(), forecast.value.tolist(), forecast.lower.tolist(), forecast.upper.tolist()
+        ):
+            self._results[(product_id, d)] = ForecastResult(
+                product_id=product_id,
+                forecast_date=d,
+                predicted_value=value,
+                confidence_lower=lower,
+                confidence_upper=upper,
+                model_used=model_used
+            )
+        self._accuracy[(product_id, model_used)] = ModelAccuracy(
+            product_id=product_id,
+            model_name=model_used,
+            r2_score=metrics['r2'],
+            mae=metrics['mae'],
+            mape=metrics['mape'],
+            sample_size=sample_size
+        )
+        if len(self._results) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self._results and not self._accuracy:
+            return
+        results, accuracy = list(self._results.values()), list(self._accuracy.values())
+        self._results, self._accuracy = {}, {}
+
+        with transaction.atomic():
+            ForecastResult.objects.bulk_create(
+                results,
+                update_conflicts=True,
+                unique_fields=['product', 'forecast_date'],
+                update_fields=RESULT_FIELDS
+            )
+            ModelAccuracy.objects.bulk_create(
+                accuracy,
+                update_conflicts=True,
+                unique_fields=['product', 'model_name'],
+                update_fields=ACCURACY_FIELDS
+            )
+            if self.invalidate_runs:
+                ForecastRun.objects.filter(product_id__in={a.product_id for a in accuracy}).delete()
+
+        self.rows_written += len(results)
+        logger.debug(f"Upserted {len(results)} forecast rows for {len(accuracy)} products")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Keep what was buffered before an error too; rows are independent
+        self.flush()
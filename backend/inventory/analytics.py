@@ -3,8 +3,8 @@ from django.db.models import Sum, F, Avg, Case, When, Value, CharField, FloatFie
 from django.db.models.functions import Coalesce, TruncDate, PercentRank
 from django.utils import timezone
 from datetime import timedelta
-import pandas as pd
 import numpy as np
+from forecasting import stats
 from .models import Product, Sale
 
 class InventoryAnalytics:
@@ -185,44 +185,39 @@ class InventoryAnalytics:
                 "trend_slope": 0
             }
             
-        df = pd.DataFrame(list(daily_sales))
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.set_index('date')
-        
-        # Resample to daily, filling missing dates with 0
-        idx = pd.date_range(start=df.index.min(), end=df.index.max(), freq='D')
-        df = df.reindex(idx, fill_value=0)
-        df = df.reset_index().rename(columns={'index': 'date'})
-        
-        # Calculate 7-day Moving Average
-        df['ma_7'] = df['total'].rolling(window=7, min_periods=1).mean().fillna(0)
-        
-        # Trend Line using Linear Regression
-        from sklearn.linear_model import LinearRegression
-        x = np.arange(len(df)).reshape(-1, 1)
-        y = df['total'].values.astype(float)
-        reg = LinearRegression().fit(x, y)
-        slope = reg.coef_[0]
-        
+        # Dense daily arrays from the first to the last day with sales
+        first = daily_sales[0]['date']
+        n_days = (daily_sales[len(daily_sales) - 1]['date'] - first).days + 1
+        totals = np.zeros(n_days)
+        units = np.zeros(n_days, dtype=np.int64)
+        for row in daily_sales:
+            i = (row['date'] - first).days
+            totals[i] = float(row['total'] or 0)
+            units[i] = row['units'] or 0
+
+        # 7-day moving average and trend line (closed-form least squares)
+        moving_average = stats.rolling_mean(totals, 7)
+        slope, _ = stats.ols(totals)
+
         # Determine trend status
-        avg_sales = df['total'].mean()
+        avg_sales = totals.mean()
         relative_slope = slope / avg_sales if avg_sales > 0 else 0
-        
+
         if relative_slope > 0.02:
             trend_status = "increasing"
         elif relative_slope < -0.02:
             trend_status = "decreasing"
         else:
             trend_status = "stable"
-        
+
         return {
-            "dates": df['date'].dt.strftime('%Y-%m-%d').tolist(),
-            "daily_sales": df['total'].round(2).tolist(),
-            "daily_units": df['units'].fillna(0).astype(int).tolist(),
-            "moving_average": df['ma_7'].round(2).tolist(),
+            "dates": [(first + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(n_days)],
+            "daily_sales": np.round(totals, 2).tolist(),
+            "daily_units": units.tolist(),
+            "moving_average": np.round(moving_average, 2).tolist(),
             "trend": trend_status,
             "trend_slope": round(float(slope), 2),
-            "period_total": round(float(df['total'].sum()), 2),
+            "period_total": round(float(totals.sum()), 2),
             "period_avg": round(float(avg_sales), 2)
         }
 
@@ -0,0 +1,1133 @@
+import pytest
+import json
+import numpy as np
+from decimal import Decimal
+from datetime import date, timedelta
+from django.utils import timezone
+from inventory.models import Product, Sale
+from forecasting.forecasting_engine import ForecastingEngine
+from forecasting.panel import load_demand_panel
+from forecasting.series_cache import SeriesCache, series_cache
+from forecasting.arima_search import stepwise_order_search
+from forecasting.artifacts import ArtifactStore
+from forecasting.backtest import rolling_origins, actual_matrix, score
+from forecasting.holt_winters import fit_batch
+from forecasting.intermittent import intermittent_batch, seasonal_naive_batch
+from forecasting.models import ForecastResult, ModelAccuracy
+from forecasting.tasks import batch_forecast_task
+
+
+def make_product(sku, days=0, qty=lambda d: 5, start=None, stock=100000):
+    product = Product.objects.create(
+        name=f"Product {sku}",
+        sku=sku,
+        price=Decimal("10.00"),
+        current_stock=stock
+    )
+    start = start or timezone.now().date() - timedelta(days=days)
+    sales = []
+    for d in range(days):
+        q = qty(d)
+        if q > 0:
+            sales.append(Sale(
+                product=product,
+                quantity=q,
+                total_price=Decimal(q * 10),
+                sale_date=start + timedelta(days=d)
+            ))
+    Sale.objects.bulk_create(sales)
+    return product
+
+
+@pytest.mark.django_db
+class TestDemandPanel:
+    def test_panel_is_dense_and_zero_filled(self):
+        start = timezone.now().date() - timedelta(days=10)
+        a = make_product("PNL-A", days=10, qty=lambda d: 2 if d % 2 == 0 else 0, start=start)
+        b = make_product("PNL-B", days=5, qty=lambda d: 3, start=start + timedelta(days=5))
+        empty = make_product("PNL-C")
+
+        panel = load_demand_panel([a.id, b.id, empty.id])
+
+        assert panel.matrix.shape == (3, 10)
+        assert panel.start_date == start
+        assert list(panel.product_ids) == [a.id, b.id, empty.id]
+        np.testing.assert_array_equal(panel.row(a.id), [2, 0] * 5)
+        np.testing.assert_array_equal(panel.row(b.id), [0] * 5 + [3] * 5)
+        assert not panel.row(empty.id).any()
+
+    def test_streamed_chunks_build_the_same_panel(self, monkeypatch):
+        import forecasting.panel
+        a = make_product("PNL-E", days=9, qty=lambda d: d % 4)
+        b = make_product("PNL-F", days=4, qty=lambda d: 7)
+        whole = load_demand_panel()
+        monkeypatch.setattr(forecasting.panel, 'STREAM_CHUNK_SIZE', 2)
+
+        chunked = load_demand_panel()
+
+        assert list(chunked.product_ids) == [a.id, b.id]
+        np.testing.assert_array_equal(chunked.matrix, whole.matrix)
+
+    def test_frame_matches_per_product_shape(self):
+        start = timezone.now().date() - timedelta(days=20)
+        p = make_product("PNL-D", days=20, qty=lambda d: d % 3, start=start)
+
+        df = load_demand_panel().frame(p.id)
+
+        # Trimmed to first/last day with sales, gaps zero-filled
+        assert df['ds'].iloc[0].date() == start + timedelta(days=1)
+        assert df['ds'].iloc[-1].date() == start + timedelta(days=19)
+        assert len(df) == 19
+        assert df['y'].sum() == sum(d % 3 for d in range(20))
+
+    def test_engine_reads_rows_without_querying(self, django_assert_num_queries):
+        products = [make_product(f"PNL-E{i}", days=30, qty=lambda d: 1 + d % 7) for i in range(3)]
+        panel = load_demand_panel([p.id for p in products])
+        engine = ForecastingEngine()
+
+        with django_assert_num_queries(0):
+            for p in products:
+                chars = engine.analyze_product_data(p.id, panel)
+                assert chars['days_count'] == 30
+
+
+@pytest.mark.django_db
+class TestSeriesCache:
+    def test_repeat_reads_hit_and_new_sale_invalidates(self):
+        p = make_product("CACHE-A", days=20, qty=lambda d: 2)
+        cache = SeriesCache(maxsize=4)
+        engine = ForecastingEngine()
+        loads = []
+
+        def loader():
+            loads.append(1)
+            return engine._get_sales_df(p.id, load_demand_panel([p.id]))
+
+        first = cache.get_or_load(p.id, loader)
+        second = cache.get_or_load(p.id, loader)
+        assert len(loads) == 1
+        assert second.equals(first)
+
+        Sale.objects.create(product=p, quantity=7)
+        third = cache.get_or_load(p.id, loader)
+        assert len(loads) == 2
+        assert third['y'].iloc[-1] == 7
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 2
+
+    def test_lru_eviction_respects_bound(self):
+        cache = SeriesCache(maxsize=2)
+        for pid in (1, 2, 3):
+            cache.set(pid, (pid, None, 1), None)
+        assert cache.stats()['size'] == 2
+        assert cache.get(1, (1, None, 1)) == (None, False)
+        assert cache.get(3, (3, None, 1))[1]
+
+    def test_forecast_request_loads_history_once(self):
+        p = make_product("CACHE-B", days=40, qty=lambda d: 3 + d % 7)
+        engine = ForecastingEngine()
+
+        engine.analyze_product_data(p.id)
+        engine.generate_forecast(p.id, days=7, model_type='exponential')
+        engine.generate_forecast(p.id, days=7, model_type='exponential')
+
+        stats = series_cache.stats()
+        assert stats['misses'] == 1
+        assert stats['hits'] == 2
+
+
+class TestStepwiseArima:
+    def test_parallel_and_serial_search_agree(self, settings):
+        settings.FORECAST_ARIMA_MAX_P = 2
+        settings.FORECAST_ARIMA_MAX_Q = 2
+        rng = np.random.default_rng(7)
+        y = 20 + np.cumsum(rng.normal(0, 1, 120))
+
+        serial_order, serial_res = stepwise_order_search(y, max_workers=1)
+        parallel_order, parallel_res = stepwise_order_search(y, max_workers=2)
+
+        assert serial_order == parallel_order
+        assert serial_order[1] == 1
+        assert max(serial_order[0], serial_order[2]) <= 2
+        np.testing.assert_allclose(serial_res.aic, parallel_res.aic)
+        assert len(parallel_res.get_forecast(steps=5).predicted_mean) == 5
+
+
+@pytest.mark.django_db
+class TestConcurrentModels:
+    def make_df(self, n=60):
+        import pandas as pd
+        return pd.DataFrame({
+            'ds': pd.date_range('2025-01-01', periods=n),
+            'y': [5 + (d % 7) for d in range(n)]
+        })
+
+    @pytest.mark.parametrize('executor', ['thread', 'process'])
+    def test_ensemble_matches_serial(self, executor):
+        df = self.make_df()
+        serial = ForecastingEngine(executor='serial').forecast_ensemble(df, 7)
+        concurrent = ForecastingEngine(executor=executor).forecast_ensemble(df, 7)
+
+        assert [r['date'] for r in concurrent] == [r['date'] for r in serial]
+        np.testing.assert_allclose(
+            [r['value'] for r in concurrent], [r['value'] for r in serial], rtol=1e-6
+        )
+
+    def test_model_failure_is_isolated(self, monkeypatch):
+        def broken(self, df):
+            raise RuntimeError("boom")
+        monkeypatch.setattr(ForecastingEngine, '_fit_prophet', broken)
+
+        df = self.make_df()
+        result = ForecastingEngine(executor='thread').forecast_ensemble(df, 7)
+        expected = ForecastingEngine(executor='serial')._merge_forecasts([
+            ForecastingEngine.forecast_arima(ForecastingEngine(), df, 7),
+            ForecastingEngine.forecast_exponential_smoothing(ForecastingEngine(), df, 7),
+        ])
+
+        assert len(result) == 7
+        np.testing.assert_allclose([r['value'] for r in result], [r['value'] for r in expected])
+
+
+@pytest.mark.django_db
+class TestArtifactStore:
+    def forbid_fitting(self, monkeypatch):
+        def refit(self, df):
+            raise AssertionError("model was refitted")
+        for m in ('prophet', 'arima', 'exponential'):
+            monkeypatch.setattr(ForecastingEngine, f'_fit_{m}', refit)
+
+    def test_new_horizon_is_predict_only(self, monkeypatch):
+        p = make_product("ART-A", days=60, qty=lambda d: 5 + d % 7)
+        engine = ForecastingEngine(executor='serial')
+        first = engine.generate_forecast(p.id, days=7, model_type='ensemble')
+
+        self.forbid_fitting(monkeypatch)
+        second = engine.generate_forecast(p.id, days=14, model_type='ensemble')
+
+        assert len(second['forecast']) == 14
+        assert second['metrics'] == first['metrics']
+        np.testing.assert_allclose(
+            [r['value'] for r in second['forecast'][:7]],
+            [r['value'] for r in first['forecast']]
+        )
+
+    @pytest.mark.parametrize('model_type', ['arima', 'exponential'])
+    def test_few_new_days_roll_state_forward(self, monkeypatch, model_type):
+        start = timezone.now().date() - timedelta(days=62)
+        p = make_product("ART-B", days=60, qty=lambda d: 5 + d % 7, start=start)
+        engine = ForecastingEngine(executor='serial')
+        engine.generate_forecast(p.id, days=7, model_type=model_type)
+
+        for d in (60, 61):
+            Sale.objects.create(product=p, quantity=9, sale_date=start + timedelta(days=d))
+        self.forbid_fitting(monkeypatch)
+        result = engine.generate_forecast(p.id, days=7, model_type=model_type)
+
+        artifact = ArtifactStore().load(p.id, model_type)
+        assert result['forecast'][0]['date'] == start + timedelta(days=62)
+        assert (artifact.n_obs, artifact.fit_n_obs) == (62, 60)
+
+
+class TestVectorizedHoltWinters:
+    def test_batch_fit_recovers_weekly_pattern(self):
+        rng = np.random.default_rng(3)
+        t = np.arange(140)
+        pattern = np.array([4, 5, 6, 8, 12, 15, 6], dtype=float)
+        Y = np.vstack([pattern[t % 7] * scale + rng.normal(0, 0.3, len(t)) for scale in (1, 2, 3)])
+        Y[2, :30] = 0  # third series starts later
+
+        hw = fit_batch(Y, starts=[0, 0, 30])
+        value, lower, upper = hw.forecast(14)
+
+        assert value.shape == (3, 14)
+        expected = pattern[np.arange(140, 154) % 7]
+        for i, scale in enumerate((1, 2, 3)):
+            np.testing.assert_allclose(value[i], expected * scale, atol=1.5 * scale)
+        assert np.all(lower <= value) and np.all(value <= upper)
+
+    def test_extend_matches_refit_states(self):
+        rng = np.random.default_rng(4)
+        Y = 10 + rng.normal(0, 1, (2, 60))
+        hw = fit_batch(Y[:, :50])
+        rolled = hw.extend(Y[:, 50:])
+
+        assert rolled.n_obs == 60
+        np.testing.assert_array_equal(rolled.params, hw.params)
+        assert rolled.forecast(3)[0].shape == (2, 3)
+
+
+@pytest.mark.django_db
+class TestVectorizedBatchTask:
+    def test_batch_task_fits_whole_panel(self):
+        good = [make_product(f"HWV-{i}", days=60, qty=lambda d, i=i: 3 + i + d % 7) for i in range(3)]
+        short = make_product("HWV-S", days=5)
+
+        results = batch_forecast_task([p.id for p in good] + [short.id, 999999], days=7, model_type='hw_vectorized')['results']
+
+        assert [r['status'] for r in results] == ['success'] * 3 + ['skipped', 'failed']
+        assert ForecastResult.objects.filter(product=good[0], model_used='hw_vectorized').count() == 7
+        assert ModelAccuracy.objects.get(product=good[1], model_name='hw_vectorized').mae >= 0
+
+    def test_selectable_in_generate_forecast(self):
+        p = make_product("HWV-G", days=45, qty=lambda d: 5 + d % 7)
+        result = ForecastingEngine(executor='serial').generate_forecast(p.id, days=10, model_type='hw_vectorized')
+
+        assert result['model_used'] == 'hw_vectorized'
+        assert len(result['forecast']) == 10
+
+
+class TestFastTier:
+    def test_croston_family_rates(self):
+        # Demand of 6 every third day: a rate of 2 per day
+        Y = np.tile([6.0, 0.0, 0.0], (1, 40))
+        croston = intermittent_batch(Y, method='croston').forecast(5)[0]
+        sba = intermittent_batch(Y, method='sba').forecast(5)[0]
+        tsb = intermittent_batch(Y, method='tsb').forecast(5)[0]
+
+        np.testing.assert_allclose(croston, 2.0, rtol=0.05)
+        np.testing.assert_allclose(sba, 2.0 * 0.95, rtol=0.05)
+        np.testing.assert_allclose(tsb, 2.0, rtol=0.2)
+
+    def test_tsb_decays_after_demand_stops(self):
+        Y = np.concatenate([np.tile([4.0, 0.0], 30), np.zeros(40)])[None, :]
+        assert intermittent_batch(Y, method='tsb').forecast(1)[0][0, 0] < 0.1
+        assert intermittent_batch(Y, method='croston').forecast(1)[0][0, 0] > 1.0
+
+    def test_seasonal_naive_repeats_last_week(self):
+        Y = np.arange(21, dtype=float)[None, :]
+        value, lower, upper = seasonal_naive_batch(Y, starts=[3]).forecast(9)
+        np.testing.assert_array_equal(value[0], [14, 15, 16, 17, 18, 19, 20, 14, 15])
+        assert np.all(lower <= value) and np.all(value <= upper)
+
+    @pytest.mark.django_db
+    def test_sparse_products_are_routed_and_batched(self):
+        sparse = make_product("FAST-S", days=60, qty=lambda d: 3 if d % 4 == 0 else 0)
+        dead = make_product("FAST-D", days=60, qty=lambda d: 2 if d % 10 == 0 else 0)
+        engine = ForecastingEngine(executor='serial')
+        assert engine.select_best_model(engine.analyze_product_data(sparse.id))[0] == 'croston'
+        assert engine.select_best_model(engine.analyze_product_data(dead.id))[0] == 'tsb'
+
+        results = batch_forecast_task([dead.id, sparse.id], days=7)['results']
+
+        assert [(r['status'], r['model']) for r in results] == [('success', 'tsb'), ('success', 'croston')]
+        assert ForecastResult.objects.filter(product=sparse, model_used='croston').count() == 7
+
+
+class TestRollingBacktest:
+    def make_df(self, n=60):
+        import pandas as pd
+        return pd.DataFrame({
+            'ds': pd.date_range('2025-01-01', periods=n),
+            'y': [5.0 + (d % 7) + d * 0.05 for d in range(n)]
+        })
+
+    def test_origins_and_vectorized_scores(self):
+        from sklearn.metrics import mean_absolute_error, r2_score
+        origins, horizon = rolling_origins(50, 4)
+        assert list(origins) == [40, 43, 46, 49] and horizon == 10
+
+        y = np.arange(50, dtype=float)
+        actual = actual_matrix(y, origins, horizon)
+        predicted = actual + np.where(np.arange(horizon) % 2, 1.0, -1.0)
+        mask = ~np.isnan(actual)
+        metrics = score(actual, predicted)
+
+        assert mask.sum(axis=1).tolist() == [10, 7, 4, 1]
+        assert metrics['mae'] == pytest.approx(mean_absolute_error(actual[mask], predicted[mask]))
+        assert metrics['r2'] == pytest.approx(r2_score(actual[mask], predicted[mask]))
+
+    def test_fitted_once_and_rolled_forward(self, monkeypatch):
+        fits = []
+        original = ForecastingEngine._fit_arima
+        def counting(self, df):
+            fits.append(len(df))
+            return original(self, df)
+        monkeypatch.setattr(ForecastingEngine, '_fit_arima', counting)
+
+        bt = ForecastingEngine(executor='serial')._backtest('arima', self.make_df())
+
+        assert fits == [48]
+        assert len(bt.origins) == 6
+        assert not np.isnan(bt.predicted[:, 0]).any()
+
+    def test_cost_cap_skips_later_origins(self, settings):
+        settings.FORECAST_BACKTEST_MAX_SECONDS = 0
+        bt = ForecastingEngine(executor='serial')._backtest('exponential', self.make_df())
+
+        assert not np.isnan(bt.predicted[0]).any()
+        assert np.isnan(bt.predicted[1:]).all()
+        assert bt.score(self.make_df()['y'].values)['mae'] > 0
+
+    def test_prophet_is_scored_on_the_holdout_only(self):
+        bt = ForecastingEngine(executor='serial')._backtest('prophet', self.make_df())
+
+        assert len(bt.origins) == 6
+        assert not np.isnan(bt.predicted[0]).any()
+        assert np.isnan(bt.predicted[1:]).all()
+
+
+class TestLazyModelLoading:
+    def test_url_conf_does_not_import_model_libraries(self):
+        import subprocess, sys
+        from django.conf import settings
+        code = (
+            "import sys, config.wsgi\n"
+            "from django.urls import get_resolver\n"
+            "get_resolver().url_patterns\n"
+            "print([m for m in ('prophet', 'statsmodels', 'sklearn', 'pandas') if m in sys.modules])\n"
+        )
+        out = subprocess.run([sys.executable, '-c', code], cwd=settings.BASE_DIR,
+                             capture_output=True, text=True, check=True).stdout
+        assert out.strip().splitlines()[-1] == '[]'
+
+    def test_registry_imports_on_first_use(self):
+        from forecasting.registry import ModelRegistry
+        registry = ModelRegistry()
+        registry.register('json', dumps=('json', 'dumps'))
+
+        assert registry.loaded() == []
+        assert registry.get('json').dumps([1]) == '[1]'
+        assert registry.get('json') is registry.get('json')
+        assert registry.loaded() == ['json']
+
+
+@pytest.mark.django_db
+class TestStoredForecasts:
+    def post(self, client, product, days, query=''):
+        from django.urls import reverse
+        url = reverse('advanced_predict') + query
+        return client.post(url, {'product_id': product.id, 'days': days, 'model': 'exponential'}, format='json')
+
+    def test_unchanged_sales_are_served_from_stored_rows(self, monkeypatch):
+        from rest_framework.test import APIClient
+        client = APIClient()
+        p = make_product("RUN-A", days=40, qty=lambda d: 5 + d % 7)
+        first = self.post(client, p, 14)
+        assert first.status_code == 200 and first.data['cached'] is False
+
+        def refit(self, *args):
+            raise AssertionError("forecast was regenerated")
+        monkeypatch.setattr(ForecastingEngine, 'generate_forecast', refit)
+        second = self.post(client, p, 7)
+
+        assert second.data['cached'] is True
+        assert second.data['forecast'] == first.data['forecast'][:7]
+        assert second.data['metrics']['mae'] == pytest.approx(first.data['metrics']['mae'])
+        assert second.data['model_used'] == first.data['model_used']
+        assert second.data['timed_out'] == first.data['timed_out'] == []
+
+    def test_sales_watermark_is_read_once_per_request(self, monkeypatch):
+        from django.urls import reverse
+        from rest_framework.test import APIClient
+        from forecasting import characteristics, series_cache as cache_module, views
+        reads = []
+        original = cache_module.get_sales_watermark
+        def counting(product_id):
+            reads.append(product_id)
+            return original(product_id)
+        for module in (views, characteristics, cache_module):
+            monkeypatch.setattr(module, 'get_sales_watermark', counting)
+        p = make_product("RUN-W", days=40, qty=lambda d: 5 + d % 7)
+
+        response = APIClient().post(reverse('advanced_predict'), {'product_id': p.id, 'days': 7, 'model': 'auto'},
+                                    format='json')
+
+        assert response.status_code == 200 and response.data['cached'] is False
+        assert reads == [p.id]
+
+    def test_stored_timeout_fallback_stays_flagged(self, monkeypatch, settings):
+        import time
+        from rest_framework.test import APIClient
+        def stuck(self, df, init=None):
+            time.sleep(1.5)
+        monkeypatch.setattr(ForecastingEngine, '_fit_exponential', stuck)
+        settings.FORECAST_EXECUTOR, settings.FORECAST_TIME_BUDGET = 'thread', 0.5
+        client = APIClient()
+        p = make_product("RUN-T", days=40, qty=lambda d: 5 + d % 7)
+
+        first = self.post(client, p, 7)
+        second = self.post(client, p, 7)
+
+        assert (first.data['cached'], second.data['cached']) == (False, True)
+        assert first.data['timed_out'] == second.data['timed_out'] == ['exponential']
+
+    def test_new_sale_longer_horizon_or_refresh_recompute(self):
+        from rest_framework.test import APIClient
+        client = APIClient()
+        p = make_product("RUN-B", days=40, qty=lambda d: 5 + d % 7)
+        self.post(client, p, 7)
+
+        assert self.post(client, p, 14).data['cached'] is False
+        assert self.post(client, p, 14, '?refresh=true').data['cached'] is False
+        Sale.objects.create(product=p, quantity=3, sale_date=timezone.now().date())
+        assert self.post(client, p, 7).data['cached'] is False
+        assert self.post(client, p, 7).data['cached'] is True
+
+
+@pytest.mark.django_db
+class TestForecastWriter:
+    def forecast(self, start, days, value):
+        from forecasting.result import ForecastSeries
+        values = np.full(days, value)
+        return ForecastSeries.following(start - timedelta(days=1), values, values - 1, values + 1)
+
+    def test_upserts_in_few_queries(self, django_assert_max_num_queries):
+        from forecasting.writer import ForecastWriter
+        products = [make_product(f"WR-{i}") for i in range(5)]
+        start = timezone.now().date()
+        metrics = {'r2': 0.5, 'mae': 1.0, 'mape': 0.1}
+        with ForecastWriter() as writer:
+            for p in products:
+                writer.add(p.id, self.forecast(start, 30, 5.0), 'arima', metrics, 60)
+
+        # Second run overlaps the first by 20 days and replaces them
+        with django_assert_max_num_queries(6):
+            with ForecastWriter(invalidate_runs=True) as writer:
+                for p in products:
+                    writer.add(p.id, self.forecast(start + timedelta(days=10), 30, 8.0), 'arima', dict(metrics, mae=2.0), 70)
+
+        assert ForecastResult.objects.filter(product=products[0]).count() == 40
+        assert ForecastResult.objects.filter(product=products[0], predicted_value=8.0).count() == 30
+        accuracy = ModelAccuracy.objects.get(product=products[0], model_name='arima')
+        assert (accuracy.mae, accuracy.sample_size) == (2.0, 70)
+
+    def test_flushes_per_chunk_without_splitting_products(self):
+        from forecasting.writer import ForecastWriter
+        products = [make_product(f"WC-{i}") for i in range(3)]
+        start = timezone.now().date()
+        writer = ForecastWriter(chunk_size=25)
+        writer.add(products[0].id, self.forecast(start, 20, 1.0), 'tsb', {'r2': 0, 'mae': 0, 'mape': 0}, 20)
+        assert writer.rows_written == 0
+        writer.add(products[1].id, self.forecast(start, 20, 1.0), 'tsb', {'r2': 0, 'mae': 0, 'mape': 0}, 20)
+        assert writer.rows_written == 40
+        writer.add(products[2].id, self.forecast(start, 20, 1.0), 'tsb', {'r2': 0, 'mae': 0, 'mape': 0}, 20)
+        writer.flush()
+
+        assert writer.rows_written == 60
+        assert ModelAccuracy.objects.filter(model_name='tsb').count() == 3
+
+
+@pytest.mark.django_db
+class TestBatchFanOut:
+    def test_chunks_run_as_chord_with_summary(self, settings, celery_eager):
+        settings.FORECAST_BATCH_CHUNK_SIZE = 2
+        good = [make_product(f"FAN-{i}", days=40, qty=lambda d, i=i: 3 + i + d % 7) for i in range(3)]
+        short = make_product("FAN-S", days=5)
+        ids = [p.id for p in good] + [short.id, 999999]
+
+        out = batch_forecast_task.apply(args=[ids, 7, 'hw_vectorized']).get()
+
+        assert [r['product_id'] for r in out['results']] == ids
+        assert [r['status'] for r in out['results']] == ['success'] * 3 + ['skipped', 'failed']
+        assert out['summary'] == {
+            'total': 5, 'success': 3, 'skipped': 1, 'failed': 1, 'error': 0,
+            'chunks': 3, 'models': {'hw_vectorized': 3},
+        }
+        # Every chunk forecasts from the same last day
+        first_dates = {ForecastResult.objects.filter(product=p).order_by('forecast_date')[0].forecast_date for p in good}
+        assert len(first_dates) == 1
+
+    def test_api_round_trip_in_eager_mode(self, celery_eager):
+        from django.urls import reverse
+        from rest_framework.test import APIClient
+        client = APIClient()
+        p = make_product("FAN-API", days=40, qty=lambda d: 4 + d % 7)
+
+        started = client.post(reverse('batch_predict'), {'product_ids': [p.id], 'days': 7, 'model': 'tsb'}, format='json')
+        status = client.get(reverse('batch_status', args=[started.data['task_id']]))
+
+        assert status.data['status'] == 'SUCCESS'
+        assert status.data['result']['summary']['success'] == 1
+
+
+@pytest.mark.django_db
+class TestBatchProgress:
+    def test_status_returns_partial_results_while_running(self, celery_eager, locmem_cache):
+        from django.urls import reverse
+        from rest_framework.test import APIClient
+        from forecasting.progress import BatchProgress
+        progress = BatchProgress('job-1')
+        progress.start(total=4, chunks=2)
+        progress.publish(1, [{'product_id': 3, 'status': 'success', 'model': 'tsb'},
+                             {'product_id': 4, 'status': 'skipped', 'reason': 'Insufficient data'}])
+
+        data = APIClient().get(reverse('batch_status', args=['job-1'])).data
+
+        assert data['status'] == 'PROGRESS' and not data['ready']
+        assert data['progress']['done'] == 2 and data['progress']['total'] == 4
+        assert data['progress']['counts'] == {'success': 1, 'skipped': 1}
+        assert data['progress']['eta_seconds'] is not None
+        assert [r['product_id'] for r in data['result']['results']] == [3, 4]
+
+    def test_event_stream_sends_progress_then_done(self, settings, celery_eager, locmem_cache):
+        import json
+        from django.test import Client
+        from django.urls import reverse
+        settings.FORECAST_BATCH_CHUNK_SIZE = 1
+        ids = [make_product(f"SSE-{i}", days=40, qty=lambda d: 2 + d % 3).id for i in range(2)]
+        task_id = batch_forecast_task.apply(args=[ids, 7, 'tsb']).id
+
+        response = Client().get(reverse('batch_events', args=[task_id]))
+        body = b''.join(response.streaming_content).decode()
+        events = [(e.split('\n')[0][len('event: '):], json.loads(e.split('\n')[1][len('data: '):]))
+                  for e in body.split('\n\n') if e.startswith('event:')]
+
+        assert response['Content-Type'] == 'text/event-stream'
+        assert [name for name, _ in events] == ['progress', 'done']
+        assert events[0][1]['done'] == 2 and len(events[0][1]['results']) == 2
+        assert events[1][1]['status'] == 'SUCCESS'
+        assert events[1][1]['result']['summary']['success'] == 2
+
+    def test_reconnect_resumes_after_last_event_id(self, settings, celery_eager, locmem_cache):
+        from django.test import Client
+        from django.urls import reverse
+        from forecasting.progress import BatchProgress
+        settings.FORECAST_PROGRESS_STREAM_TIMEOUT = 0
+        progress = BatchProgress('job-2')
+        progress.start(total=3, chunks=2)
+        progress.publish(0, [{'product_id': 1, 'status': 'success'}])
+        progress.publish(1, [{'product_id': 2, 'status': 'success'}, {'product_id': 3, 'status': 'failed'}])
+
+        response = Client().get(reverse('batch_events', args=['job-2']), HTTP_LAST_EVENT_ID='1.1')
+        event = b''.join(response.streaming_content).decode().split('\n\n')[0].split('\n')
+
+        data = json.loads(event[1][len('data: '):])
+        assert [r['product_id'] for r in data['results']] == [3]
+        assert data['done'] == 3 and event[2] == 'id: 1.2'
+
+
+@pytest.mark.django_db
+class TestScheduledRefresh:
+    def test_each_product_is_due_once_per_cadence(self, settings):
+        from collections import Counter
+        from datetime import datetime, timezone as tz
+        from forecasting.tasks import due_for_refresh
+        settings.FORECAST_REFRESH_INTERVAL_MINUTES = 60
+        settings.FORECAST_REFRESH_CADENCE_HOURS = {'A': 24, 'B': 72, 'C': 168}
+        classes = {'A': list(range(1, 49)), 'B': list(range(49, 97)), 'C': list(range(97, 145))}
+        start = datetime(2024, 1, 1, tzinfo=tz.utc)
+
+        runs = [due_for_refresh(classes, start + timedelta(hours=h)) for h in range(168)]
+
+        counts = Counter(pid for due in runs for pid in due)
+        assert all(counts[pid] == 7 for pid in classes['A'])
+        assert all(counts[pid] in (2, 3) for pid in classes['B'])
+        assert all(counts[pid] == 1 for pid in classes['C'])
+        # A items are spread over the day instead of refreshed all at once
+        assert max(sum(1 for pid in due if pid <= 48) for due in runs) == 2
+
+    def test_skips_products_without_new_sales(self, settings, celery_eager):
+        from forecasting.models import ForecastRefresh
+        from forecasting.tasks import scheduled_refresh_task
+        settings.FORECAST_REFRESH_CADENCE_HOURS = {'A': 1, 'B': 1, 'C': 1}
+        settings.FORECAST_REFRESH_DAYS = 7
+        settings.FORECAST_BATCH_CHUNK_SIZE = 2
+        products = [make_product(f"REF-{i}", days=40, qty=lambda d, i=i: 2 + i if d % 3 == 0 else 0) for i in range(3)]
+
+        first = scheduled_refresh_task.apply().get()
+        assert first['stale'] == 3
+        assert ForecastRefresh.objects.count() == 3
+        assert ForecastResult.objects.filter(product=products[0]).count() == 7
+
+        assert scheduled_refresh_task.apply().get()['stale'] == 0
+
+        Sale.objects.create(product=products[1], quantity=2)
+        assert scheduled_refresh_task.apply().get()['stale'] == 1
+
+
+@pytest.mark.django_db
+class TestTimeBudget:
+    @pytest.mark.parametrize('kind', ['thread', 'process'])
+    def test_unfinished_calls_time_out(self, kind):
+        import time
+        from forecasting.executors import run_concurrently, TIMED_OUT
+        start = time.monotonic()
+        results = run_concurrently([(time.sleep, (30,)), (abs, (-3,))], kind, 2, deadline=start + 1)
+
+        assert results == [TIMED_OUT, 3]
+        assert time.monotonic() - start < 5
+
+    def test_serial_run_skips_calls_past_the_deadline(self):
+        import time
+        from forecasting.executors import run_concurrently, TIMED_OUT
+        results = run_concurrently([(time.sleep, (0.3,)), (abs, (-3,))], 'serial', deadline=time.monotonic() + 0.1)
+        assert results == [None, TIMED_OUT]
+
+    def test_slow_model_falls_back_to_cheaper_one(self, monkeypatch):
+        import time
+        def stuck(self, df):
+            time.sleep(3)
+        monkeypatch.setattr(ForecastingEngine, '_fit_prophet', stuck)
+        p = make_product("SLOW-1", days=60, qty=lambda d: 5 + d % 7)
+
+        start = time.monotonic()
+        result = ForecastingEngine(executor='thread').generate_forecast(p.id, 7, 'prophet', budget=0.5)
+
+        assert time.monotonic() - start < 2.5
+        assert result['model_used'] == 'hw_vectorized'
+        assert result['timed_out'] == ['prophet']
+        assert 'fell back to Vectorized Holt-Winters' in result['reason']
+        assert len(result['forecast']) == 7
+
+    def test_serial_run_serves_the_final_fit_before_backtesting(self, monkeypatch):
+        import time
+        original = ForecastingEngine._fit_exponential
+        fits = []
+        def slow(self, df, init=None):
+            fits.append(len(df))
+            time.sleep(0.6)
+            return original(self, df)
+        monkeypatch.setattr(ForecastingEngine, '_fit_exponential', slow)
+        p = make_product("SLOW-2", days=60, qty=lambda d: 5 + d % 7)
+
+        result = ForecastingEngine(executor='serial').generate_forecast(p.id, 7, 'exponential', budget=0.5)
+
+        # Only the final fit ran; the backtest was skipped instead of
+        # costing the served forecast
+        assert fits == [60]
+        assert (result['model_used'], result['timed_out']) == ('exponential', [])
+        assert len(result['forecast']) == 7
+
+    def test_overrun_replaces_the_shared_pool_and_resubmits_other_callers(self):
+        import threading
+        import time
+        from forecasting.executors import discard_process_pool, get_process_pool, run_concurrently, TIMED_OUT
+        discard_process_pool(3)
+        pool = get_process_pool(3)
+        other = {}
+        def long_running():
+            other['results'] = run_concurrently(
+                [(time.sleep, (1,)), (abs, (-2,))], 'process', 3, deadline=time.monotonic() + 20
+            )
+        thread = threading.Thread(target=long_running)
+        thread.start()
+        time.sleep(0.3)
+
+        assert run_concurrently([(time.sleep, (30,)), (abs, (-3,))], 'process', 3,
+                                deadline=time.monotonic() + 0.5) == [TIMED_OUT, 3]
+        assert get_process_pool(3) is not pool
+        thread.join()
+        # Its sleep was stopped with the old pool and ran again on the new one
+        assert other['results'] == [None, 2]
+
+    def test_budgeted_calls_reuse_the_shared_pool(self):
+        import time
+        from forecasting.executors import get_process_pool, run_concurrently
+        pool = get_process_pool(2)
+        assert run_concurrently([(abs, (-1,)), (abs, (-2,))], 'process', 2, deadline=time.monotonic() + 10) == [1, 2]
+        assert get_process_pool(2) is pool
+
+
+@pytest.mark.django_db
+class TestProphetFastPath:
+    def test_predicts_only_the_future_days(self):
+        import pandas as pd
+        df = pd.DataFrame({'ds': pd.date_range('2025-01-01', periods=60), 'y': [5 + d % 7 for d in range(60)]})
+        engine = ForecastingEngine(executor='serial')
+        m = engine._fit_prophet(df)
+
+        output = engine._predict_prophet(m, df, 7)
+        full = m.predict(m.make_future_dataframe(periods=7)).tail(7)
+
+        assert [r['date'] for r in output] == list(full['ds'].dt.date)
+        np.testing.assert_allclose([r['value'] for r in output], np.maximum(full['yhat'].values, 0))
+
+    def test_refit_warm_starts_from_stored_parameters(self, monkeypatch):
+        inits = []
+        original = ForecastingEngine._fit_prophet
+        def spy(self, df, init=None):
+            inits.append(init)
+            return original(self, df, init=init)
+        monkeypatch.setattr(ForecastingEngine, '_fit_prophet', spy)
+        p = make_product("WARM-1", days=60, qty=lambda d: 5 + d % 7)
+        engine = ForecastingEngine(executor='serial')
+
+        engine.generate_forecast(p.id, 7, 'prophet')
+        assert inits == [None, None]
+
+        Sale.objects.create(product=p, quantity=6)
+        series_cache.clear()
+        result = engine.generate_forecast(p.id, 7, 'prophet')
+
+        assert len(inits) == 4 and all(i is not None for i in inits[2:])
+        assert set(inits[2]) == {'k', 'm', 'sigma_obs', 'delta', 'beta'}
+        assert len(result['forecast']) == 7
+
+
+@pytest.mark.django_db
+class TestProductCharacteristics:
+    def test_vectorized_pass_matches_per_series_reference(self):
+        import pandas as pd
+        from sklearn.linear_model import LinearRegression
+        from forecasting.characteristics import compute_characteristics
+        rng = np.random.default_rng(3)
+        Y = rng.poisson(4, size=(5, 40)).astype(float)
+        first, last = np.array([0, 3, 10, 0, 20]), np.array([39, 30, 39, 25, 39])
+
+        chars = compute_characteristics(Y, first, last, weekday0=2)
+
+        ds = pd.date_range('2025-01-01', periods=40)  # a Wednesday
+        for i, c in enumerate(chars):
+            y, days = Y[i, first[i]:last[i] + 1], ds[first[i]:last[i] + 1]
+            slope = LinearRegression().fit(np.arange(len(y)).reshape(-1, 1), y).coef_[0]
+            weekday = pd.Series(y).groupby(days.dayofweek).mean()
+            assert c['days_count'] == len(y) and c['total_sales'] == int(y.sum())
+            assert c['cv'] == pytest.approx(y.std() / y.mean())
+            assert c['trend'] == pytest.approx(slope)
+            assert c['seasonality'] == pytest.approx(weekday.std(ddof=0) / weekday.mean())
+            assert c['zero_ratio'] == pytest.approx((y == 0).mean())
+
+    def test_stored_row_is_reused_until_a_new_sale(self, django_assert_num_queries):
+        from forecasting.characteristics import stored_characteristics
+        from forecasting.models import ProductCharacteristics
+        p = make_product("CHR-1", days=30, qty=lambda d: 3 + d % 5)
+
+        first = stored_characteristics([p.id])
+        assert ProductCharacteristics.objects.get(product=p).days_count == first[p.id]['days_count']
+
+        # One watermark query and one table read, no history load
+        with django_assert_num_queries(2):
+            assert stored_characteristics([p.id]) == first
+
+        Sale.objects.create(product=p, quantity=40)
+        assert stored_characteristics([p.id])[p.id]['total_sales'] == first[p.id]['total_sales'] + 40
+
+    def test_full_refresh_runs_in_blocks(self, monkeypatch):
+        import forecasting.characteristics as characteristics
+        from forecasting.models import ProductCharacteristics
+        products = [make_product(f"CHR-{i}", days=20, qty=lambda d: 1 + d % 3) for i in range(2, 7)]
+        make_product("CHR-EMPTY")
+        monkeypatch.setattr(characteristics, 'BLOCK_ROWS', 2)
+
+        assert characteristics.refresh_all_characteristics() == 5
+        assert set(ProductCharacteristics.objects.values_list('product_id', flat=True)) == {p.id for p in products}
+
+
+class TestStatsKernel:
+    def test_batched_kernels_match_sklearn_and_pandas(self):
+        import pandas as pd
+        from sklearn.linear_model import LinearRegression
+        from sklearn.metrics import r2_score, mean_absolute_error, mean_absolute_percentage_error
+        from forecasting import stats
+        rng = np.random.default_rng(7)
+        Y = rng.gamma(2.0, 3.0, size=(4, 30))
+        x = 739000 + np.arange(30)  # date ordinals
+
+        slope, intercept = stats.ols(Y, x=x)
+        for i, y in enumerate(Y):
+            reg = LinearRegression().fit(x.reshape(-1, 1), y)
+            assert slope[i] == pytest.approx(reg.coef_[0])
+            assert intercept[i] == pytest.approx(reg.intercept_)
+            np.testing.assert_allclose(stats.rolling_mean(Y, 7)[i], pd.Series(y).rolling(7, min_periods=1).mean())
+
+        metrics = stats.accuracy(Y[0], Y[1])
+        assert metrics['r2'] == pytest.approx(r2_score(Y[0], Y[1]))
+        assert metrics['mae'] == pytest.approx(mean_absolute_error(Y[0], Y[1]))
+        assert metrics['mape'] == pytest.approx(mean_absolute_percentage_error(Y[0], Y[1]))
+
+    @pytest.mark.django_db
+    def test_simple_forecasts_fit_the_trend_line(self):
+        from forecasting.engine import run_forecast
+        from forecasting.utils import predict_sales
+        p = make_product("OLS-1", days=10, qty=lambda d: 2 * d + 1)
+
+        # qty = 2 * d + 1 on the days before today, so 2 * 10 + 1 today and 23 tomorrow
+        assert predict_sales(p.id) == pytest.approx(23)
+        assert run_forecast(p.id) == 23
+
+
+@pytest.mark.django_db
+class TestClusteredBatch:
+    def test_kmeans_separates_demand_shapes(self):
+        from forecasting.clustering import demand_profiles, kmeans
+        weekly = np.tile([1, 1, 1, 1, 1, 4, 4], 8)
+        flat = np.ones(56)
+        Y = np.array([weekly * 2, weekly * 9, flat * 3, weekly * 5, flat * 7])
+
+        profiles, levels = demand_profiles(Y, 28)
+        labels, centroids = kmeans(profiles, 2)
+
+        assert labels.tolist() == [0, 0, 1, 0, 1]
+        assert len(centroids) == 2
+        np.testing.assert_allclose(levels, Y.mean(axis=1))
+
+    def test_one_fit_per_cluster_scaled_per_product(self, settings, monkeypatch):
+        from forecasting.models import ModelAccuracy
+        fits = []
+        original = ForecastingEngine._fit_exponential
+        def counting(self, df):
+            fits.append(len(df))
+            return original(self, df)
+        monkeypatch.setattr(ForecastingEngine, '_fit_exponential', counting)
+        settings.FORECAST_CLUSTER_SIZE = 3
+        weekly = lambda scale: (lambda d: scale * (4 if d % 7 in (5, 6) else 1))
+        products = [make_product(f"CLU-{i}", days=56, qty=weekly(i + 1)) for i in range(6)]
+
+        result = batch_forecast_task.apply(
+            args=[[p.id for p in products], 7, 'exponential'], kwargs={'clustered': True}
+        ).get()
+
+        assert result['summary']['success'] == 6
+        assert result['summary']['models'] == {'cluster_exponential': 6}
+        clusters = {r['cluster'] for r in result['results']}
+        assert len(fits) == 2 * len(clusters)  # one fit and one backtest fit per cluster
+        small, big = (ForecastResult.objects.filter(product=products[i]).order_by('forecast_date')[0] for i in (0, 5))
+        assert big.predicted_value == pytest.approx(6 * small.predicted_value, rel=0.05)
+        assert ModelAccuracy.objects.filter(model_name='cluster_exponential').count() == 6
+
+
+@pytest.mark.django_db
+class TestColumnarForecasts:
+    def test_mean_aligns_dates_and_skips_empty_forecasts(self):
+        from datetime import date
+        from forecasting.result import ForecastSeries
+        a = ForecastSeries.following(date(2025, 1, 1), [1.0, 2.0, 3.0], [0.0, 1.0, 2.0], [2.0, 3.0, 4.0])
+        b = ForecastSeries.following(date(2025, 1, 2), [5.0, 6.0], [4.0, 5.0], [6.0, 7.0])
+
+        merged = ForecastSeries.mean([a, ForecastSeries.empty(), b])
+
+        assert merged[0] == {'date': date(2025, 1, 2), 'value': 1.0, 'lower': 0.0, 'upper': 2.0}
+        assert [r['value'] for r in merged] == [1.0, 3.5, 4.5]
+        assert merged.columns() == {
+            'start': date(2025, 1, 2), 'value': [1.0, 3.5, 4.5], 'lower': [0.0, 2.5, 3.5], 'upper': [2.0, 4.5, 5.5]
+        }
+
+    def test_api_returns_columns_on_request(self):
+        from django.urls import reverse
+        from rest_framework.test import APIClient
+        client = APIClient()
+        p = make_product("COL-A", days=40, qty=lambda d: 5 + d % 7)
+        body = {'product_id': p.id, 'days': 14, 'model': 'exponential'}
+        url = reverse('advanced_predict')
+
+        rows = client.post(url, body, format='json').data['forecast']
+        fresh = client.post(url + '?columnar=true&refresh=true', body, format='json').data['forecast']
+        stored = client.post(url + '?columnar=true', body, format='json').data['forecast']
+
+        assert fresh['start'] == rows[0]['date']
+        np.testing.assert_allclose(fresh['value'], [r['value'] for r in rows])
+        assert stored == fresh
+
+
+@pytest.mark.django_db
+class TestFitTelemetry:
+    def test_fits_record_time_and_memory_per_product(self):
+        from forecasting.models import FitStat
+        from forecasting.telemetry import fit_meter, save_fit_stats
+        p = make_product("FIT-1", days=60, qty=lambda d: 5 + d % 7)
+        fit_meter.drain()
+
+        ForecastingEngine(executor='process').generate_forecast(p.id, 7, 'exponential')
+        assert save_fit_stats() == 2
+
+        stats = list(FitStat.objects.filter(product=p))
+        # The backtest fit on the first 80% and the final fit on all days
+        assert sorted(s.n_obs for s in stats) == [48, 60]
+        assert all(s.model_type == 'exponential' and s.wall_seconds > 0 and s.peak_rss_mb > 0 for s in stats)
+
+    def test_process_pool_is_recycled_after_its_task_limit(self, settings):
+        from forecasting.executors import get_process_pool, discard_process_pool, run_concurrently
+        settings.FORECAST_WORKER_MAX_TASKS = 2
+        discard_process_pool(2)
+        pool = get_process_pool(2)
+
+        assert run_concurrently([(abs, (-1,)), (abs, (-2,))], 'process', 2) == [1, 2]
+        assert get_process_pool(2) is pool
+        assert run_concurrently([(abs, (-3,)), (abs, (-4,))], 'process', 2) == [3, 4]
+        assert get_process_pool(2) is not pool
+
+    def test_forecasting_worker_gets_child_limits(self, settings):
+        from celery import Celery
+        from config.celery import limit_forecasting_children
+        settings.FORECAST_WORKER_MAX_TASKS, settings.FORECAST_WORKER_MAX_RSS_MB = 10, 512
+        settings.FORECAST_QUEUE = 'forecasting'
+        general, forecasting = Celery().conf, Celery().conf
+
+        limit_forecasting_children(conf=general, options={'queues': ['celery']})
+        limit_forecasting_children(conf=forecasting, options={'queues': 'forecasting'})
+
+        assert general.worker_max_tasks_per_child is None
+        assert (forecasting.worker_max_tasks_per_child, forecasting.worker_max_memory_per_child) == (10, 512 * 1024)
+
+
+@pytest.mark.django_db
+class TestIncrementalScoring:
+    def test_closed_days_are_scored_once_and_roll_into_live_metrics(self):
+        from forecasting.result import ForecastSeries
+        from forecasting.scoring import score_closed_days
+        from forecasting.writer import ForecastWriter
+        today = timezone.now().date()
+        p = make_product("SCO-1")
+        predicted = np.array([4.0, 4.0, 4.0, 4.0, 4.0, 4.0])
+        with ForecastWriter() as writer:
+            writer.add(p.id, ForecastSeries.following(today - timedelta(days=4), predicted, predicted - 1, predicted + 1),
+                       'arima', {'r2': 0.5, 'mae': 9.0, 'mape': 0.9}, 60)
+        # Sold 2, nothing, 5 on the three closed days; today is still open
+        for ago, qty in ((3, 2), (1, 5), (0, 7)):
+            Sale.objects.create(product=p, quantity=qty, sale_date=today - timedelta(days=ago))
+
+        assert score_closed_days(today)['rows'] == 3
+        rows = ForecastResult.objects.filter(product=p, actual_value__isnull=False).order_by('forecast_date')
+        assert [(r.actual_value, r.abs_error) for r in rows] == [(2, 2), (0, 4), (5, 1)]
+        assert [r.accuracy_score for r in rows] == pytest.approx([0.5, 0.0, 0.8])
+        accuracy = ModelAccuracy.objects.get(product=p, model_name='arima')
+        assert (accuracy.live_mae, accuracy.live_days, accuracy.mae) == (pytest.approx(7 / 3), 3, 9.0)
+        assert accuracy.live_mape == pytest.approx((2 / 2 + 1 / 5) / 2)
+
+        assert score_closed_days(today)['rows'] == 0
+        assert score_closed_days(today + timedelta(days=1))['rows'] == 1
+        assert ModelAccuracy.objects.get(pk=accuracy.pk).live_days == 4
+
+    def test_rows_older_than_scored_ones_are_still_scored(self):
+        from forecasting.result import ForecastSeries
+        from forecasting.scoring import score_closed_days
+        from forecasting.writer import ForecastWriter
+        today = timezone.now().date()
+        recent, stale = make_product("SCO-2"), make_product("SCO-3")
+        ones = np.ones(3)
+        with ForecastWriter() as writer:
+            writer.add(recent.id, ForecastSeries.following(today - timedelta(days=3), ones, ones, ones),
+                       'arima', {'r2': 0.5, 'mae': 1.0, 'mape': 0.1}, 60)
+        assert score_closed_days(today)['rows'] == 2
+
+        # A product whose last sale is older writes rows before those already scored
+        with ForecastWriter() as writer:
+            writer.add(stale.id, ForecastSeries.following(today - timedelta(days=10), ones, ones, ones),
+                       'arima', {'r2': 0.5, 'mae': 1.0, 'mape': 0.1}, 60)
+            writer.add(recent.id, ForecastSeries.following(today - timedelta(days=3), ones * 2, ones, ones * 3),
+                       'arima', {'r2': 0.5, 'mae': 1.0, 'mape': 0.1}, 60)
+        result = score_closed_days(today)
+
+        # The stale product's three days plus recent's two re-forecast ones
+        assert result['rows'] == 5 and result['first_day'] == (today - timedelta(days=9)).isoformat()
+        # Re-forecast days are scored against the new prediction, not kept
+        rows = ForecastResult.objects.filter(product=recent, forecast_date__lt=today)
+        assert [(r.actual_value, r.abs_error) for r in rows] == [(0, 2), (0, 2)]
+
+    def test_late_sale_rescores_its_day(self):
+        from forecasting.result import ForecastSeries
+        from forecasting.scoring import score_closed_days
+        from forecasting.writer import ForecastWriter
+        today = timezone.now().date()
+        p = make_product("SCO-4")
+        fours = np.full(3, 4.0)
+        with ForecastWriter() as writer:
+            writer.add(p.id, ForecastSeries.following(today - timedelta(days=3), fours, fours, fours),
+                       'arima', {'r2': 0.5, 'mae': 1.0, 'mape': 0.1}, 60)
+        Sale.objects.create(product=p, quantity=3, sale_date=today - timedelta(days=1))
+        assert score_closed_days(today)['rows'] == 2
+
+        # Back-dated sale on a day already scored as selling nothing
+        Sale.objects.create(product=p, quantity=4, sale_date=today - timedelta(days=2))
+        result = score_closed_days(today)
+
+        assert (result['rows'], result['first_day']) == (1, (today - timedelta(days=2)).isoformat())
+        row = ForecastResult.objects.get(product=p, forecast_date=today - timedelta(days=2))
+        assert (row.actual_value, row.abs_error, row.accuracy_score) == (4, 0, 1.0)
+        assert ModelAccuracy.objects.get(product=p, model_name='arima').live_mae == pytest.approx(0.5)
+        assert score_closed_days(today)['rows'] == 0
+
+
+class TestSyntheticDemand:
+    def test_seeded_catalog_is_reproducible(self):
+        from datetime import date
+        from forecasting.synthetic import SyntheticCatalog
+        a = SyntheticCatalog(50, seed=4).demand(date(2025, 1, 1), 90)
+        b = SyntheticCatalog(50, seed=4).demand(date(2025, 1, 1), 90)
+        catalog = SyntheticCatalog(50, seed=5)
+        c = catalog.demand(date(2025, 1, 1), 90)
+
+        np.testing.assert_array_equal(a, b)
+        assert not np.array_equal(a, c)
+        # Slow movers sell on a few days only; the rest almost every day
+        assert ((c[catalog.slow] > 0).mean() < 0.1) and ((c[~catalog.slow & (catalog.base > 1)] > 0).mean() > 0.9)
+
+
+@pytest.mark.django_db
+class TestForecastBenchmark:
+    def test_writes_comparable_json_and_leaves_no_rows(self, tmp_path):
+        import io, json
+        from django.core.management import call_command
+        output = tmp_path / 'bench.json'
+        call_command(
+            'forecast_benchmark', models='exponential,ensemble', lengths='30,120', batch_products=5,
+            batch_days=60, batch_models='hw_vectorized', output=str(output), stdout=io.StringIO(), stderr=io.StringIO()
+        )
+
+        results = json.loads(output.read_text())
+        assert {(r['model'], r['length'], r['demand']) for r in results['engine']} == {
+            (m, n, d) for m in ('exponential', 'ensemble') for n in (30, 120) for d in ('dense', 'sparse')
+        }
+        assert all(r['seconds'] > 0 for r in results['engine'])
+        assert results['batch'][0]['products'] == 5 and results['batch'][0]['products_per_sec'] > 0
+        assert not Product.objects.exists() and not ForecastResult.objects.exists()
+
+
+@pytest.mark.django_db
+class TestGenerateSales:
+    def run(self, **options):
+        import io
+        from django.core.management import call_command
+        out = io.StringIO()
+        call_command('generate_sales', products=30, days=60, end_date=date(2025, 3, 31), stdout=out,
+                     stderr=io.StringIO(), **options)
+        return out.getvalue()
+
+    def sales(self):
+        return list(Sale.objects.order_by('product__sku', 'sale_date')
+                    .values_list('product__sku', 'sale_date', 'quantity', 'total_price'))
+
+    def test_same_seed_regenerates_the_same_history(self):
+        report = self.run(seed=7)
+        first = self.sales()
+        self.run(seed=7, flush=True)
+
+        assert Product.objects.count() == 30
+        assert self.sales() == first
+        assert f"{len(first)} sales" in report and 'rows/s' in report
+        assert min(s[1] for s in first) >= date(2025, 1, 31) and max(s[1] for s in first) <= date(2025, 3, 31)
+        price = dict(Product.objects.values_list('sku', 'price'))
+        assert all(total == price[sku] * qty for sku, _, qty, total in first)
+
+    def test_refuses_to_duplicate_a_seed(self):
+        from django.core.management.base import CommandError
+        self.run(seed=1)
+        with pytest.raises(CommandError):
+            self.run(seed=1)
+
+
+class TestLoadTest:
+    def run(self, live_server, tmp_path, **options):
+        import io
+        from django.core.management import call_command
+        out = io.StringIO()
+        options = dict({'concurrency': 3}, **options)
+        call_command('loadtest', url=live_server.url, mix='products=1,sales=1', requests=20,
+                     output=str(tmp_path / 'run.json'), stdout=out, stderr=io.StringIO(), **options)
+        return json.loads((tmp_path / 'run.json').read_text()), out.getvalue()
+
+    def test_reports_percentiles_and_query_counts_per_endpoint(self, live_server, tmp_path, settings, transactional_db):
+        settings.QUERY_COUNT_HEADERS = True
+        make_product('LOAD-1', days=20)
+        results, report = self.run(live_server, tmp_path)
+
+        assert set(results['endpoints']) == {'products', 'sales'}
+        assert results['total']['requests'] == 20 and results['total']['errors'] == 0
+        products = results['endpoints']['products']
+        assert products['p50_ms'] <= products['p95_ms'] <= products['p99_ms']
+        assert products['queries_max'] >= 1
+        assert 'products' in report and 'p95ms' in report
+
+    def test_fails_when_an_endpoint_runs_more_queries_than_the_baseline(
+            self, live_server, tmp_path, settings, transactional_db):
+        from django.core.management.base import CommandError
+        settings.QUERY_COUNT_HEADERS = True
+        make_product('LOAD-1', days=20)
+        # One user: live_server shares a single SQLite connection, so
+        # concurrent requests would count each other's queries
+        baseline = {'endpoints': {'sales': {'p95_ms': 1e9, 'queries_max': 1}}}
+        (tmp_path / 'base.json').write_text(json.dumps(baseline))
+
+        with pytest.raises(CommandError, match='sales: up to 2 queries, was 1'):
+            self.run(live_server, tmp_path, concurrency=1, compare=str(tmp_path / 'base.json'), max_regression=100.0)
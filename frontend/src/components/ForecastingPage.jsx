@@ -1,5 +1,5 @@
 import React, { useState, useRef, useEffect } from 'react';
-import { Download, Activity, TrendingUp, Loader2, AlertCircle, CheckCircle, Info, Package } from 'lucide-react';
+import { Download, Activity, TrendingUp, Loader2, AlertCircle, CheckCircle, Info, Package, Layers } from 'lucide-react';
 import html2canvas from 'html2canvas';
 import ForecastChart from './ForecastChart';
 import api from '../services/api';
@@ -18,6 +18,11 @@ const ForecastingPage = () => {
     const [forecastResult, setForecastResult] = useState(null);
     const [error, setError] = useState(null);
 
+    // Batch forecast of every product: live progress pushed by the server
+    const [batch, setBatch] = useState(null);
+    const batchSource = useRef(null);
+    const batchPoll = useRef(null);
+
     // Fetch products on mount
     useEffect(() => {
         const fetchProducts = async () => {
@@ -38,6 +43,79 @@ const ForecastingPage = () => {
         fetchProducts();
     }, []);
 
+    const stopBatchUpdates = () => {
+        batchSource.current?.close();
+        batchSource.current = null;
+        clearTimeout(batchPoll.current);
+    };
+
+    // Close the stream when leaving the page
+    useEffect(() => stopBatchUpdates, []);
+
+    const finishBatch = (status) => {
+        stopBatchUpdates();
+        setBatch(prev => ({ ...prev, running: false, status: status.status, progress: status.progress || prev?.progress }));
+        const summary = status.result?.summary;
+        if (status.status === 'SUCCESS' && summary) {
+            toast.success(`Batch forecast done: ${summary.success} of ${summary.total} products updated`);
+        } else {
+            toast.error('Batch forecast failed');
+        }
+    };
+
+    // Fallback for browsers without EventSource: poll with a growing interval
+    const pollBatch = (taskId, delay = 2000) => {
+        batchPoll.current = setTimeout(async () => {
+            try {
+                const { data } = await api.get(`/forecasting/batch-status/${taskId}/`);
+                if (data.ready) {
+                    finishBatch(data);
+                    return;
+                }
+                setBatch(prev => ({ ...prev, progress: data.progress }));
+            } catch (err) {
+                console.error('Batch status error:', err);
+            }
+            pollBatch(taskId, Math.min(delay * 1.5, 15000));
+        }, delay);
+    };
+
+    const startBatchForecast = async () => {
+        if (products.length === 0) return;
+        stopBatchUpdates();
+
+        try {
+            const response = await api.post('/forecasting/batch-predict/', {
+                product_ids: products.map(p => p.id),
+                days: days,
+                model: modelType
+            });
+            const taskId = response.data.task_id;
+            setBatch({ taskId, running: true, progress: null, failures: {} });
+
+            if (!window.EventSource) {
+                pollBatch(taskId);
+                return;
+            }
+            const source = new EventSource(`${api.defaults.baseURL}/forecasting/batch-events/${taskId}/`);
+            source.addEventListener('progress', (e) => {
+                const { results, ...progress } = JSON.parse(e.data);
+                setBatch(prev => {
+                    // Keyed by product so entries replayed on reconnect are not counted twice
+                    const failures = { ...prev.failures };
+                    results.filter(r => r.status === 'error' || r.status === 'failed')
+                        .forEach(r => { failures[r.product_id] = r.error; });
+                    return { ...prev, progress, failures };
+                });
+            });
+            source.addEventListener('done', (e) => finishBatch(JSON.parse(e.data)));
+            batchSource.current = source;
+        } catch (err) {
+            console.error('Batch forecast error:', err);
+            toast.error(err.response?.data?.error || 'Failed to start batch forecast');
+        }
+    };
+
     const generateForecast = async () => {
         if (!selectedProduct) {
             toast.error('Please select a product');
@@ -176,6 +254,14 @@ const ForecastingPage = () => {
                     >
                         <Download className="h-4 w-4" /> PNG
                     </button>
+                    <button
+                        onClick={startBatchForecast}
+                        disabled={batch?.running || products.length === 0}
+                        className="inline-flex items-center gap-2 rounded-lg border border-slate-200 bg-white px-4 py-2 text-sm font-medium hover:bg-slate-50 disabled:opacity-50 disabled:cursor-not-allowed transition-colors"
+                    >
+                        {batch?.running ? <Loader2 className="h-4 w-4 animate-spin" /> : <Layers className="h-4 w-4" />}
+                        Forecast All
+                    </button>
                     <button 
                         onClick={generateForecast} 
                         disabled={loading || !selectedProduct}
@@ -269,6 +355,9 @@ const ForecastingPage = () => {
                 </div>
             </div>
 
+            {/* Batch Progress */}
+            {batch && <BatchProgressPanel batch={batch} />}
+
             {/* Error Alert */}
             {error && (
                 <div className="flex items-center gap-3 rounded-lg bg-red-50 border border-red-200 p-4">
@@ -421,6 +510,40 @@ const MetricCard = ({ label, value, description, color, good }) => {
     );
 };
 
+// Batch Progress Component
+const BatchProgressPanel = ({ batch }) => {
+    const progress = batch.progress;
+    const failures = Object.keys(batch.failures || {}).length;
+    const eta = progress?.eta_seconds;
+
+    return (
+        <div className="rounded-xl bg-white p-4 shadow-sm border border-slate-100">
+            <div className="flex items-center justify-between text-sm">
+                <p className="font-medium text-slate-800">
+                    {batch.running ? 'Forecasting all products...' : `Batch forecast ${batch.status === 'SUCCESS' ? 'complete' : 'stopped'}`}
+                </p>
+                <p className="text-slate-500">
+                    {progress ? `${progress.done} / ${progress.total}` : 'Queued'}
+                </p>
+            </div>
+            <div className="mt-2 h-2 w-full rounded-full bg-slate-100">
+                <div
+                    className="h-2 rounded-full bg-indigo-600 transition-all"
+                    style={{ width: `${progress?.percent || 0}%` }}
+                />
+            </div>
+            {progress && (
+                <p className="mt-2 text-xs text-slate-500">
+                    {progress.throughput} products/s
+                    {batch.running && eta !== null && eta !== undefined && ` · about ${Math.ceil(eta)}s left`}
+                    {progress.counts?.skipped ? ` · ${progress.counts.skipped} skipped` : ''}
+                    {failures ? ` · ${failures} failed` : ''}
+                </p>
+            )}
+        </div>
+    );
+};
+
 // Summary Card Component
 const SummaryCard = ({ label, value, unit }) => (
     <div className="text-center p-4 rounded-lg bg-slate-50">